@@ -0,0 +1,70 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Reports how long a cold `import supertokens_python` takes, using a fresh interpreter
+with -X importtime for every run:
+
+    python benchmarks/import_time.py --runs 10 --top 15
+    python benchmarks/import_time.py --module "supertokens_python.recipe.session"
+"""
+import argparse
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List, Tuple
+
+
+def import_times(module: str) -> Dict[str, int]:
+    # module -> cumulative import time in microseconds
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            universal_newlines=True, check=True)
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='supertokens_python')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10,
+                        help='number of imported packages to list, by their median cumulative time')
+    args = parser.parse_args()
+
+    runs: List[Dict[str, int]] = [import_times(args.module) for _ in range(args.runs)]
+    totals = [run[args.module] for run in runs]
+    print(f'import {args.module}: median {median(totals) / 1000:.1f}ms, '
+          f'min {min(totals) / 1000:.1f}ms, max {max(totals) / 1000:.1f}ms over {args.runs} runs')
+
+    # only the top level packages, since their cumulative time includes their submodules
+    packages: Dict[str, List[int]] = {}
+    for run in runs:
+        for name, cumulative in run.items():
+            if '.' not in name and name != args.module:
+                packages.setdefault(name, []).append(cumulative)
+    slowest: List[Tuple[str, float]] = sorted(((name, median(times)) for name, times in packages.items()),
+                                              key=lambda p: p[1], reverse=True)
+    for name, time in slowest[:args.top]:
+        print(f'  {time / 1000:8.1f}ms  {name}')
+
+    print('\nloaded modules of this SDK:', len([name for name in runs[0] if name.startswith('supertokens_python')]))
+
+
+if __name__ == '__main__':
+    main()
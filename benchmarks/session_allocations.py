@@ -0,0 +1,224 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Reports what get_session costs per request when the access token can be verified without
+calling the core: the memory blocks and bytes that a request allocates and keeps for as long
+as its session is alive (measured with tracemalloc, keeping every session), the most memory it
+uses at any one time, which includes what it frees before returning (Python 3.9+), and the
+time it takes. Both the path where the verified token is cached and the one that checks its
+signature are measured, once as the SDK is and once with plain classes, whose instances keep
+their attributes in a __dict__, in place of the slotted ones that a request creates. The bytes
+that an instance of each of those classes takes are reported for both as well. No core is
+needed:
+
+    python benchmarks/session_allocations.py --requests 10000
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+from base64 import b64encode
+from json import dumps
+from time import perf_counter
+from types import MemberDescriptorType
+from typing import Any, Dict, List, Union
+from unittest.mock import patch
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from Crypto.Signature.pkcs1_15 import PKCS115_SigScheme
+from supertokens_python.recipe.session import access_token as access_token_module
+from supertokens_python.recipe.session import session_functions
+from supertokens_python.recipe.session.recipe_implementation import (
+    HandshakeInfo, RecipeImplementation)
+from supertokens_python.utils import get_timestamp_ms, utf_base64encode
+
+
+class Config:
+    framework = 'fastapi'
+    anti_csrf = 'NONE'
+    verification_executor = None
+    verify_result_cache = None
+    handshake_info_store = None
+
+
+class Request:
+    wrapper_used = True
+
+    def __init__(self, access_token: str):
+        self.cookies = {'sAccessToken': access_token, 'sIdRefreshToken': 'idRefreshToken'}
+        self.session: Any = None
+
+    def get_cookie(self, key: str) -> Union[str, None]:
+        return self.cookies.get(key)
+
+    def get_header(self, _: str) -> Union[str, None]:
+        return None
+
+    def method(self) -> str:
+        return 'get'
+
+    def set_session(self, session: Any):
+        self.session = session
+
+    def get_session(self) -> Any:
+        return self.session
+
+
+def without_slots(cls: type) -> type:
+    # the same methods, so only where the attributes are kept differs
+    namespace = {key: value for key, value in vars(cls).items()
+                 if key not in ('__slots__', '__dict__', '__weakref__')
+                 and not isinstance(value, MemberDescriptorType)}
+    return type(cls.__name__, (), namespace)
+
+
+def create_access_token(private_key: Any, user_id: str = 'user') -> str:
+    now = get_timestamp_ms()
+    header = utf_base64encode(dumps({'alg': 'RS256', 'typ': 'JWT', 'version': '2'},
+                                    separators=(',', ':'), sort_keys=True))
+    body = utf_base64encode(dumps({
+        'sessionHandle': 'handle',
+        'userId': user_id,
+        'refreshTokenHash1': 'hash',
+        'parentRefreshTokenHash1': None,
+        'userData': {'role': 'admin'},
+        'antiCsrfToken': None,
+        'expiryTime': now + 3600000,
+        'timeCreated': now
+    }))
+    signature = PKCS115_SigScheme(private_key).sign(SHA256.new((header + '.' + body).encode('utf-8')))
+    return header + '.' + body + '.' + b64encode(signature).decode('utf-8')
+
+
+def create_recipe_implementation(public_key: str) -> RecipeImplementation:
+    recipe_implementation = RecipeImplementation(None, Config())  # type: ignore
+    handshake_info = HandshakeInfo({
+        'accessTokenBlacklistingEnabled': False,
+        'antiCsrf': 'NONE',
+        'accessTokenValidity': 3600000,
+        'refreshTokenValidity': 3600000
+    })
+    handshake_info.set_jwt_signing_public_key_list([{
+        'publicKey': public_key,
+        'expiryTime': get_timestamp_ms() + 3600000,
+        'createdAt': get_timestamp_ms() - 1000
+    }])
+    recipe_implementation.handshake_info = handshake_info
+    return recipe_implementation
+
+
+def measure_instances(cls: type, args: List[Any], count: int) -> float:
+    instances: List[Any] = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        instances.append(cls(*args))
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # less the list holding them
+    return (size - sys.getsizeof(instances)) / count
+
+
+async def measure(recipe_implementation: RecipeImplementation, access_token: str,
+                  requests: int, cached: bool) -> Dict[str, float]:
+    cache = recipe_implementation.handshake_info.verified_access_token_cache  # type: ignore
+
+    async def get_session() -> Any:
+        if not cached:
+            cache.clear()
+        return await recipe_implementation.get_session(Request(access_token), None, True, {})
+
+    # warms up the caches (parsed key, verified token, normalised paths...)
+    await get_session()
+
+    sessions: List[Any] = []
+    gc.collect()
+    gc.disable()
+    try:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for _ in range(requests):
+            sessions.append(await get_session())
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    finally:
+        gc.enable()
+    # only what this SDK allocates, not the list holding the sessions or the snapshots
+    diff = [stat for stat in after.filter_traces([tracemalloc.Filter(True, '*supertokens_python*')])
+            .compare_to(before.filter_traces([tracemalloc.Filter(True, '*supertokens_python*')]), 'filename')]
+    blocks = sum(stat.count_diff for stat in diff)
+    size = sum(stat.size_diff for stat in diff)
+    del sessions
+
+    peak = 0
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.start()
+        for _ in range(requests):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            session = await get_session()
+            peak += tracemalloc.get_traced_memory()[1] - current
+            del session
+        tracemalloc.stop()
+
+    start = perf_counter()
+    for _ in range(requests):
+        await get_session()
+    elapsed = perf_counter() - start
+    return {'blocks': blocks / requests, 'bytes': size / requests, 'peak': peak / requests,
+            'us': elapsed / requests * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=10000)
+    args = parser.parse_args()
+
+    private_key = RSA.generate(2048)
+    public_key = b64encode(private_key.publickey().export_key('DER')).decode('utf-8')
+    access_token = create_access_token(private_key)
+    recipe_implementation = create_recipe_implementation(public_key)
+
+    for cls, instance_args in ((session_functions.SessionObj, ['handle', 'user', {}]),
+                               (access_token_module.AccessTokenInfo,
+                                ['handle', 'user', 'hash', None, {}, None, 0, 0])):
+        slotted = measure_instances(cls, instance_args, args.requests)
+        baseline = measure_instances(without_slots(cls), instance_args, args.requests)
+        print(f'{cls.__name__}: {slotted:.0f} bytes slotted, {baseline:.0f} bytes baseline per instance')
+
+    loop = asyncio.new_event_loop()
+    try:
+        for variant in ('slotted', 'baseline'):
+            with patch.object(session_functions, 'SessionObj',
+                              without_slots(session_functions.SessionObj) if variant == 'baseline'
+                              else session_functions.SessionObj), \
+                    patch.object(access_token_module, 'AccessTokenInfo',
+                                 without_slots(access_token_module.AccessTokenInfo) if variant == 'baseline'
+                                 else access_token_module.AccessTokenInfo):
+                # checking the signature takes far longer, so it gets fewer requests
+                for name, cached, requests in (('verified token cached', True, args.requests),
+                                               ('signature checked', False, max(args.requests // 10, 1))):
+                    result = loop.run_until_complete(
+                        measure(recipe_implementation, access_token, requests, cached))
+                    print(f"{variant} get_session, {name}: {result['blocks']:.1f} blocks / "
+                          f"{result['bytes']:.0f} bytes kept per request, {result['peak']:.0f} bytes at peak, "
+                          f"{result['us']:.1f}us per request")
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
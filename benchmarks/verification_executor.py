@@ -0,0 +1,98 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Reports how long the event loop is blocked while get_session checks the signatures of a burst
+of access tokens, without a verification executor and with each of its modes. Every round
+sends --concurrency get_session calls at once, while a ticker measures how late the loop runs
+its other callbacks. The off loop modes only help on hosts with more than one CPU. No core is
+needed:
+
+    python benchmarks/verification_executor.py --rounds 50 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+from base64 import b64encode
+from time import perf_counter
+from typing import Any, Dict, List, Union
+
+from Crypto.PublicKey import RSA
+from session_allocations import (Request, create_access_token,
+                                 create_recipe_implementation)
+from supertokens_python.recipe.session.verification_executor import \
+    VerificationExecutor
+
+TICK_INTERVAL_S = 0.001
+
+
+async def measure(recipe_implementation: Any, access_tokens: List[str], rounds: int) -> Dict[str, float]:
+    cache = recipe_implementation.handshake_info.verified_access_token_cache
+    delays: List[float] = []
+    done = False
+
+    async def tick():
+        while not done:
+            start = perf_counter()
+            await asyncio.sleep(TICK_INTERVAL_S)
+            delays.append(perf_counter() - start - TICK_INTERVAL_S)
+
+    async def get_session(access_token: str) -> Any:
+        return await recipe_implementation.get_session(Request(access_token), None, True, {})
+
+    ticker = asyncio.ensure_future(tick())
+    start = perf_counter()
+    for _ in range(rounds):
+        # the tokens are different, so every call checks a signature
+        cache.clear()
+        await asyncio.gather(*[get_session(access_token) for access_token in access_tokens])
+    elapsed = perf_counter() - start
+    done = True
+    await ticker
+
+    delays.sort()
+    return {'max': delays[-1] * 1000, 'p99': delays[int(len(delays) * 0.99)] * 1000,
+            'rps': rounds * len(access_tokens) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    private_key = RSA.generate(2048)
+    public_key = b64encode(private_key.publickey().export_key('DER')).decode('utf-8')
+    recipe_implementation = create_recipe_implementation(public_key)
+    access_tokens = [create_access_token(private_key, 'user' + str(i)) for i in range(args.concurrency)]
+
+    print(f'{os.cpu_count()} CPUs')
+    loop = asyncio.new_event_loop()
+    try:
+        executors: List[Union[VerificationExecutor, None]] = [
+            None, VerificationExecutor('inline', max_batch_size=4), VerificationExecutor('thread', max_batch_size=4)]
+        for executor in executors:
+            recipe_implementation.config.verification_executor = executor  # type: ignore
+            result = loop.run_until_complete(
+                measure(recipe_implementation, access_tokens, args.rounds))
+            name = 'no executor' if executor is None else executor.mode + ' executor'
+            print(f"{name}: event loop late by {result['p99']:.1f}ms at p99 and {result['max']:.1f}ms at most, "
+                  f"{result['rps']:.0f} verifications/s")
+            if executor is not None:
+                executor.shutdown()
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,10 @@ extras_require = {
         'uvicorn==0.13.4',
         'python-dotenv==0.19.2',
     ]),
+    # needed for SupertokensConfig(http2=True)
+    'http2': ([
+        'httpx[http2]>=0.15.0 ,<0.23.0',
+    ]),
 }
 
 exclude_list = [
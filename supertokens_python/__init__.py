@@ -29,10 +29,20 @@ def init(app_info: InputAppInfo,
          supertokens_config: SupertokensConfig,
          recipe_list: List[Callable[[supertokens.AppInfo], RecipeModule]],
          mode: Union[Literal['asgi', 'wsgi'], None] = None,
-         telemetry: Union[bool, None] = None):
+         telemetry: Union[bool, None] = None,
+         background_event_loop: bool = False,
+         warmup: Union[bool, None] = None):
     return Supertokens.init(app_info, framework,
-                            supertokens_config, recipe_list, mode, telemetry)
+                            supertokens_config, recipe_list, mode, telemetry, background_event_loop, warmup)
 
 
 def get_all_cors_headers() -> List[str]:
     return supertokens.Supertokens.get_instance().get_all_cors_headers()
+
+
+async def ready(timeout: Union[float, None] = None) -> bool:
+    return await supertokens.Supertokens.get_instance().warmup.ready(timeout)
+
+
+def is_ready() -> bool:
+    return supertokens.Supertokens.get_instance().warmup.is_ready()
@@ -13,11 +13,79 @@
 # under the License.
 
 import asyncio
-from typing import Any, Coroutine, TypeVar
+from os import getpid
+from threading import Lock, Thread, current_thread
+from typing import Any, Coroutine, TypeVar, Union
+
+from .exceptions import raise_general_exception
 
 _T = TypeVar("_T")
 
 
+class _BackgroundEventLoop:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.pid = getpid()
+        self.thread = Thread(target=self.__run, name='supertokens-event-loop', daemon=True)
+        self.thread.start()
+
+    def __run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stop(self):
+        from .querier import Querier  # pylint: disable=import-outside-toplevel
+        # the connections to the core opened from this loop can't be closed once it is
+        try:
+            asyncio.run_coroutine_threadsafe(Querier.close(), self.loop).result()
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+_use_background_event_loop = False
+_background_event_loop: Union[_BackgroundEventLoop, None] = None
+_background_event_loop_lock = Lock()
+
+
+def use_background_event_loop(enable: bool = True):
+    """
+    If enabled, sync runs the coroutines on one event loop thread shared by the whole process,
+    instead of on an event loop of the calling thread. This lets all the threads of a WSGI
+    server share the connections to the core and everything else that is per event loop.
+    """
+    global _use_background_event_loop, _background_event_loop  # pylint: disable=global-statement
+    with _background_event_loop_lock:
+        _use_background_event_loop = enable
+        if not enable and _background_event_loop is not None:
+            if _background_event_loop.pid == getpid():
+                _background_event_loop.stop()
+            _background_event_loop = None
+
+
+def _get_background_event_loop() -> Union[_BackgroundEventLoop, None]:
+    global _background_event_loop  # pylint: disable=global-statement
+    if not _use_background_event_loop:
+        return None
+    with _background_event_loop_lock:
+        # the thread running the loop doesn't survive a fork, so each worker process starts its own
+        if _background_event_loop is None or _background_event_loop.pid != getpid():
+            _background_event_loop = _BackgroundEventLoop()
+        return _background_event_loop
+
+
+def get_background_event_loop() -> Union[asyncio.AbstractEventLoop, None]:
+    """
+    The event loop sync runs coroutines on if the background event loop is used, else None.
+    """
+    background_event_loop = _get_background_event_loop()
+    if background_event_loop is None:
+        return None
+    return background_event_loop.loop
+
+
 def check_event_loop():
     try:
         asyncio.get_event_loop()
@@ -28,6 +96,15 @@ def check_event_loop():
 
 
 def sync(co: Coroutine[Any, Any, _T]) -> _T:
+    background_event_loop = _get_background_event_loop()
+    if background_event_loop is not None:
+        if background_event_loop.thread is current_thread():
+            # the loop is busy running the caller, so it can't run co until the caller returns
+            co.close()
+            raise_general_exception('The sync functions can\'t be called from code running on the background '
+                                    'event loop. Use the asyncio functions there instead')
+        return asyncio.run_coroutine_threadsafe(co, background_event_loop.loop).result()
+
     check_event_loop()
     loop = asyncio.get_event_loop()
     return loop.run_until_complete(co)
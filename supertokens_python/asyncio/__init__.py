@@ -14,6 +14,7 @@
 from typing import List, Union
 
 from supertokens_python import Supertokens
+from supertokens_python.querier import Querier
 from supertokens_python.types import UsersResponse
 
 
@@ -33,3 +34,11 @@ async def get_user_count(include_recipe_ids: Union[None, List[str]] = None) -> i
 
 async def delete_user(user_id: str) -> None:
     return await Supertokens.get_instance().delete_user(user_id)
+
+
+async def close() -> None:
+    """
+    Closes the pooled connections to the SuperTokens core. Call this from your
+    ASGI app's shutdown / lifespan handler.
+    """
+    return await Querier.close()
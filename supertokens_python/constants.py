@@ -25,3 +25,6 @@ RID_KEY_HEADER = 'rid'
 FDI_KEY_HEADER = 'fdi-version'
 API_VERSION = '/apiversion'
 API_VERSION_HEADER = 'cdi-version'
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 5.0
@@ -15,3 +15,5 @@ from . import request
 from . import response
 BaseRequest = request.BaseRequest
 BaseResponse = response.BaseResponse
+RequestBody = request.RequestBody
+set_json_decoder = request.set_json_decoder
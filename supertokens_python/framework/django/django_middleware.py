@@ -16,7 +16,8 @@ from __future__ import annotations
 import asyncio
 from typing import Any, Union
 
-from asgiref.sync import async_to_sync
+from supertokens_python.async_to_sync_wrapper import sync
+from supertokens_python.framework import BaseResponse
 
 
 def middleware(get_response: Any):
@@ -34,14 +35,16 @@ def middleware(get_response: Any):
     if asyncio.iscoroutinefunction(get_response):
         async def __asyncMiddleware(request: HttpRequest):
             st = Supertokens.get_instance()
-            custom_request = DjangoRequest(request)
             from django.http import HttpResponse
-            response = DjangoResponse(HttpResponse())
             try:
-                result = await st.middleware(custom_request, response)
+                result = None
+                if not st.route_table.is_outside_api_base_path(request.path):
+                    result = await st.middleware(DjangoRequest(request), DjangoResponse(HttpResponse()))
                 if result is None:
-                    result = await get_response(request)
-                    result = DjangoResponse(result)
+                    response = await get_response(request)
+                    if not hasattr(request, "supertokens"):
+                        return response
+                    result = DjangoResponse(response)
                 if hasattr(request, "supertokens") and isinstance(
                         request.supertokens, SessionContainer):  # type: ignore
                     manage_cookies_post_response(
@@ -59,27 +62,33 @@ def middleware(get_response: Any):
 
     def __syncMiddleware(request: HttpRequest):
         st = Supertokens.get_instance()
-        custom_request = DjangoRequest(request)
         from django.http import HttpResponse
-        response = DjangoResponse(HttpResponse())
         try:
-            result: Union[DjangoResponse, None] = async_to_sync(
-                st.middleware)(custom_request, response)
+            result: Union[BaseResponse, None] = None
+            if not st.route_table.is_outside_api_base_path(request.path):
+                # matching the request is sync, so we only run the event loop for SuperTokens APIs
+                custom_request = DjangoRequest(request)
+                matched_api = st.match_request(custom_request)
+                if matched_api is not None:
+                    result = sync(st.handle_matched_request(matched_api, custom_request, DjangoResponse(HttpResponse())))
 
             if result is None:
-                result = DjangoResponse(get_response(request))
+                response = get_response(request)
+                if not hasattr(request, "supertokens"):
+                    return response
+                result = DjangoResponse(response)
 
             if hasattr(request, "supertokens") and isinstance(
                     request.supertokens, SessionContainer):  # type: ignore
                 manage_cookies_post_response(
                     request.supertokens, result)  # type: ignore
-            return result.response
+            if isinstance(result, DjangoResponse):
+                return result.response
 
         except SuperTokensError as e:
             response = DjangoResponse(HttpResponse())
-            result: Union[DjangoResponse, None] = async_to_sync(st.handle_supertokens_error)(
-                DjangoRequest(request), e, response)
-            if result is not None:
+            result = sync(st.handle_supertokens_error(DjangoRequest(request), e, response))
+            if isinstance(result, DjangoResponse):
                 return result.response
         raise Exception("Should never come here")
 
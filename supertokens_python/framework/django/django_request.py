@@ -13,11 +13,9 @@
 # under the License.
 from __future__ import annotations
 
-import json
-from typing import TYPE_CHECKING, Any, Union
-from urllib.parse import parse_qsl
+from typing import TYPE_CHECKING, Union
 
-from supertokens_python.framework.request import BaseRequest
+from supertokens_python.framework.request import BaseRequest, RequestBody
 
 if TYPE_CHECKING:
     from supertokens_python.recipe.session.interfaces import SessionContainer
@@ -34,13 +32,6 @@ class DjangoRequest(BaseRequest):
             self, key: str, default: Union[str, None] = None) -> Union[str, None]:
         return self.request.GET.get(key, default)
 
-    async def json(self) -> Union[Any, None]:
-        try:
-            body = json.loads(self.request.body)
-            return body
-        except Exception:
-            return {}
-
     def method(self) -> str:
         if self.request.method is None:
             raise Exception("Should never come here")
@@ -66,5 +57,12 @@ class DjangoRequest(BaseRequest):
     def get_path(self) -> str:
         return self.request.path
 
-    async def form_data(self):
-        return dict(parse_qsl(self.request.body.decode('utf-8')))
+    def get_request_body(self) -> RequestBody:
+        body = getattr(self.request, 'supertokens_body', None)
+        if body is None:
+            body = RequestBody()
+            self.request.supertokens_body = body  # type: ignore
+        return body
+
+    async def read_body(self) -> bytes:
+        return self.request.body
@@ -18,50 +18,72 @@ from typing import TYPE_CHECKING, Union
 from supertokens_python.framework import BaseResponse
 
 if TYPE_CHECKING:
-    from fastapi import FastAPI, Request
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
 def get_middleware():
-    from starlette.middleware.base import (BaseHTTPMiddleware,
-                                           RequestResponseEndpoint)
+    from supertokens_python import Supertokens
+    from supertokens_python.exceptions import SuperTokensError
+    from supertokens_python.framework.fastapi.fastapi_request import \
+        FastApiRequest
+    from supertokens_python.framework.fastapi.fastapi_response import \
+        FastApiResponse
+    from supertokens_python.recipe.session import SessionContainer
+    from supertokens_python.supertokens import manage_cookies_post_response
 
-    class Middleware(BaseHTTPMiddleware):
+    from fastapi import Request
+    from fastapi.responses import Response
 
-        def __init__(self, app: FastAPI):
-            super().__init__(app)
+    class Middleware:
+        """
+        Plain ASGI middleware, so that the responses of the app (including streaming ones)
+        pass through as they are. The only change made to them is adding the session
+        cookies and headers to the http.response.start message, if a session was attached
+        to the request.
+        """
+
+        def __init__(self, app: ASGIApp):
+            self.app = app
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send):
+            if scope['type'] != 'http':
+                await self.app(scope, receive, send)
+                return
 
-        async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
-            from supertokens_python import Supertokens
-            from supertokens_python.exceptions import SuperTokensError
-            from supertokens_python.framework.fastapi.fastapi_request import \
-                FastApiRequest
-            from supertokens_python.framework.fastapi.fastapi_response import \
-                FastApiResponse
-            from supertokens_python.recipe.session import SessionContainer
-            from supertokens_python.supertokens import \
-                manage_cookies_post_response
             st = Supertokens.get_instance()
-            from fastapi.responses import Response
+            request = Request(scope, receive)
+            response_started = False
+
+            async def send_with_session_cookies(message: Message):
+                nonlocal response_started
+                if message['type'] == 'http.response.start':
+                    response_started = True
+                    session = request.state.supertokens if hasattr(request.state, 'supertokens') else None
+                    if isinstance(session, SessionContainer):
+                        response = Response(status_code=message['status'])
+                        response.raw_headers = list(message.get('headers', []))
+                        manage_cookies_post_response(session, FastApiResponse(response))
+                        message['headers'] = response.raw_headers
+                await send(message)
 
             try:
-                custom_request = FastApiRequest(request)
-                response = FastApiResponse(Response())
-                result: Union[BaseResponse, None] = await st.middleware(custom_request, response)
-                if result is None:
-                    response = await call_next(request)
-                    result = FastApiResponse(response)
+                if not st.route_table.is_outside_api_base_path(scope.get('root_path', '') + scope['path']):
+                    result: Union[BaseResponse, None] = await st.middleware(FastApiRequest(request),
+                                                                            FastApiResponse(Response()))
+                    if result is not None:
+                        if isinstance(result, FastApiResponse):
+                            await result.response(scope, receive, send_with_session_cookies)
+                            return
+                        raise Exception("Should never come here")
 
-                if hasattr(request.state, "supertokens") and isinstance(
-                        request.state.supertokens, SessionContainer):
-                    manage_cookies_post_response(request.state.supertokens, result)
-                if isinstance(result, FastApiResponse):
-                    return result.response
+                await self.app(scope, receive, send_with_session_cookies)
             except SuperTokensError as e:
-                response = FastApiResponse(Response())
-                result: Union[BaseResponse, None] = await st.handle_supertokens_error(FastApiRequest(request), e, response)
+                if response_started:
+                    raise e
+                result = await st.handle_supertokens_error(FastApiRequest(request), e, FastApiResponse(Response()))
                 if isinstance(result, FastApiResponse):
-                    return result.response
-
-            raise Exception("Should never come here")
+                    await result.response(scope, receive, send)
+                    return
+                raise Exception("Should never come here")
 
     return Middleware
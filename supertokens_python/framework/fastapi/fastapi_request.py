@@ -13,10 +13,9 @@
 # under the License.
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Union
-from urllib.parse import parse_qsl
+from typing import TYPE_CHECKING, Union
 
-from supertokens_python.framework.request import BaseRequest
+from supertokens_python.framework.request import BaseRequest, RequestBody
 
 if TYPE_CHECKING:
     from supertokens_python.recipe.session.interfaces import SessionContainer
@@ -34,12 +33,6 @@ class FastApiRequest(BaseRequest):
             self, key: str, default: Union[str, None] = None) -> Union[str, None]:
         return self.request.query_params.get(key, default)
 
-    async def json(self) -> Union[Any, None]:
-        try:
-            return await self.request.json()
-        except Exception:
-            return {}
-
     def method(self) -> str:
         return self.request.method
 
@@ -61,5 +54,12 @@ class FastApiRequest(BaseRequest):
     def get_path(self) -> str:
         return self.request.url.path
 
-    async def form_data(self):
-        return dict(parse_qsl((await self.request.body()).decode('utf-8')))
+    def get_request_body(self) -> RequestBody:
+        body = getattr(self.request.state, 'supertokens_body', None)
+        if body is None:
+            body = RequestBody()
+            self.request.state.supertokens_body = body
+        return body
+
+    async def read_body(self) -> bytes:
+        return await self.request.body()
@@ -50,6 +50,8 @@ class Middleware:
             from flask.wrappers import Response
 
             st = Supertokens.get_instance()
+            if st.route_table.is_outside_api_base_path(request.script_root + request.path):
+                return None
 
             request_ = FlaskRequest(request)
             response_ = FlaskResponse(Response())
@@ -66,9 +68,10 @@ class Middleware:
         @app.after_request
         def _(response: Response):
             from flask import g
+            if not hasattr(g, 'supertokens') or g.supertokens is None:
+                return response
             response_ = FlaskResponse(response)
-            if hasattr(g, 'supertokens') and g.supertokens is not None:
-                manage_cookies_post_response(g.supertokens, response_)
+            manage_cookies_post_response(g.supertokens, response_)
 
             return response_.response
 
@@ -15,7 +15,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, Dict, Union
 
-from supertokens_python.framework.request import BaseRequest
+from supertokens_python.framework.request import BaseRequest, RequestBody
 
 if TYPE_CHECKING:
     from supertokens_python.recipe.session.interfaces import SessionContainer
@@ -31,12 +31,6 @@ class FlaskRequest(BaseRequest):
     def get_query_param(self, key: str, default: Union[str, None] = None):
         return self.request.args.get(key, default)
 
-    async def json(self) -> Union[Any, None]:
-        try:
-            return self.request.get_json()
-        except Exception:
-            return {}
-
     def method(self) -> str:
         if isinstance(self.request, dict):
             temp: str = self.request['REQUEST_METHOD']
@@ -71,5 +65,23 @@ class FlaskRequest(BaseRequest):
             return temp
         return self.request.base_url
 
-    async def form_data(self) -> Dict[str, Any]:
+    def get_request_body(self) -> RequestBody:
+        from flask import g
+        body = getattr(g, 'supertokens_body', None)
+        if body is None:
+            body = RequestBody()
+            g.supertokens_body = body
+        return body
+
+    async def read_body(self) -> bytes:
+        return self.request.get_data()
+
+    async def parse_json(self) -> Any:
+        # like request.get_json(), bodies without a JSON content type are None
+        if not self.request.is_json:
+            return None
+        return await super().parse_json()
+
+    async def parse_form_data(self) -> Dict[str, Any]:
+        # werkzeug also parses multipart forms
         return self.request.form.to_dict()
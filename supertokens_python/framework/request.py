@@ -13,31 +13,108 @@
 # under the License.
 from __future__ import annotations
 
+import json
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Dict, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Union
+from urllib.parse import parse_qsl
+
+from supertokens_python.exceptions import raise_general_exception
 
 if TYPE_CHECKING:
     from supertokens_python.recipe.session.interfaces import SessionContainer
 
+_json_decoder: Callable[[bytes], Any] = json.loads
+
+
+def set_json_decoder(decoder: Callable[[bytes], Any]):
+    """
+    Sets the function used to parse JSON request bodies, for example orjson.loads.
+    It is given the raw body and should raise if it isn't valid JSON.
+    """
+    global _json_decoder  # pylint: disable=global-statement
+    _json_decoder = decoder
+
+
+# the value of RequestBody.json until the body is parsed, since None is a valid JSON body
+NOT_PARSED: Any = object()
+
+
+class RequestBody:
+    """
+    The body of a request, read and parsed at most once. It is kept in the request's state
+    (request.state.supertokens_body with FastAPI, request.supertokens_body with Django and
+    g.supertokens_body with Flask), so the app can use what SuperTokens already parsed.
+    raw and form_data are None and json is NOT_PARSED until the body has been read or parsed
+    that way. They are shared by everyone handling the request, so they must not be modified.
+    """
+
+    def __init__(self):
+        self.raw: Union[bytes, None] = None
+        self.json: Any = NOT_PARSED
+        self.form_data: Union[Dict[str, Any], None] = None
+
 
 class BaseRequest(ABC):
 
     def __init__(self):
         self.wrapper_used = True
         self.request = None
+        self.__request_body: Union[RequestBody, None] = None
 
     @abstractmethod
     def get_query_param(
             self, key: str, default: Union[str, None] = None) -> Union[str, None]:
         pass
 
-    @abstractmethod
     async def json(self) -> Union[Any, None]:
-        pass
+        """
+        Returns the parsed JSON body. It is shared by everyone handling the request, so it
+        must not be modified.
+        """
+        body = self.get_request_body()
+        if body.json is NOT_PARSED:
+            try:
+                body.json = await self.parse_json()
+            except Exception:
+                body.json = {}
+        return body.json
 
-    @abstractmethod
     async def form_data(self) -> Dict[str, Any]:
-        pass
+        """
+        Returns the parsed form body. Like json, it must not be modified.
+        """
+        body = self.get_request_body()
+        if body.form_data is None:
+            body.form_data = await self.parse_form_data()
+        return body.form_data
+
+    async def get_raw_body(self) -> bytes:
+        body = self.get_request_body()
+        if body.raw is None:
+            body.raw = await self.read_body()
+        return body.raw
+
+    async def parse_json(self) -> Any:
+        return _json_decoder(await self.get_raw_body())
+
+    async def parse_form_data(self) -> Dict[str, Any]:
+        return dict(parse_qsl((await self.get_raw_body()).decode('utf-8')))
+
+    def get_request_body(self) -> RequestBody:
+        """
+        Returns the RequestBody kept in the state of this request, creating it if needed.
+        By default it is kept in this wrapper.
+        """
+        if self.__request_body is None:
+            self.__request_body = RequestBody()
+        return self.__request_body
+
+    async def read_body(self) -> bytes:
+        """
+        Reads the raw body of the request. Wrappers that implement json and form_data
+        themselves don't need it.
+        """
+        raise_general_exception(type(self).__name__ + ' must implement read_body, or json and form_data')
 
     @abstractmethod
     def method(self) -> str:
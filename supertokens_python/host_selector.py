@@ -0,0 +1,171 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Dict, List, Union
+
+if TYPE_CHECKING:
+    from .supertokens import Host
+
+DEFAULT_EWMA_ALPHA = 0.3
+DEFAULT_ERROR_RATE_THRESHOLD = 0.5
+DEFAULT_EJECTION_COOLDOWN_MS = 10000
+DEFAULT_LATENCY_SAMPLE_MAX_AGE_MS = 10000
+DEFAULT_PROBE_TIMEOUT_MS = 30000
+
+
+def get_host_url(host: Host) -> str:
+    return host.domain.get_as_string_dangerous() + host.base_path.get_as_string_dangerous()
+
+
+def _get_now_ms() -> float:
+    return monotonic() * 1000
+
+
+class HostStats:
+    def __init__(self, host: Host):
+        self.host = host
+        self.url = get_host_url(host)
+        self.ewma_latency_ms: Union[float, None] = None
+        self.ewma_error_rate: float = 0.0
+        self.last_sampled_at: Union[float, None] = None
+        self.ejected_until: Union[float, None] = None
+        self.is_being_probed = False
+        self.probe_started_at: Union[float, None] = None
+        self.request_count = 0
+        self.error_count = 0
+
+    def is_ejected(self) -> bool:
+        return self.ejected_until is not None
+
+    def to_json(self) -> Dict[str, Any]:
+        ejected_for_ms = None
+        if self.ejected_until is not None:
+            ejected_for_ms = max(0, int(self.ejected_until - _get_now_ms()))
+        return {
+            'url': self.url,
+            'ewmaLatencyMs': self.ewma_latency_ms,
+            'ewmaErrorRate': self.ewma_error_rate,
+            'ejected': self.is_ejected(),
+            'ejectedForMs': ejected_for_ms,
+            'beingProbed': self.is_being_probed,
+            'requestCount': self.request_count,
+            'errorCount': self.error_count
+        }
+
+
+class HostSelector:
+    """
+    Orders the core hosts for each request based on their recent latency and
+    error rate. Hosts whose error rate crosses the threshold are ejected for a
+    cooldown period, after which they need to pass a probe before being used
+    again. Ejected hosts are still tried as a last resort so that a request
+    never fails only because every host was marked unhealthy.
+    """
+
+    def __init__(self, hosts: List[Host],
+                 ewma_alpha: float = DEFAULT_EWMA_ALPHA,
+                 error_rate_threshold: float = DEFAULT_ERROR_RATE_THRESHOLD,
+                 ejection_cooldown_ms: int = DEFAULT_EJECTION_COOLDOWN_MS,
+                 latency_sample_max_age_ms: int = DEFAULT_LATENCY_SAMPLE_MAX_AGE_MS,
+                 probe_timeout_ms: int = DEFAULT_PROBE_TIMEOUT_MS):
+        self.__stats: Dict[str, HostStats] = {}
+        for host in hosts:
+            stats = HostStats(host)
+            self.__stats[stats.url] = stats
+        self.__ewma_alpha = ewma_alpha
+        self.__error_rate_threshold = error_rate_threshold
+        self.__ejection_cooldown_ms = ejection_cooldown_ms
+        self.__latency_sample_max_age_ms = latency_sample_max_age_ms
+        self.__probe_timeout_ms = probe_timeout_ms
+
+    def get_hosts_in_order(self) -> List[Host]:
+        now = _get_now_ms()
+        stale: List[HostStats] = []
+        healthy: List[HostStats] = []
+        ejected: List[HostStats] = []
+        for stats in self.__stats.values():
+            if stats.is_ejected():
+                ejected.append(stats)
+            elif stats.last_sampled_at is None or now - stats.last_sampled_at > self.__latency_sample_max_age_ms:
+                # we route one request to hosts we haven't heard from in a while
+                # so that their latency estimate stays up to date
+                stale.append(stats)
+            else:
+                healthy.append(stats)
+
+        healthy.sort(key=lambda s: s.ewma_latency_ms if s.ewma_latency_ms is not None else 0)
+        ejected.sort(key=lambda s: s.ejected_until if s.ejected_until is not None else 0)
+        return [s.host for s in stale + healthy + ejected]
+
+    def get_hosts_to_probe(self) -> List[Host]:
+        """
+        Returns the ejected hosts whose cooldown is over and marks them as being probed.
+        The caller must report the result of the probe via record_success / record_failure,
+        or call abandon_probe if it can't finish it. A probe that hasn't reported anything
+        after probe_timeout_ms (its event loop may have been stopped) is handed out again.
+        """
+        now = _get_now_ms()
+        result: List[Host] = []
+        for stats in self.__stats.values():
+            if stats.ejected_until is None or stats.ejected_until > now:
+                continue
+            if stats.is_being_probed and stats.probe_started_at is not None and \
+                    now - stats.probe_started_at < self.__probe_timeout_ms:
+                continue
+            stats.is_being_probed = True
+            stats.probe_started_at = now
+            result.append(stats.host)
+        return result
+
+    def abandon_probe(self, host: Host):
+        """
+        Lets the host be handed out for probing again, without recording a result.
+        """
+        stats = self.__stats.get(get_host_url(host))
+        if stats is not None:
+            stats.is_being_probed = False
+
+    def record_success(self, host: Host, latency_ms: float):
+        stats = self.__stats.get(get_host_url(host))
+        if stats is None:
+            return
+        alpha = self.__ewma_alpha
+        stats.request_count += 1
+        stats.last_sampled_at = _get_now_ms()
+        if stats.ewma_latency_ms is None:
+            stats.ewma_latency_ms = latency_ms
+        else:
+            stats.ewma_latency_ms = alpha * latency_ms + (1 - alpha) * stats.ewma_latency_ms
+        stats.ewma_error_rate = (1 - alpha) * stats.ewma_error_rate
+        if stats.is_ejected():
+            stats.ejected_until = None
+            stats.is_being_probed = False
+            stats.ewma_error_rate = 0.0
+
+    def record_failure(self, host: Host):
+        stats = self.__stats.get(get_host_url(host))
+        if stats is None:
+            return
+        alpha = self.__ewma_alpha
+        stats.request_count += 1
+        stats.error_count += 1
+        stats.ewma_error_rate = alpha + (1 - alpha) * stats.ewma_error_rate
+        if stats.is_ejected() or stats.ewma_error_rate >= self.__error_rate_threshold:
+            stats.ejected_until = _get_now_ms() + self.__ejection_cooldown_ms
+            stats.is_being_probed = False
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {url: stats.to_json() for url, stats in self.__stats.items()}
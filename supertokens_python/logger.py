@@ -16,7 +16,7 @@ import json
 import logging
 from datetime import datetime
 from os import getenv, path
-from typing import Union
+from typing import Any, Callable, Dict, Union
 
 from .constants import VERSION
 
@@ -36,16 +36,27 @@ def _get_log_timestamp() -> str:
     return datetime.utcnow().isoformat()[:-3] + "Z"
 
 
+# pathname of the file that logged -> its path relative to the SDK, as json
+_relative_paths: Dict[str, str] = {}
+
+# the part of every line after the timestamp that doesn't depend on the record
+_SDK_VERSION_PART = ', "sdkVer": ' + json.dumps(VERSION) + ', "message": '
+
+
+def _get_relative_path(pathname: str) -> str:
+    relative_path = _relative_paths.get(pathname)
+    if relative_path is None:
+        relative_path = json.dumps(path.relpath(pathname, supertokens_dir))[:-1]
+        _relative_paths[pathname] = relative_path
+    return relative_path
+
+
 class CustomStreamHandler(logging.StreamHandler):  # type: ignore
     def emit(self, record: logging.LogRecord):
-        relative_path = path.relpath(record.pathname, supertokens_dir)
-
-        record.msg = json.dumps({
-            "t": _get_log_timestamp(),
-            "sdkVer": VERSION,
-            "message": record.msg,
-            "file": f'{relative_path}:{record.lineno}'
-        })
+        # same output as json.dumps of {"t", "sdkVer", "message", "file"}, without building the dict
+        record.msg = ('{"t": "' + _get_log_timestamp() + '"' + _SDK_VERSION_PART + json.dumps(record.getMessage())
+                      + ', "file": ' + _get_relative_path(record.pathname) + ':' + str(record.lineno) + '"}')
+        record.args = None
 
         return super().emit(record)
 
@@ -62,10 +73,29 @@ _logger.addHandler(streamHandler)
 # Output log format:
 # com.supertokens {"t": "2022-03-24T06:28:33.659Z", "sdkVer": "0.5.1", "message": "Hello", "file": "logger.py:73"}
 
-# Export logger.debug as log_debug_message function
+# Export logger.debug as log_debug_message function. The arguments are only formatted
+# if debug logging is enabled, so pass them as is instead of calling str on them,
+# and wrap the ones that are expensive to compute in a LazyLogArg.
 log_debug_message = _logger.debug
 
 
+def is_debug_logging_enabled() -> bool:
+    return _logger.isEnabledFor(logging.DEBUG)
+
+
+class LazyLogArg:
+    """
+    A log argument that is only computed if the message is logged:
+    log_debug_message("app_info: %s", LazyLogArg(app_info.toJSON))
+    """
+
+    def __init__(self, func: Callable[[], Any]):
+        self.__func = func
+
+    def __str__(self) -> str:
+        return str(self.__func())
+
+
 def get_maybe_none_as_str(o: Union[str, None]) -> str:
     if o is None:
         return "None"
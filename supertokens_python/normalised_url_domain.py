@@ -13,7 +13,7 @@
 # under the License.
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 from urllib.parse import urlparse
 
 from .utils import is_an_ip_address
@@ -22,10 +22,21 @@ if TYPE_CHECKING:
     pass
 from .exceptions import raise_general_exception
 
+MAX_NORMALISED_DOMAINS_CACHE_SIZE = 100
+
+# input -> normalised domain
+_normalised_domains_cache: Dict[str, str] = {}
+
 
 class NormalisedURLDomain:
     def __init__(self, url: str):
-        self.__value = normalise_domain_path_or_throw_error(url)
+        value = _normalised_domains_cache.get(url)
+        if value is None:
+            value = normalise_domain_path_or_throw_error(url)
+            if len(_normalised_domains_cache) >= MAX_NORMALISED_DOMAINS_CACHE_SIZE:
+                _normalised_domains_cache.clear()
+            _normalised_domains_cache[url] = value
+        self.__value = value
 
     def get_as_string_dangerous(self):
         return self.__value
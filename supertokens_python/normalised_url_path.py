@@ -14,17 +14,29 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 from urllib.parse import urlparse
 
 if TYPE_CHECKING:
     pass
 from .exceptions import raise_general_exception
 
+# paths that come from requests end up here too, so the cache is bounded
+MAX_NORMALISED_PATHS_CACHE_SIZE = 1000
+
+# input -> normalised path
+_normalised_paths_cache: Dict[str, str] = {}
+
 
 class NormalisedURLPath:
     def __init__(self, url: str):
-        self.__value = normalise_url_path_or_throw_error(url)
+        value = _normalised_paths_cache.get(url)
+        if value is None:
+            value = normalise_url_path_or_throw_error(url)
+            if len(_normalised_paths_cache) >= MAX_NORMALISED_PATHS_CACHE_SIZE:
+                _normalised_paths_cache.clear()
+            _normalised_paths_cache[url] = value
+        self.__value = value
 
     def startswith(self, other: NormalisedURLPath) -> bool:
         return self.__value.startswith(other.get_as_string_dangerous())
@@ -13,18 +13,24 @@
 # under the License.
 from __future__ import annotations
 
+import asyncio
+from copy import deepcopy
 from json import JSONDecodeError
 from os import environ
-from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Tuple
+from weakref import WeakKeyDictionary
 
-from httpx import AsyncClient, ConnectTimeout, NetworkError, Response
+from httpx import AsyncClient, ConnectTimeout, Limits, NetworkError, Response
 
 from .constants import (API_KEY_HEADER, API_VERSION, API_VERSION_HEADER,
                         RID_KEY_HEADER, SUPPORTED_CDI_VERSIONS)
+from .host_selector import HostSelector, get_host_url
 from .normalised_url_path import NormalisedURLPath
 
 if TYPE_CHECKING:
     from .supertokens import Host
+    from .user_cache import UserCache
 
 from typing import List, Set, Union
 
@@ -33,13 +39,29 @@ from .process_state import AllowedProcessStates, ProcessState
 from .utils import find_max_version, is_4xx_error, is_5xx_error
 
 
+class InFlightRequest:
+    def __init__(self, task: asyncio.Future[Any]):
+        self.task = task
+        self.no_of_waiters = 1
+
+
 class Querier:
     __init_called = False
     __hosts: List[Host] = []
     __api_key: Union[None, str] = None
     __api_version = None
-    __last_tried_index: int = 0
+    __host_selector: HostSelector = HostSelector([])
+    # the probes that are running, by the event loop they run on
+    __probe_tasks: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[asyncio.Future[None], Host]] = WeakKeyDictionary()
     __hosts_alive_for_testing: Set[str] = set()
+    __pool_limits: Union[Limits, None] = None
+    __http2: bool = False
+    # an AsyncClient (and its connection pool) can only be used from the
+    # event loop it was created on, so we keep one per loop
+    __clients: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient] = WeakKeyDictionary()
+    __coalesce_get_requests: bool = False
+    __user_cache: Union[UserCache, None] = None
+    __in_flight_get_requests: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Any, ...], InFlightRequest]] = WeakKeyDictionary()
 
     def __init__(self, hosts: List[Host],
                  rid_to_core: Union[None, str] = None):
@@ -55,6 +77,9 @@ class Querier:
             raise_general_exception(
                 'calling testing function in non testing env')
         Querier.__init_called = False
+        Querier.__clients = WeakKeyDictionary()
+        Querier.__in_flight_get_requests = WeakKeyDictionary()
+        Querier.__probe_tasks = WeakKeyDictionary()
 
     @staticmethod
     def get_hosts_alive_for_testing():
@@ -64,6 +89,14 @@ class Querier:
                 'calling testing function in non testing env')
         return Querier.__hosts_alive_for_testing
 
+    @staticmethod
+    def get_host_stats() -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the latency / health information that is used to pick which core
+        to send a request to, keyed by the core's URL.
+        """
+        return Querier.__host_selector.get_stats()
+
     async def get_api_version(self):
         if Querier.__api_version is not None:
             return Querier.__api_version
@@ -77,11 +110,10 @@ class Querier:
                 headers = {
                     API_KEY_HEADER: Querier.__api_key
                 }
-            async with AsyncClient() as client:
-                return await client.get(url, headers=headers)
+            return await Querier.__get_client().get(url, headers=headers)
 
         response = await self.__send_request_helper(
-            NormalisedURLPath(API_VERSION), 'GET', f, len(self.__hosts))
+            NormalisedURLPath(API_VERSION), 'GET', f)
         cdi_supported_by_server = response['versions']
         api_version = find_max_version(
             cdi_supported_by_server,
@@ -103,14 +135,65 @@ class Querier:
         return Querier(Querier.__hosts, rid_to_core)
 
     @staticmethod
-    def init(hosts: List[Host], api_key: Union[str, None] = None):
+    def init(hosts: List[Host], api_key: Union[str, None] = None,
+             pool_limits: Union[Limits, None] = None, http2: bool = False,
+             coalesce_get_requests: bool = False,
+             user_cache: Union[UserCache, None] = None):
         if not Querier.__init_called:
             Querier.__init_called = True
             Querier.__hosts = hosts
             Querier.__api_key = api_key
             Querier.__api_version = None
-            Querier.__last_tried_index = 0
+            Querier.__host_selector = HostSelector(hosts)
             Querier.__hosts_alive_for_testing = set()
+            Querier.__pool_limits = pool_limits
+            Querier.__http2 = http2
+            Querier.__clients = WeakKeyDictionary()
+            Querier.__coalesce_get_requests = coalesce_get_requests
+            Querier.__in_flight_get_requests = WeakKeyDictionary()
+            Querier.__user_cache = user_cache
+
+    @staticmethod
+    def get_user_cache() -> Union[UserCache, None]:
+        return Querier.__user_cache
+
+    @staticmethod
+    def __get_client() -> AsyncClient:
+        loop = asyncio.get_event_loop()
+        client = Querier.__clients.get(loop)
+        if client is None:
+            if Querier.__pool_limits is not None:
+                client = AsyncClient(limits=Querier.__pool_limits, http2=Querier.__http2)
+            else:
+                client = AsyncClient(http2=Querier.__http2)
+            Querier.__clients[loop] = client
+        return client
+
+    @staticmethod
+    async def close():
+        """
+        Closes the pooled connections to the core that belong to the current event loop, and
+        cancels the probes running on it so that their hosts can be probed again from other
+        loops. It should be called on every event loop that used the Querier before the loop
+        is closed, since a client can't be closed without its loop. The clients of loops that
+        are closed by now are dropped, and their sockets are closed once they are garbage
+        collected.
+        """
+        loop = asyncio.get_event_loop()
+        client = Querier.__clients.pop(loop, None)
+        for other_loop in list(Querier.__clients.keys()):
+            if other_loop.is_closed():
+                del Querier.__clients[other_loop]
+        for other_loop in list(Querier.__probe_tasks.keys()):
+            if other_loop.is_closed():
+                for host in Querier.__probe_tasks.pop(other_loop).values():
+                    Querier.__host_selector.abandon_probe(host)
+        probe_tasks = list(Querier.__probe_tasks.pop(loop, {}).keys())
+        for task in probe_tasks:
+            task.cancel()
+        await asyncio.gather(*probe_tasks, return_exceptions=True)
+        if client is not None:
+            await client.aclose()
 
     async def __get_headers_with_api_version(self, path: NormalisedURLPath):
         headers = {
@@ -132,11 +215,38 @@ class Querier:
         if params is None:
             params = {}
 
-        async def f(url: str) -> Response:
-            async with AsyncClient() as client:
-                return await client.get(url, params=params, headers=await self.__get_headers_with_api_version(path))
+        # computed before the request is timed, since it may call the core for the api version
+        headers = await self.__get_headers_with_api_version(path)
 
-        return await self.__send_request_helper(path, 'GET', f, len(self.__hosts))
+        async def f(url: str) -> Response:
+            return await Querier.__get_client().get(url, params=params, headers=headers)
+
+        if not Querier.__coalesce_get_requests:
+            return await self.__send_request_helper(path, 'GET', f)
+
+        # identical GET requests that are in flight at the same time share one
+        # call to the core. The request runs in its own task so that a caller
+        # being cancelled doesn't cancel it for everyone else.
+        loop = asyncio.get_event_loop()
+        in_flight = Querier.__in_flight_get_requests.get(loop)
+        if in_flight is None:
+            in_flight = {}
+            Querier.__in_flight_get_requests[loop] = in_flight
+        key = (path.get_as_string_dangerous(), self.__rid_to_core,
+               tuple(sorted((k, repr(v)) for k, v in params.items())))
+        request = in_flight.get(key)
+        if request is None:
+            request = InFlightRequest(asyncio.ensure_future(self.__send_request_helper(path, 'GET', f)))
+            in_flight[key] = request
+            request.task.add_done_callback(lambda _: in_flight.pop(key, None))  # type: ignore
+        else:
+            request.no_of_waiters += 1
+
+        result = await asyncio.shield(request.task)
+        if request.no_of_waiters > 1:
+            # every caller gets its own copy since callers may modify the response
+            return deepcopy(result)
+        return result
 
     async def send_post_request(self, path: NormalisedURLPath, data: Union[Dict[str, Any], None] = None, test: bool = False):
         if data is None:
@@ -150,18 +260,17 @@ class Querier:
         headers['content-type'] = 'application/json; charset=utf-8'
 
         async def f(url: str) -> Response:
-            async with AsyncClient() as client:
-                return await client.post(url, json=data, headers=headers)  # type: ignore
+            return await Querier.__get_client().post(url, json=data, headers=headers)  # type: ignore
 
-        return await self.__send_request_helper(path, 'POST', f, len(self.__hosts))
+        return await self.__send_request_helper(path, 'POST', f)
 
     async def send_delete_request(self, path: NormalisedURLPath):
+        headers = await self.__get_headers_with_api_version(path)
 
         async def f(url: str) -> Response:
-            async with AsyncClient() as client:
-                return await client.delete(url, headers=await self.__get_headers_with_api_version(path))
+            return await Querier.__get_client().delete(url, headers=headers)
 
-        return await self.__send_request_helper(path, 'DELETE', f, len(self.__hosts))
+        return await self.__send_request_helper(path, 'DELETE', f)
 
     async def send_put_request(self, path: NormalisedURLPath, data: Union[Dict[str, Any], None] = None):
         if data is None:
@@ -171,44 +280,82 @@ class Querier:
         headers['content-type'] = 'application/json; charset=utf-8'
 
         async def f(url: str) -> Response:
-            async with AsyncClient() as client:
-                return await client.put(url, json=data, headers=headers)  # type: ignore
-
-        return await self.__send_request_helper(path, 'PUT', f, len(self.__hosts))
-
-    async def __send_request_helper(self, path: NormalisedURLPath, method: str, http_function: Callable[[str], Awaitable[Response]], no_of_tries: int) -> Any:
-        if no_of_tries == 0:
-            raise_general_exception('No SuperTokens core available to query')
-
-        try:
-            current_host_domain = self.__hosts[Querier.__last_tried_index].domain.get_as_string_dangerous(
-            )
-            current_host_base_path = self.__hosts[Querier.__last_tried_index].base_path.get_as_string_dangerous(
-            )
-            current_host: str = current_host_domain + current_host_base_path
-            Querier.__last_tried_index += 1
-            Querier.__last_tried_index %= len(self.__hosts)
-            url = current_host + path.get_as_string_dangerous()
-
-            ProcessState.get_instance().add_state(
-                AllowedProcessStates.CALLING_SERVICE_IN_REQUEST_HELPER)
-            response = await http_function(url)
-            if ('SUPERTOKENS_ENV' in environ) and (
-                    environ['SUPERTOKENS_ENV'] == 'testing'):
-                Querier.__hosts_alive_for_testing.add(current_host)
-
-            if is_4xx_error(response.status_code) or is_5xx_error(response.status_code):  # type: ignore
-                raise_general_exception('SuperTokens core threw an error for a ' + method + ' request to path: ' + path.get_as_string_dangerous() + ' with status code: ' + str(
-                    response.status_code) + ' and message: ' +  # type: ignore
-                    response.text)
+            return await Querier.__get_client().put(url, json=data, headers=headers)  # type: ignore
 
+        return await self.__send_request_helper(path, 'PUT', f)
+
+    async def __send_request_helper(self, path: NormalisedURLPath, method: str, http_function: Callable[[str], Awaitable[Response]]) -> Any:
+        self.__probe_ejected_hosts()
+
+        for host in Querier.__host_selector.get_hosts_in_order():
+            try:
+                current_host: str = get_host_url(host)
+                url = current_host + path.get_as_string_dangerous()
+
+                ProcessState.get_instance().add_state(
+                    AllowedProcessStates.CALLING_SERVICE_IN_REQUEST_HELPER)
+                start_time = monotonic()
+                try:
+                    response = await http_function(url)
+                except (ConnectionError, NetworkError, ConnectTimeout):
+                    Querier.__host_selector.record_failure(host)
+                    continue
+
+                if is_5xx_error(response.status_code):  # type: ignore
+                    Querier.__host_selector.record_failure(host)
+                else:
+                    Querier.__host_selector.record_success(host, (monotonic() - start_time) * 1000)
+
+                if ('SUPERTOKENS_ENV' in environ) and (
+                        environ['SUPERTOKENS_ENV'] == 'testing'):
+                    Querier.__hosts_alive_for_testing.add(current_host)
+
+                if is_4xx_error(response.status_code) or is_5xx_error(response.status_code):  # type: ignore
+                    raise_general_exception('SuperTokens core threw an error for a ' + method + ' request to path: ' + path.get_as_string_dangerous() + ' with status code: ' + str(
+                        response.status_code) + ' and message: ' +  # type: ignore
+                        response.text)
+
+                try:
+                    return response.json()
+                except JSONDecodeError:
+                    return response.text
+
+            except Exception as e:
+                raise_general_exception(e)
+
+        raise_general_exception('No SuperTokens core available to query')
+
+    def __probe_ejected_hosts(self):
+        hosts_to_probe = Querier.__host_selector.get_hosts_to_probe()
+        if len(hosts_to_probe) == 0:
+            return
+
+        async def probe(host: Host):
+            headers = {}
+            if Querier.__api_key is not None:
+                headers = {
+                    API_KEY_HEADER: Querier.__api_key
+                }
+            start_time = monotonic()
             try:
-                return response.json()
-            except JSONDecodeError:
-                return response.text
-
-        except (ConnectionError, NetworkError, ConnectTimeout):
-            return await self.__send_request_helper(
-                path, method, http_function, no_of_tries - 1)
-        except Exception as e:
-            raise_general_exception(e)
+                response = await Querier.__get_client().get(get_host_url(host) + API_VERSION, headers=headers)
+                if is_5xx_error(response.status_code):
+                    Querier.__host_selector.record_failure(host)
+                else:
+                    Querier.__host_selector.record_success(host, (monotonic() - start_time) * 1000)
+            except asyncio.CancelledError:
+                Querier.__host_selector.abandon_probe(host)
+                raise
+            except Exception:
+                Querier.__host_selector.record_failure(host)
+
+        loop = asyncio.get_event_loop()
+        probe_tasks = Querier.__probe_tasks.get(loop)
+        if probe_tasks is None:
+            probe_tasks = {}
+            Querier.__probe_tasks[loop] = probe_tasks
+        for host in hosts_to_probe:
+            task = asyncio.ensure_future(probe(host))
+            # keep a reference so that the task isn't garbage collected while pending
+            probe_tasks[task] = host
+            task.add_done_callback(lambda t, probe_tasks=probe_tasks: probe_tasks.pop(t, None))  # type: ignore
@@ -16,6 +16,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Dict, Union
 
 from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.user_cache import get_user_through_cache
 
 from .interfaces import (CreateResetPasswordOkResult,
                          CreateResetPasswordWrongUserIdErrorResult,
@@ -42,24 +43,32 @@ class RecipeImplementation(RecipeInterface):
         self.querier = querier
 
     async def get_user_by_id(self, user_id: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        params = {
-            'userId': user_id
-        }
-        response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
-        if 'status' in response and response['status'] == 'OK':
-            return User(response['user']['id'], response['user']
-                        ['email'], response['user']['timeJoined'])
-        return None
+        async def fetch():
+            params = {
+                'userId': user_id
+            }
+            response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
+            if 'status' in response and response['status'] == 'OK':
+                return User(response['user']['id'], response['user']
+                            ['email'], response['user']['timeJoined'])
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(), 'emailpassword:userId:' + user_id,
+                                            fetch, lambda user: [user.user_id])
 
     async def get_user_by_email(self, email: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        params = {
-            'email': email
-        }
-        response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
-        if 'status' in response and response['status'] == 'OK':
-            return User(response['user']['id'], response['user']
-                        ['email'], response['user']['timeJoined'])
-        return None
+        async def fetch():
+            params = {
+                'email': email
+            }
+            response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
+            if 'status' in response and response['status'] == 'OK':
+                return User(response['user']['id'], response['user']
+                            ['email'], response['user']['timeJoined'])
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(), 'emailpassword:email:' + email,
+                                            fetch, lambda user: [user.user_id])
 
     async def create_reset_password_token(self, user_id: str, user_context: Dict[str, Any]) -> CreateResetPasswordResult:
         data = {
@@ -125,6 +134,9 @@ class RecipeImplementation(RecipeInterface):
                 **data
             }
         response = await self.querier.send_put_request(NormalisedURLPath('/recipe/user'), data)
+        user_cache = self.querier.get_user_cache()
+        if user_cache is not None:
+            user_cache.invalidate_user(user_id)
         if 'status' in response and response['status'] == 'OK':
             return UpdateEmailOrPasswordOkResult()
         if 'status' in response and response['status'] == 'EMAIL_ALREADY_EXISTS_ERROR':
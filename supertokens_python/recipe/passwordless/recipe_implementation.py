@@ -16,6 +16,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Dict, List, Union
 
 from supertokens_python.querier import Querier
+from supertokens_python.user_cache import get_user_through_cache
 
 from .types import DeviceCode, DeviceType, User
 
@@ -149,58 +150,70 @@ class RecipeImplementation(RecipeInterface):
         )
 
     async def get_user_by_id(self, user_id: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        param = {
-            'userId': user_id
-        }
-        result = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), param)
-        if result['status'] == 'OK':
-            email = None
-            phone_number = None
-            if 'email' in result['user']:
-                email = result['user']['email']
-            if 'phoneNumber' in result['user']:
-                phone_number = result['user']['phoneNumber']
-            return User(user_id=result['user']['id'],
-                        email=email,
-                        phone_number=phone_number,
-                        time_joined=result['user']['timeJoined'])
-        return None
+        async def fetch():
+            param = {
+                'userId': user_id
+            }
+            result = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), param)
+            if result['status'] == 'OK':
+                email = None
+                phone_number = None
+                if 'email' in result['user']:
+                    email = result['user']['email']
+                if 'phoneNumber' in result['user']:
+                    phone_number = result['user']['phoneNumber']
+                return User(user_id=result['user']['id'],
+                            email=email,
+                            phone_number=phone_number,
+                            time_joined=result['user']['timeJoined'])
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(), 'passwordless:userId:' + user_id,
+                                            fetch, lambda user: [user.user_id])
 
     async def get_user_by_email(self, email: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        param = {
-            'email': email
-        }
-        result = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), param)
-        if result['status'] == 'OK':
-            email_resp = None
-            phone_number_resp = None
-            if 'email' in result['user']:
-                email_resp = result['user']['email']
-            if 'phoneNumber' in result['user']:
-                phone_number_resp = result['user']['phoneNumber']
-            return User(user_id=result['user']['id'],
-                        email=email_resp,
-                        phone_number=phone_number_resp,
-                        time_joined=result['user']['timeJoined'])
-        return None
+        async def fetch():
+            param = {
+                'email': email
+            }
+            result = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), param)
+            if result['status'] == 'OK':
+                email_resp = None
+                phone_number_resp = None
+                if 'email' in result['user']:
+                    email_resp = result['user']['email']
+                if 'phoneNumber' in result['user']:
+                    phone_number_resp = result['user']['phoneNumber']
+                return User(user_id=result['user']['id'],
+                            email=email_resp,
+                            phone_number=phone_number_resp,
+                            time_joined=result['user']['timeJoined'])
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(), 'passwordless:email:' + email,
+                                            fetch, lambda user: [user.user_id])
 
     async def get_user_by_phone_number(self, phone_number: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        param = {
-            'phoneNumber': phone_number
-        }
-        result = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), param)
-        if result['status'] == 'OK':
-            email_resp = None
-            phone_number_resp = None
-            if 'email' in result['user']:
-                email_resp = result['user']['email']
-            if 'phoneNumber' in result['user']:
-                phone_number_resp = result['user']['phoneNumber']
-            return User(user_id=result['user']['id'],
-                        email=email_resp,
-                        phone_number=phone_number_resp,
-                        time_joined=result['user']['timeJoined'])
-        return None
+        async def fetch():
+            param = {
+                'phoneNumber': phone_number
+            }
+            result = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), param)
+            if result['status'] == 'OK':
+                email_resp = None
+                phone_number_resp = None
+                if 'email' in result['user']:
+                    email_resp = result['user']['email']
+                if 'phoneNumber' in result['user']:
+                    phone_number_resp = result['user']['phoneNumber']
+                return User(user_id=result['user']['id'],
+                            email=email_resp,
+                            phone_number=phone_number_resp,
+                            time_joined=result['user']['timeJoined'])
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(), 'passwordless:phoneNumber:' + phone_number,
+                                            fetch, lambda user: [user.user_id])
 
     async def update_user(self, user_id: str,
                           email: Union[str, None], phone_number: Union[str, None], user_context: Dict[str, Any]) -> UpdateUserResult:
@@ -218,6 +231,9 @@ class RecipeImplementation(RecipeInterface):
                 'phoneNumber': phone_number
             }
         result = await self.querier.send_put_request(NormalisedURLPath('/recipe/user'), data)
+        user_cache = self.querier.get_user_cache()
+        if user_cache is not None:
+            user_cache.invalidate_user(user_id)
         if result['status'] == 'OK':
             return UpdateUserOkResult()
         if result['status'] == 'UNKNOWN_USER_ID_ERROR':
@@ -25,11 +25,22 @@ from . import exceptions as ex
 from .recipe import SessionRecipe
 from . import utils
 from . import interfaces
+from . import verification_executor as ve
+from . import refresh_coalescing as rc
+from . import verify_result_cache as vrc
+from . import handshake_info_store as his
 
 InputErrorHandlers = utils.InputErrorHandlers
 InputOverrideConfig = utils.InputOverrideConfig
 JWTConfig = utils.JWTConfig
 SessionContainer = interfaces.SessionContainer
+VerificationExecutor = ve.VerificationExecutor
+RefreshCoalescingBackend = rc.RefreshCoalescingBackend
+InProcessRefreshCoalescing = rc.InProcessRefreshCoalescing
+VerifyResultCache = vrc.VerifyResultCache
+InMemoryVerifyResultCache = vrc.InMemoryVerifyResultCache
+HandshakeInfoStore = his.HandshakeInfoStore
+SharedMemoryHandshakeInfoStore = his.SharedMemoryHandshakeInfoStore
 exceptions = ex
 
 
@@ -42,7 +53,11 @@ def init(cookie_domain: Union[str, None] = None,
                                   "VIA_CUSTOM_HEADER", "NONE"], None] = None,
          error_handlers: Union[InputErrorHandlers, None] = None,
          override: Union[InputOverrideConfig, None] = None,
-         jwt: Union[JWTConfig, None] = None) -> Callable[[AppInfo], RecipeModule]:
+         jwt: Union[JWTConfig, None] = None,
+         verification_executor: Union[VerificationExecutor, None] = None,
+         refresh_coalescing: Union[RefreshCoalescingBackend, None] = None,
+         verify_result_cache: Union[VerifyResultCache, None] = None,
+         handshake_info_store: Union[HandshakeInfoStore, None] = None) -> Callable[[AppInfo], RecipeModule]:
     return SessionRecipe.init(cookie_domain,
                               cookie_secure,
                               cookie_same_site,
@@ -50,4 +65,8 @@ def init(cookie_domain: Union[str, None] = None,
                               anti_csrf,
                               error_handlers,
                               override,
-                              jwt)
+                              jwt,
+                              verification_executor,
+                              refresh_coalescing,
+                              verify_result_cache,
+                              handshake_info_store)
@@ -13,7 +13,10 @@
 # under the License.
 from __future__ import annotations
 
-from typing import Any, Union
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from typing import Any, Dict, Tuple, Union
 
 from supertokens_python.utils import get_timestamp_ms
 
@@ -21,6 +24,93 @@ from .exceptions import raise_try_refresh_token_exception
 from .jwt import get_payload
 
 
+DEFAULT_VERIFIED_ACCESS_TOKEN_CACHE_MAX_SIZE = 10000
+DEFAULT_VERIFIED_ACCESS_TOKEN_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+
+class AccessTokenInfo:
+    __slots__ = ('session_handle', 'user_id', 'refresh_token_hash_1', 'parent_refresh_token_hash_1',
+                 'user_data', 'anti_csrf_token', 'expiry_time', 'time_created')
+
+    # the keys of the access token payload, so that this can still be read like the dict it used to be
+    __keys = {
+        'sessionHandle': 'session_handle',
+        'userId': 'user_id',
+        'refreshTokenHash1': 'refresh_token_hash_1',
+        'parentRefreshTokenHash1': 'parent_refresh_token_hash_1',
+        'userData': 'user_data',
+        'antiCsrfToken': 'anti_csrf_token',
+        'expiryTime': 'expiry_time',
+        'timeCreated': 'time_created'
+    }
+
+    def __init__(self, session_handle: str, user_id: Union[str, None], refresh_token_hash_1: str,
+                 parent_refresh_token_hash_1: Union[str, None], user_data: Dict[str, Any],
+                 anti_csrf_token: Union[str, None], expiry_time: int, time_created: int):
+        self.session_handle = session_handle
+        self.user_id = user_id
+        self.refresh_token_hash_1 = refresh_token_hash_1
+        self.parent_refresh_token_hash_1 = parent_refresh_token_hash_1
+        self.user_data = user_data
+        self.anti_csrf_token = anti_csrf_token
+        self.expiry_time = expiry_time
+        self.time_created = time_created
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, AccessTokenInfo.__keys[key])
+
+
+class VerifiedAccessTokenCache:
+    """
+    LRU cache of access tokens whose signature has already been verified, keyed by the
+    sha256 of the token. An entry is only valid until the access token expires.
+    The memory used by an entry is approximated by the length of the access token.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_VERIFIED_ACCESS_TOKEN_CACHE_MAX_SIZE,
+                 max_bytes: int = DEFAULT_VERIFIED_ACCESS_TOKEN_CACHE_MAX_BYTES):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.__entries: OrderedDict[bytes, Tuple[AccessTokenInfo, int]] = OrderedDict()
+        self.__size_in_bytes = 0
+        self.__lock = Lock()
+
+    def get(self, access_token: str) -> Union[AccessTokenInfo, None]:
+        key = sha256(access_token.encode('utf-8')).digest()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[0].expiry_time < get_timestamp_ms():
+                self.__remove(key)
+                return None
+            self.__entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, access_token: str, access_token_info: AccessTokenInfo):
+        key = sha256(access_token.encode('utf-8')).digest()
+        size = len(access_token)
+        with self.__lock:
+            self.__remove(key)
+            self.__entries[key] = (access_token_info, size)
+            self.__size_in_bytes += size
+            while len(self.__entries) > self.max_size or self.__size_in_bytes > self.max_bytes:
+                self.__remove(next(iter(self.__entries)))
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__size_in_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __remove(self, key: bytes):
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__size_in_bytes -= entry[1]
+
+
 def sanitize_string(s: Any) -> Union[str, None]:
     if s == "":
         return s
@@ -67,15 +157,7 @@ def get_info_from_access_token(
         if expiry_time < get_timestamp_ms():
             raise Exception('Access token expired')
 
-        return {
-            'sessionHandle': session_handle,
-            'userId': user_id,
-            'refreshTokenHash1': refresh_token_hash_1,
-            'parentRefreshTokenHash1': parent_refresh_token_hash_1,
-            'userData': user_data,
-            'antiCsrfToken': anti_csrf_token,
-            'expiryTime': expiry_time,
-            'timeCreated': time_created
-        }
+        return AccessTokenInfo(session_handle, user_id, refresh_token_hash_1, parent_refresh_token_hash_1,
+                               user_data, anti_csrf_token, expiry_time, time_created)
     except Exception as e:
         raise_try_refresh_token_exception(e)
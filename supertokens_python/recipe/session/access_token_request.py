@@ -0,0 +1,77 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Union
+from urllib.parse import quote
+
+from supertokens_python.framework.request import BaseRequest
+
+from .constants import (ACCESS_TOKEN_COOKIE_KEY, ANTI_CSRF_HEADER_KEY,
+                        ID_REFRESH_TOKEN_COOKIE_KEY, RID_HEADER_KEY)
+
+if TYPE_CHECKING:
+    from .interfaces import SessionContainer
+
+
+class AccessTokenRequest(BaseRequest):
+    """
+    A request that only carries an access token (and its anti-csrf token), so that a raw
+    access token can be verified with RecipeInterface.get_session.
+    """
+
+    def __init__(self, access_token: str, anti_csrf_token: Union[str, None], contains_custom_header: bool):
+        super().__init__()
+        self.access_token = access_token
+        self.anti_csrf_token = anti_csrf_token
+        self.contains_custom_header = contains_custom_header
+        self.__session: Union[SessionContainer, None] = None
+
+    def get_query_param(self, key: str, default: Union[str, None] = None) -> Union[str, None]:
+        return default
+
+    async def read_body(self) -> bytes:
+        return b''
+
+    def method(self) -> str:
+        return 'post'
+
+    def get_cookie(self, key: str) -> Union[str, None]:
+        if key == ACCESS_TOKEN_COOKIE_KEY:
+            # cookies are read unquoted
+            return quote(self.access_token)
+        if key == ID_REFRESH_TOKEN_COOKIE_KEY:
+            # only checked for being there, the access token is what gets verified
+            return 'idRefreshToken'
+        return None
+
+    def get_header(self, key: str) -> Union[None, str]:
+        key = key.lower()
+        if key == ANTI_CSRF_HEADER_KEY:
+            return self.anti_csrf_token
+        if key == RID_HEADER_KEY and self.contains_custom_header:
+            return 'session'
+        return None
+
+    def get_session(self) -> Union[SessionContainer, None]:
+        return self.__session
+
+    def set_session(self, session: SessionContainer):
+        self.__session = session
+
+    def set_session_as_none(self):
+        self.__session = None
+
+    def get_path(self) -> str:
+        return ''
@@ -16,7 +16,7 @@ from typing import Any, Dict, List, Union
 from supertokens_python.recipe.openid.interfaces import \
     GetOpenIdDiscoveryConfigurationResult
 from supertokens_python.recipe.session.interfaces import (
-    SessionContainer, SessionInformationResult)
+    SessionContainer, SessionInformationResult, VerifyAccessTokenResult)
 from supertokens_python.recipe.session.recipe import SessionRecipe
 from supertokens_python.utils import FRAMEWORKS
 
@@ -41,6 +41,12 @@ async def get_session(request: Any, anti_csrf_check: Union[bool, None] = None, s
     return await SessionRecipe.get_instance().recipe_implementation.get_session(request, anti_csrf_check, session_required, user_context)
 
 
+async def verify_access_tokens(access_tokens: List[str], anti_csrf_check: bool = False, anti_csrf_tokens: Union[List[Union[str, None]], None] = None, contains_custom_header: bool = True, user_context: Union[None, Dict[str, Any]] = None) -> List[VerifyAccessTokenResult]:
+    if user_context is None:
+        user_context = {}
+    return await SessionRecipe.get_instance().recipe_implementation.verify_access_tokens(access_tokens, anti_csrf_check, anti_csrf_tokens, contains_custom_header, user_context)
+
+
 async def refresh_session(request: Any, user_context: Union[None, Dict[str, Any]] = None) -> SessionContainer:
     if user_context is None:
         user_context = {}
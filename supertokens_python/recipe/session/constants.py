@@ -22,3 +22,8 @@ RID_HEADER_KEY = 'rid'
 ID_REFRESH_TOKEN_HEADER_SET_KEY = 'id-refresh-token'
 ID_REFRESH_TOKEN_HEADER_GET_KEY = 'id-refresh-token'
 ACCESS_CONTROL_EXPOSE_HEADERS = 'Access-Control-Expose-Headers'
+# the handshake info is refetched in the background once every signing key is this close to expiring
+HANDSHAKE_INFO_REFRESH_AHEAD_MS = 60000
+# and at most this often while that is the case, since the core may not have a new key yet
+HANDSHAKE_INFO_MIN_REFRESH_INTERVAL_MS = 5000
+MAX_CONCURRENT_VERIFY_CALLS_TO_CORE = 10
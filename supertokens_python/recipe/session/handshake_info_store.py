@@ -0,0 +1,206 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Tuple, Union
+
+from supertokens_python.exceptions import raise_general_exception
+from supertokens_python.logger import log_debug_message
+from supertokens_python.utils import get_timestamp_ms
+
+DEFAULT_MAX_SIZE = 64 * 1024
+DEFAULT_FETCH_TIMEOUT_MS = 10000
+FETCH_POLL_INTERVAL_MS = 20
+
+# magic, length of the response, version
+_HEADER = struct.Struct('<4sIQ')
+_MAGIC = b'STHI'
+
+
+class HandshakeInfoStore(ABC):
+    """
+    Shares the core's response to /recipe/handshake between the worker processes of a host,
+    so that one of them calls the core (at boot and when the signing keys are about to
+    expire) and the others use its response. Every stored response gets a new version.
+    """
+
+    @abstractmethod
+    def get_version(self) -> int:
+        """
+        The version of the stored response, 0 if there is none. This is called whenever the
+        handshake info is used, so it must be cheap.
+        """
+
+    @abstractmethod
+    def get(self) -> Union[Tuple[int, Dict[str, Any]], None]:
+        pass
+
+    @abstractmethod
+    async def fetch(self, known_version: int,
+                    call_core: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Calls call_core and stores its response, unless a response newer than known_version
+        was stored (by this or another process) in the meantime, in which case it returns that
+        one instead.
+        """
+
+
+class SharedMemoryHandshakeInfoStore(HandshakeInfoStore):
+    """
+    Keeps the response in a memory mapped file that all the workers open, preferably on a
+    tmpfs like /dev/shm. Only one worker at a time calls the core, which is ensured with a
+    lock on the file path + '.lock'. Only supported on POSIX systems.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_MAX_SIZE,
+                 fetch_timeout_ms: int = DEFAULT_FETCH_TIMEOUT_MS):
+        try:
+            import fcntl  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            raise_general_exception('SharedMemoryHandshakeInfoStore is only supported on POSIX systems')
+        if max_size <= _HEADER.size:
+            raise_general_exception('max_size must be greater than ' + str(_HEADER.size))
+        self.__fcntl = fcntl
+        self.path = path
+        self.max_size = max_size
+        self.fetch_timeout_ms = fetch_timeout_ms
+        self.__lock = Lock()
+        # flock doesn't exclude the threads of a process from each other, since they share the fd
+        self.__map_lock = Lock()
+        self.__open_lock = Lock()
+        self.__pid: Union[int, None] = None
+        self.__fd = -1
+        self.__lock_fd = -1
+        self.__map: Union[mmap.mmap, None] = None
+
+    def get_version(self) -> int:
+        shared_map = self.__get_map()
+        magic, _, version = _HEADER.unpack_from(shared_map)
+        return version if magic == _MAGIC else 0
+
+    def get(self) -> Union[Tuple[int, Dict[str, Any]], None]:
+        shared_map = self.__get_map()
+        with self.__map_lock:
+            self.__fcntl.flock(self.__fd, self.__fcntl.LOCK_SH)
+            try:
+                magic, length, version = _HEADER.unpack_from(shared_map)
+                if magic != _MAGIC:
+                    return None
+                payload = shared_map[_HEADER.size:_HEADER.size + length]
+            finally:
+                self.__fcntl.flock(self.__fd, self.__fcntl.LOCK_UN)
+        try:
+            return version, json.loads(payload)
+        except ValueError:
+            log_debug_message("handshake info store: the response in %s can't be decoded", self.path)
+            return None
+
+    async def fetch(self, known_version: int,
+                    call_core: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[int, Dict[str, Any]]:
+        deadline = get_timestamp_ms() + self.fetch_timeout_ms
+        locked = False
+        while True:
+            stored = self.__get_if_newer(known_version)
+            if stored is not None:
+                return stored
+            locked = self.__try_lock()
+            if locked or get_timestamp_ms() >= deadline:
+                # past the deadline, the worker holding the lock is most likely stuck, so we call the core anyway
+                break
+            await asyncio.sleep(FETCH_POLL_INTERVAL_MS / 1000)
+
+        try:
+            # it may have been stored between the check and taking the lock
+            stored = self.__get_if_newer(known_version)
+            if stored is not None:
+                return stored
+            response = await call_core()
+            return self.__set(response), response
+        finally:
+            if locked:
+                self.__unlock()
+
+    def __get_if_newer(self, known_version: int) -> Union[Tuple[int, Dict[str, Any]], None]:
+        if self.get_version() == known_version:
+            return None
+        return self.get()
+
+    def __set(self, response: Dict[str, Any]) -> int:
+        shared_map = self.__get_map()
+        payload = json.dumps(response).encode('utf-8')
+        with self.__map_lock:
+            self.__fcntl.flock(self.__fd, self.__fcntl.LOCK_EX)
+            try:
+                magic, _, version = _HEADER.unpack_from(shared_map)
+                version = (version if magic == _MAGIC else 0) + 1
+                if _HEADER.size + len(payload) > len(shared_map):
+                    # the workers keep using their own responses until the next fetch
+                    log_debug_message("handshake info store: response of %d bytes doesn't fit in %s",
+                                      len(payload), self.path)
+                    return version - 1
+                shared_map[_HEADER.size:_HEADER.size + len(payload)] = payload
+                # written last, since get_version reads it without taking the lock
+                _HEADER.pack_into(shared_map, 0, _MAGIC, len(payload), version)
+                return version
+            finally:
+                self.__fcntl.flock(self.__fd, self.__fcntl.LOCK_UN)
+
+    def __try_lock(self) -> bool:
+        self.__get_map()
+        # flock doesn't exclude the threads of one process, so they are excluded here
+        if not self.__lock.acquire(blocking=False):
+            return False
+        try:
+            self.__fcntl.flock(self.__lock_fd, self.__fcntl.LOCK_EX | self.__fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self.__lock.release()
+            return False
+
+    def __unlock(self):
+        self.__fcntl.flock(self.__lock_fd, self.__fcntl.LOCK_UN)
+        self.__lock.release()
+
+    def __get_map(self) -> mmap.mmap:
+        pid = os.getpid()
+        if self.__map is not None and self.__pid == pid:
+            return self.__map
+        with self.__open_lock:
+            if self.__map is None or self.__pid != pid:
+                self.__open(pid)
+            return self.__map  # type: ignore
+
+    def __open(self, pid: int):
+        # the files are opened again in each process, since workers forked after init would
+        # otherwise share the file descriptions and with them the locks
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.__fcntl.flock(fd, self.__fcntl.LOCK_EX)
+        try:
+            size = os.fstat(fd).st_size
+            if size < self.max_size:
+                os.ftruncate(fd, self.max_size)
+                size = self.max_size
+        finally:
+            self.__fcntl.flock(fd, self.__fcntl.LOCK_UN)
+        self.__lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        self.__fd = fd
+        self.__map = mmap.mmap(fd, size)
+        self.__pid = pid
@@ -17,7 +17,9 @@ from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any, Dict, List, Union
 
 from supertokens_python.async_to_sync_wrapper import sync
+from supertokens_python.exceptions import GeneralError, raise_general_exception
 
+from .exceptions import TryRefreshTokenError, UnauthorisedError
 from .utils import SessionConfig
 
 from typing_extensions import Literal
@@ -26,18 +28,35 @@ if TYPE_CHECKING:
 
 
 class SessionObj:
+    __slots__ = ('handle', 'user_id', 'user_data_in_jwt')
+
     def __init__(self, handle: str, user_id: str, user_data_in_jwt: Dict[str, Any]):
         self.handle = handle
         self.user_id = user_id
         self.user_data_in_jwt = user_data_in_jwt
 
 
-class AccessTokenObj:
+class TokenInfo:
+    """
+    A token created by the core, as kept in the new_*_token_info members of a session until
+    its cookies are set. It can also be read like the dict that the core returns for it.
+    """
+    __slots__ = ('token', 'expiry', 'created_time')
+
+    __keys = {'token': 'token', 'expiry': 'expiry', 'createdTime': 'created_time'}
+
     def __init__(self, token: str, expiry: int, created_time: int):
         self.token = token
         self.expiry = expiry
         self.created_time = created_time
 
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, TokenInfo.__keys[key])
+
+
+class AccessTokenObj(TokenInfo):
+    __slots__ = ()
+
 
 class RegenerateAccessTokenResult(ABC):
     def __init__(self, status: Literal['OK'], session: SessionObj,
@@ -53,6 +72,40 @@ class RegenerateAccessTokenOkResult(RegenerateAccessTokenResult):
         super().__init__('OK', session, access_token)
 
 
+class VerifyAccessTokenResult(ABC):
+    def __init__(self, status: Literal['OK', 'UNAUTHORISED', 'TRY_REFRESH_TOKEN', 'GENERAL_ERROR'],
+                 session: Union[SessionObj, None], access_token: Union[AccessTokenObj, None],
+                 message: Union[str, None]):
+        self.status = status
+        self.session = session
+        self.access_token = access_token
+        self.message = message
+
+
+class VerifyAccessTokenOkResult(VerifyAccessTokenResult):
+    def __init__(self, session: SessionObj, access_token: Union[AccessTokenObj, None]):
+        super().__init__('OK', session, access_token, None)
+
+
+class VerifyAccessTokenUnauthorisedResult(VerifyAccessTokenResult):
+    def __init__(self, message: str):
+        super().__init__('UNAUTHORISED', None, None, message)
+
+
+class VerifyAccessTokenTryRefreshTokenResult(VerifyAccessTokenResult):
+    def __init__(self, message: str):
+        super().__init__('TRY_REFRESH_TOKEN', None, None, message)
+
+
+class VerifyAccessTokenGeneralErrorResult(VerifyAccessTokenResult):
+    """
+    The token couldn't be verified, for example because the core couldn't be reached.
+    """
+
+    def __init__(self, message: str):
+        super().__init__('GENERAL_ERROR', None, None, message)
+
+
 class SessionInformationResult(ABC):
     def __init__(self, status: Literal['OK'], session_handle: str, user_id: str, session_data: Dict[str, Any], expiry: int, access_token_payload: Dict[str, Any], time_created: int):
         self.status: Literal['OK'] = status
@@ -126,6 +179,47 @@ class RecipeInterface(ABC):
                                       new_access_token_payload: Union[Dict[str, Any], None], user_context: Dict[str, Any]) -> RegenerateAccessTokenResult:
         pass
 
+    async def verify_access_tokens(self, access_tokens: List[str], anti_csrf_check: bool,
+                                   anti_csrf_tokens: Union[List[Union[str, None]], None],
+                                   contains_custom_header: bool,
+                                   user_context: Dict[str, Any]) -> List[VerifyAccessTokenResult]:
+        """
+        Verifies each access token the way get_session verifies the one of a request, and
+        returns one result per token, in the same order.
+        """
+        from .access_token_request import \
+            AccessTokenRequest  # pylint: disable=import-outside-toplevel
+        if anti_csrf_tokens is None:
+            anti_csrf_tokens = [None] * len(access_tokens)
+        if len(anti_csrf_tokens) != len(access_tokens):
+            raise_general_exception('anti_csrf_tokens must have one entry per access token')
+
+        results: List[VerifyAccessTokenResult] = []
+        for access_token, anti_csrf_token in zip(access_tokens, anti_csrf_tokens):
+            request = AccessTokenRequest(access_token, anti_csrf_token, contains_custom_header)
+            try:
+                session = await self.get_session(request, anti_csrf_check, True, user_context)
+            except TryRefreshTokenError as e:
+                results.append(VerifyAccessTokenTryRefreshTokenResult(str(e)))
+                continue
+            except UnauthorisedError as e:
+                results.append(VerifyAccessTokenUnauthorisedResult(str(e)))
+                continue
+            except GeneralError as e:
+                results.append(VerifyAccessTokenGeneralErrorResult(str(e)))
+                continue
+            if session is None:
+                raise Exception("Should never come here")
+            new_access_token = None
+            if session.new_access_token_info is not None:
+                new_access_token = AccessTokenObj(session.new_access_token_info['token'],
+                                                  session.new_access_token_info['expiry'],
+                                                  session.new_access_token_info['createdTime'])
+            results.append(VerifyAccessTokenOkResult(
+                SessionObj(session.get_handle(), session.get_user_id(), session.get_access_token_payload()),
+                new_access_token))
+        return results
+
 
 class SignOutResponse:
     def __init__(self):
@@ -184,10 +278,10 @@ class SessionContainer(ABC):
         self.session_handle = session_handle
         self.access_token_payload = access_token_payload
         self.user_id = user_id
-        self.new_access_token_info = None
-        self.new_refresh_token_info = None
-        self.new_id_refresh_token_info = None
-        self.new_anti_csrf_token = None
+        self.new_access_token_info: Union[TokenInfo, Dict[str, Any], None] = None
+        self.new_refresh_token_info: Union[TokenInfo, Dict[str, Any], None] = None
+        self.new_id_refresh_token_info: Union[TokenInfo, Dict[str, Any], None] = None
+        self.new_anti_csrf_token: Union[str, None] = None
         self.remove_cookies = False
 
     @abstractmethod
@@ -231,6 +325,14 @@ class SessionContainer(ABC):
     async def get_expiry(self, user_context: Union[Dict[str, Any], None] = None) -> int:
         pass
 
+    def prefetch(self, user_context: Union[Dict[str, Any], None] = None) -> None:
+        """
+        Starts fetching the session information (used by get_session_data, get_time_created
+        and get_expiry) in the background, so that it loads while the handler does other work.
+        Must be called from async code, since the fetch runs on the running event loop.
+        By default it does nothing, and the information is fetched when it's used.
+        """
+
     def sync_get_expiry(self, user_context: Union[Dict[str, Any], None] = None) -> int:
         return sync(self.get_expiry(user_context))
 
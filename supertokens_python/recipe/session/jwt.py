@@ -15,7 +15,8 @@
 from base64 import b64decode
 from json import dumps, loads
 from textwrap import wrap
-from typing import Any, Dict
+from threading import Lock
+from typing import Any, Dict, Iterable
 
 from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
@@ -25,6 +26,14 @@ from supertokens_python.utils import utf_base64decode, utf_base64encode
 _key_start = '-----BEGIN PUBLIC KEY-----\n'
 _key_end = '\n-----END PUBLIC KEY-----'
 
+# Parsing the public key is the most expensive part of verifying an access token
+# after the RSA operation itself, so we parse each signing key only once.
+# Entries are removed when the key expires (see HandshakeInfo), and the size
+# limit is only a safety net in case keys are passed in from elsewhere.
+_MAX_CACHED_VERIFIERS = 32
+_verifiers: Dict[str, PKCS115_SigScheme] = {}
+_verifiers_lock = Lock()
+
 """
 why separators is used in dumps:
 - without it's use, output of dumps is: '{"alg": "RS256", "typ": "JWT", "version": "1"}'
@@ -48,6 +57,21 @@ def get_payload(jwt: str, signing_public_key: str):
     if header not in _allowed_headers:
         raise Exception("jwt header mismatch")
 
+    verifier = get_verifier(signing_public_key)
+    to_verify = SHA256.new((header + "." + payload).encode('utf-8'))
+    try:
+        verifier.verify(to_verify, b64decode(signature.encode('utf-8')))
+    except BaseException:
+        raise Exception("jwt verification failed")
+
+    return loads(utf_base64decode(payload))
+
+
+def get_verifier(signing_public_key: str) -> PKCS115_SigScheme:
+    verifier = _verifiers.get(signing_public_key)
+    if verifier is not None:
+        return verifier
+
     public_key = RSA.import_key(
         _key_start +
         "\n".join(
@@ -56,13 +80,19 @@ def get_payload(jwt: str, signing_public_key: str):
                 width=64)) +
         _key_end)
     verifier = PKCS115_SigScheme(public_key)
-    to_verify = SHA256.new((header + "." + payload).encode('utf-8'))
-    try:
-        verifier.verify(to_verify, b64decode(signature.encode('utf-8')))
-    except BaseException:
-        raise Exception("jwt verification failed")
+    with _verifiers_lock:
+        if len(_verifiers) >= _MAX_CACHED_VERIFIERS:
+            _verifiers.clear()
+        _verifiers[signing_public_key] = verifier
+    return verifier
 
-    return loads(utf_base64decode(payload))
+
+def retain_verifiers(signing_public_keys: Iterable[str]):
+    keys_to_keep = set(signing_public_keys)
+    with _verifiers_lock:
+        for key in list(_verifiers.keys()):
+            if key not in keys_to_keep:
+                del _verifiers[key]
 
 
 def get_payload_without_verifying(jwt: str) -> Dict[str, Any]:
@@ -26,6 +26,7 @@ from .exceptions import (SuperTokensSessionError, TokenTheftError,
 
 if TYPE_CHECKING:
     from supertokens_python.framework import BaseRequest
+    from supertokens_python.recipe.openid.recipe import OpenIdRecipe
     from supertokens_python.supertokens import AppInfo
 
 from supertokens_python.exceptions import (SuperTokensError,
@@ -33,9 +34,6 @@ from supertokens_python.exceptions import (SuperTokensError,
 from supertokens_python.logger import log_debug_message
 from supertokens_python.normalised_url_path import NormalisedURLPath
 from supertokens_python.querier import Querier
-from supertokens_python.recipe.openid.recipe import OpenIdRecipe
-from supertokens_python.recipe.session.with_jwt import \
-    get_recipe_implementation_with_jwt
 from supertokens_python.recipe_module import APIHandled, RecipeModule
 
 from .api.implementation import APIImplementation
@@ -44,6 +42,10 @@ from .interfaces import APIInterface, APIOptions, RecipeInterface
 from .recipe_implementation import RecipeImplementation
 from .utils import (InputErrorHandlers, InputOverrideConfig, JWTConfig,
                     validate_and_normalise_user_input)
+from .refresh_coalescing import RefreshCoalescingBackend
+from .verification_executor import VerificationExecutor
+from .handshake_info_store import HandshakeInfoStore
+from .verify_result_cache import VerifyResultCache
 
 
 class SessionRecipe(RecipeModule):
@@ -60,7 +62,11 @@ class SessionRecipe(RecipeModule):
                                           "VIA_CUSTOM_HEADER", "NONE"], None] = None,
                  error_handlers: Union[InputErrorHandlers, None] = None,
                  override: Union[InputOverrideConfig, None] = None,
-                 jwt: Union[JWTConfig, None] = None):
+                 jwt: Union[JWTConfig, None] = None,
+                 verification_executor: Union[VerificationExecutor, None] = None,
+                 refresh_coalescing: Union[RefreshCoalescingBackend, None] = None,
+                 verify_result_cache: Union[VerifyResultCache, None] = None,
+                 handshake_info_store: Union[HandshakeInfoStore, None] = None):
         super().__init__(recipe_id, app_info)
         self.openid_recipe: Union[None, OpenIdRecipe] = None
         self.config = validate_and_normalise_user_input(app_info, cookie_domain,
@@ -70,7 +76,11 @@ class SessionRecipe(RecipeModule):
                                                         anti_csrf,
                                                         error_handlers,
                                                         override,
-                                                        jwt)
+                                                        jwt,
+                                                        verification_executor,
+                                                        refresh_coalescing,
+                                                        verify_result_cache,
+                                                        handshake_info_store)
         log_debug_message("session init: anti_csrf: %s", self.config.anti_csrf)
         if self.config.cookie_domain is not None:
             log_debug_message("session init: cookie_domain: %s", self.config.cookie_domain)
@@ -82,6 +92,9 @@ class SessionRecipe(RecipeModule):
         log_debug_message("session init: session_expired_status_code: %s", str(self.config.session_expired_status_code))
 
         if self.config.jwt.enable:
+            from supertokens_python.recipe.openid.recipe import OpenIdRecipe
+            from supertokens_python.recipe.session.with_jwt import \
+                get_recipe_implementation_with_jwt
             openid_feature_override = None
             if override is not None:
                 openid_feature_override = override.openid_feature
@@ -89,10 +102,12 @@ class SessionRecipe(RecipeModule):
                                               openid_feature_override)
             recipe_implementation = RecipeImplementation(
                 Querier.get_instance(recipe_id), self.config)
+            self.__base_recipe_implementation = recipe_implementation
             recipe_implementation = get_recipe_implementation_with_jwt(recipe_implementation, self.config, self.openid_recipe.recipe_implementation)
         else:
             recipe_implementation = RecipeImplementation(
                 Querier.get_instance(recipe_id), self.config)
+            self.__base_recipe_implementation = recipe_implementation
         self.recipe_implementation: RecipeInterface = recipe_implementation if self.config.override.functions is None else self.config.override.functions(
             recipe_implementation)
         api_implementation = APIImplementation()
@@ -159,6 +174,10 @@ class SessionRecipe(RecipeModule):
 
         return cors_headers
 
+    async def warmup(self):
+        # through the implementation created here, since the overridden one may not have get_handshake_info
+        await self.__base_recipe_implementation.get_handshake_info()
+
     @staticmethod
     def init(cookie_domain: Union[str, None] = None,
              cookie_secure: Union[bool, None] = None,
@@ -169,7 +188,11 @@ class SessionRecipe(RecipeModule):
                                       "VIA_CUSTOM_HEADER", "NONE"], None] = None,
              error_handlers: Union[InputErrorHandlers, None] = None,
              override: Union[InputOverrideConfig, None] = None,
-             jwt: Union[JWTConfig, None] = None):
+             jwt: Union[JWTConfig, None] = None,
+             verification_executor: Union[VerificationExecutor, None] = None,
+             refresh_coalescing: Union[RefreshCoalescingBackend, None] = None,
+             verify_result_cache: Union[VerifyResultCache, None] = None,
+             handshake_info_store: Union[HandshakeInfoStore, None] = None):
         def func(app_info: AppInfo):
             if SessionRecipe.__instance is None:
                 SessionRecipe.__instance = SessionRecipe(
@@ -180,7 +203,11 @@ class SessionRecipe(RecipeModule):
                     anti_csrf,
                     error_handlers,
                     override,
-                    jwt
+                    jwt,
+                    verification_executor,
+                    refresh_coalescing,
+                    verify_result_cache,
+                    handshake_info_store
                 )
                 return SessionRecipe.__instance
             raise_general_exception(
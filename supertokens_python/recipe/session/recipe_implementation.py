@@ -13,25 +13,38 @@
 # under the License.
 from __future__ import annotations
 
+import asyncio
+from bisect import bisect_right
 from typing import TYPE_CHECKING, Any, Dict
+from weakref import WeakKeyDictionary
 
-from supertokens_python.logger import log_debug_message
+from supertokens_python.exceptions import (GeneralError, SuperTokensError,
+                                           raise_general_exception)
+from supertokens_python.logger import (is_debug_logging_enabled,
+                                       log_debug_message)
 from supertokens_python.normalised_url_path import NormalisedURLPath
 from supertokens_python.process_state import AllowedProcessStates, ProcessState
-from supertokens_python.utils import (FRAMEWORKS, execute_in_background,
-                                      frontend_has_interceptor,
+from supertokens_python.utils import (FRAMEWORKS, frontend_has_interceptor,
                                       get_timestamp_ms, normalise_http_method)
 
 from . import session_functions
+from .access_token import VerifiedAccessTokenCache
+from .constants import (HANDSHAKE_INFO_MIN_REFRESH_INTERVAL_MS,
+                        HANDSHAKE_INFO_REFRESH_AHEAD_MS)
+from .jwt import retain_verifiers
 from .cookie_and_header import (get_access_token_from_cookie,
                                 get_anti_csrf_header,
                                 get_id_refresh_token_from_cookie,
                                 get_refresh_token_from_cookie, get_rid_header)
-from .exceptions import (raise_try_refresh_token_exception,
+from .exceptions import (TryRefreshTokenError, UnauthorisedError,
+                         raise_try_refresh_token_exception,
                          raise_unauthorised_exception)
 from .interfaces import (AccessTokenObj, RecipeInterface,
                          RegenerateAccessTokenOkResult,
-                         SessionInformationResult, SessionObj)
+                         SessionInformationResult, SessionObj, TokenInfo,
+                         VerifyAccessTokenGeneralErrorResult,
+                         VerifyAccessTokenTryRefreshTokenResult,
+                         VerifyAccessTokenUnauthorisedResult)
 from .session_class import Session
 
 if TYPE_CHECKING:
@@ -39,28 +52,76 @@ if TYPE_CHECKING:
 
     from supertokens_python.querier import Querier
 
-    from .interfaces import RegenerateAccessTokenResult
+    from .interfaces import (RegenerateAccessTokenResult,
+                             VerifyAccessTokenResult)
     from .utils import SessionConfig
 
 from .interfaces import SessionContainer
 
+HANDSHAKE_PATH = NormalisedURLPath('/recipe/handshake')
+SESSION_REGENERATE_PATH = NormalisedURLPath('/recipe/session/regenerate')
+
 
 class HandshakeInfo:
 
     def __init__(self, info: Dict[str, Any]):
         self.access_token_blacklisting_enabled = info['accessTokenBlacklistingEnabled']
         self.raw_jwt_signing_public_key_list: List[Dict[str, Any]] = []
+        # the same keys sorted by createdAt, used to find the key that signed an access token
+        self.__keys_sorted_by_created_at: List[Dict[str, Any]] = []
+        self.__created_at_of_sorted_keys: List[int] = []
+        self.anti_csrf = info['antiCsrf']
+        self.access_token_validity = info['accessTokenValidity']
+        self.refresh_token_validity = info['refreshTokenValidity']
+        self.verified_access_token_cache = VerifiedAccessTokenCache()
+
+    def update(self, info: Dict[str, Any]):
+        if info['accessTokenBlacklistingEnabled'] != self.access_token_blacklisting_enabled:
+            self.verified_access_token_cache.clear()
+        self.access_token_blacklisting_enabled = info['accessTokenBlacklistingEnabled']
         self.anti_csrf = info['antiCsrf']
         self.access_token_validity = info['accessTokenValidity']
         self.refresh_token_validity = info['refreshTokenValidity']
 
     def set_jwt_signing_public_key_list(self, updated_list: List[Dict[str, Any]]):
+        old_keys = set(key['publicKey'] for key in self.raw_jwt_signing_public_key_list)
+        new_keys = set(key['publicKey'] for key in updated_list)
         self.raw_jwt_signing_public_key_list = updated_list
+        self.__keys_sorted_by_created_at = sorted(updated_list, key=lambda key: key['createdAt'])
+        self.__created_at_of_sorted_keys = [key['createdAt'] for key in self.__keys_sorted_by_created_at]
+        if old_keys != new_keys:
+            # tokens verified with a key that is no longer in the list must be verified again
+            self.verified_access_token_cache.clear()
+            retain_verifiers(new_keys)
 
     def get_jwt_signing_public_key_list(self) -> List[Dict[str, Any]]:
         time_now = get_timestamp_ms()
-        return [
+        key_list = [
             key for key in self.raw_jwt_signing_public_key_list if key['expiryTime'] > time_now]
+        if len(key_list) != len(self.raw_jwt_signing_public_key_list):
+            # some keys have expired, so we drop them along with their parsed verifiers
+            self.set_jwt_signing_public_key_list(key_list)
+        return key_list
+
+    def get_jwt_signing_public_key_for(self, time_created: Union[int, float]) -> Union[Dict[str, Any], None]:
+        """
+        Returns the key that the core was signing access tokens with at time_created, which is
+        the newest unexpired key created before that time. Returns None if the access token is
+        older than every key.
+        """
+        self.get_jwt_signing_public_key_list()
+        time_now = get_timestamp_ms()
+        index = bisect_right(self.__created_at_of_sorted_keys, time_created) - 1
+        while index >= 0:
+            key = self.__keys_sorted_by_created_at[index]
+            if key['expiryTime'] > time_now:
+                return key
+            index -= 1
+        return None
+
+
+def get_token_info(token: Dict[str, Any]) -> TokenInfo:
+    return TokenInfo(token['token'], token['expiry'], token['createdTime'])
 
 
 class RecipeImplementation(RecipeInterface):
@@ -69,42 +130,95 @@ class RecipeImplementation(RecipeInterface):
         self.querier = querier
         self.config = config
         self.handshake_info: Union[HandshakeInfo, None] = None
-
-        async def call_get_handshake_info():
-            try:
-                await self.get_handshake_info()
-            except Exception:
-                pass
-
-        try:
-            execute_in_background(config.mode, call_get_handshake_info)
-        except Exception:
-            pass
+        # concurrent refetches of the handshake info share a single call to the core
+        self.__handshake_info_fetches: WeakKeyDictionary[asyncio.AbstractEventLoop,
+                                                         asyncio.Future[HandshakeInfo]] = WeakKeyDictionary()
+        self.__handshake_info_fetched_at = 0
+        # the version of the response in config.handshake_info_store that handshake_info is built from
+        self.__stored_handshake_info_version = 0
 
     async def get_handshake_info(self, force_refetch: bool = False) -> HandshakeInfo:
-        if self.handshake_info is None or len(
-                self.handshake_info.get_jwt_signing_public_key_list()) == 0 or force_refetch:
-            ProcessState.get_instance().add_state(
-                AllowedProcessStates.CALLING_SERVICE_IN_GET_HANDSHAKE_INFO)
-            response = await self.querier.send_post_request(NormalisedURLPath('/recipe/handshake'), {})
-            self.handshake_info = HandshakeInfo({
-                **response,
-                'antiCsrf': self.config.anti_csrf
-            })
-
-            self.update_jwt_signing_public_key_info(response['jwtSigningPublicKeyList'],
-                                                    response['jwtSigningPublicKey'],
-                                                    response['jwtSigningPublicKeyExpiryTime'])
-
+        store = self.config.handshake_info_store
+        if store is not None and store.get_version() != self.__stored_handshake_info_version:
+            # another worker has fetched it
+            stored = store.get()
+            if stored is not None:
+                self.__stored_handshake_info_version, response = stored
+                self.__handshake_info_fetched_at = get_timestamp_ms()
+                self.__set_handshake_info(response)
+
+        handshake_info = self.handshake_info
+        if handshake_info is None or force_refetch:
+            # shielded so that a cancelled request doesn't cancel the fetch for everyone else
+            return await asyncio.shield(self.__get_handshake_info_fetch())
+        key_list = handshake_info.get_jwt_signing_public_key_list()
+        if len(key_list) == 0:
+            return await asyncio.shield(self.__get_handshake_info_fetch())
+
+        # we fetch the new signing keys before the ones we know about expire, so that requests
+        # don't have to wait for the core at that point. Until then, we keep using the current keys.
+        time_now = get_timestamp_ms()
+        if max(key['expiryTime'] for key in key_list) - time_now <= HANDSHAKE_INFO_REFRESH_AHEAD_MS and \
+                time_now - self.__handshake_info_fetched_at >= HANDSHAKE_INFO_MIN_REFRESH_INTERVAL_MS:
+            self.__get_handshake_info_fetch()
+        return handshake_info
+
+    def __get_handshake_info_fetch(self) -> asyncio.Future[HandshakeInfo]:
+        loop = asyncio.get_event_loop()
+        fetch = self.__handshake_info_fetches.get(loop)
+        if fetch is None:
+            self.__handshake_info_fetched_at = get_timestamp_ms()
+            fetch = asyncio.ensure_future(self.__fetch_handshake_info())
+            self.__handshake_info_fetches[loop] = fetch
+
+            def on_done(f: asyncio.Future[HandshakeInfo]):
+                self.__handshake_info_fetches.pop(loop, None)
+                # read here, since no one waits for the fetches that refresh the keys in the background
+                if not f.cancelled() and f.exception() is not None:
+                    log_debug_message("getHandshakeInfo: fetching the handshake info failed: %s", f.exception())
+
+            fetch.add_done_callback(on_done)
+        return fetch
+
+    async def __fetch_handshake_info(self) -> HandshakeInfo:
+        store = self.config.handshake_info_store
+        if store is None:
+            response = await self.__call_handshake()
+        else:
+            self.__stored_handshake_info_version, response = await store.fetch(
+                self.__stored_handshake_info_version, self.__call_handshake)
+        return self.__set_handshake_info(response)
+
+    async def __call_handshake(self) -> Dict[str, Any]:
+        ProcessState.get_instance().add_state(
+            AllowedProcessStates.CALLING_SERVICE_IN_GET_HANDSHAKE_INFO)
+        return await self.querier.send_post_request(HANDSHAKE_PATH, {})
+
+    def __set_handshake_info(self, response: Dict[str, Any]) -> HandshakeInfo:
+        info = {
+            **response,
+            'antiCsrf': self.config.anti_csrf
+        }
+        if self.handshake_info is None:
+            self.handshake_info = HandshakeInfo(info)
+        else:
+            # updated in place so that the tokens verified with keys that are still valid stay cached
+            self.handshake_info.update(info)
+
+        self.update_jwt_signing_public_key_info(response['jwtSigningPublicKeyList'],
+                                                response['jwtSigningPublicKey'],
+                                                response['jwtSigningPublicKeyExpiryTime'])
         return self.handshake_info
 
     def update_jwt_signing_public_key_info(
             self, key_list: Union[List[Dict[str, Any]], None], public_key: str, expiry_time: int):
         if key_list is None:
+            # the core didn't say when the key was created, so it is taken to be older than
+            # every access token, like the only key a core without key rotation has
             key_list = [{
                 'publicKey': public_key,
                 'expiryTime': expiry_time,
-                'createdAt': get_timestamp_ms()
+                'createdAt': 0
             }]
 
         if self.handshake_info is not None:
@@ -117,13 +231,11 @@ class RecipeImplementation(RecipeInterface):
             request = FRAMEWORKS[self.config.framework].wrap_request(request)
         session = await session_functions.create_new_session(self, user_id, access_token_payload, session_data)
         access_token = session['accessToken']
-        refresh_token = session['refreshToken']
-        id_refresh_token = session['idRefreshToken']
         new_session = Session(self, access_token['token'], session['session']['handle'],
                               session['session']['userId'], session['session']['userDataInJWT'])
-        new_session.new_access_token_info = access_token
-        new_session.new_refresh_token_info = refresh_token
-        new_session.new_id_refresh_token_info = id_refresh_token
+        new_session.new_access_token_info = get_token_info(access_token)
+        new_session.new_refresh_token_info = get_token_info(session['refreshToken'])
+        new_session.new_id_refresh_token_info = get_token_info(session['idRefreshToken'])
         if 'antiCsrfToken' in session and session['antiCsrfToken'] is not None:
             new_session.new_anti_csrf_token = session['antiCsrfToken']
         request.set_session(new_session)
@@ -135,8 +247,9 @@ class RecipeImplementation(RecipeInterface):
         if not hasattr(request, 'wrapper_used') or not request.wrapper_used:
             request = FRAMEWORKS[self.config.framework].wrap_request(request)
 
-        log_debug_message("getSession: rid in header: %s", str(frontend_has_interceptor(request)))
-        log_debug_message("getSession: request method: %s", request.method())
+        if is_debug_logging_enabled():
+            log_debug_message("getSession: rid in header: %s", frontend_has_interceptor(request))
+            log_debug_message("getSession: request method: %s", request.method())
 
         id_refresh_token = get_id_refresh_token_from_cookie(request)
         if id_refresh_token is None:
@@ -159,19 +272,19 @@ class RecipeImplementation(RecipeInterface):
         if anti_csrf_check is None:
             anti_csrf_check = normalise_http_method(request.method()) != 'get'
 
-        log_debug_message("getSession: Value of doAntiCsrfCheck is: %s", str(anti_csrf_check))
-        new_session = await session_functions.get_session(self, access_token, anti_csrf_token, anti_csrf_check,
-                                                          get_rid_header(request) is not None)
-        if 'accessToken' in new_session:
-            access_token = new_session['accessToken']['token']
+        log_debug_message("getSession: Value of doAntiCsrfCheck is: %s", anti_csrf_check)
+        result = await session_functions.get_session(self, access_token, anti_csrf_token, anti_csrf_check,
+                                                     get_rid_header(request) is not None)
+        if result.access_token is not None:
+            access_token = result.access_token.token
 
         if access_token is None:
             raise Exception("Should never come here")
-        session = Session(self, access_token, new_session['session']['handle'],
-                          new_session['session']['userId'], new_session['session']['userDataInJWT'])
+        session = Session(self, access_token, result.session.handle,
+                          result.session.user_id, result.session.user_data_in_jwt)
 
-        if 'accessToken' in new_session:
-            session.new_access_token_info = new_session['accessToken']
+        if result.access_token is not None:
+            session.new_access_token_info = result.access_token
 
         log_debug_message("getSession: Success!")
         request.set_session(session)
@@ -196,13 +309,11 @@ class RecipeImplementation(RecipeInterface):
         new_session = await session_functions.refresh_session(self, refresh_token, anti_csrf_token,
                                                               get_rid_header(request) is not None)
         access_token = new_session['accessToken']
-        refresh_token = new_session['refreshToken']
-        id_refresh_token = new_session['idRefreshToken']
         session = Session(self, access_token['token'], new_session['session']['handle'],
                           new_session['session']['userId'], new_session['session']['userDataInJWT'])
-        session.new_access_token_info = access_token
-        session.new_refresh_token_info = refresh_token
-        session.new_id_refresh_token_info = id_refresh_token
+        session.new_access_token_info = get_token_info(access_token)
+        session.new_refresh_token_info = get_token_info(new_session['refreshToken'])
+        session.new_id_refresh_token_info = get_token_info(new_session['idRefreshToken'])
         if 'antiCsrfToken' in new_session and new_session['antiCsrfToken'] is not None:
             session.new_anti_csrf_token = new_session['antiCsrfToken']
 
@@ -242,7 +353,7 @@ class RecipeImplementation(RecipeInterface):
                                       new_access_token_payload: Union[Dict[str, Any], None], user_context: Dict[str, Any]) -> RegenerateAccessTokenResult:
         if new_access_token_payload is None:
             new_access_token_payload = {}
-        response: Dict[str, Any] = await self.querier.send_post_request(NormalisedURLPath("/recipe/session/regenerate"), {
+        response: Dict[str, Any] = await self.querier.send_post_request(SESSION_REGENERATE_PATH, {
             'accessToken': access_token,
             'userDataInJWT': new_access_token_payload
         })
@@ -261,3 +372,28 @@ class RecipeImplementation(RecipeInterface):
             response['session']['userDataInJWT']
         )
         return RegenerateAccessTokenOkResult(session, access_token_obj)
+
+    async def verify_access_tokens(self, access_tokens: List[str], anti_csrf_check: bool,
+                                   anti_csrf_tokens: Union[List[Union[str, None]], None],
+                                   contains_custom_header: bool,
+                                   user_context: Dict[str, Any]) -> List[VerifyAccessTokenResult]:
+        if anti_csrf_tokens is None:
+            anti_csrf_tokens = [None] * len(access_tokens)
+        if len(anti_csrf_tokens) != len(access_tokens):
+            raise_general_exception('anti_csrf_tokens must have one entry per access token')
+
+        results: List[VerifyAccessTokenResult] = []
+        for response in await session_functions.verify_access_tokens(self, access_tokens, anti_csrf_tokens,
+                                                                     anti_csrf_check, contains_custom_header):
+            if isinstance(response, TryRefreshTokenError):
+                results.append(VerifyAccessTokenTryRefreshTokenResult(str(response)))
+            elif isinstance(response, UnauthorisedError):
+                results.append(VerifyAccessTokenUnauthorisedResult(str(response)))
+            elif isinstance(response, GeneralError):
+                # e.g. the core couldn't be reached for this token
+                results.append(VerifyAccessTokenGeneralErrorResult(str(response)))
+            elif isinstance(response, SuperTokensError):
+                raise response
+            else:
+                results.append(response)
+        return results
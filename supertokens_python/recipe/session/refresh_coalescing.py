@@ -0,0 +1,79 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from hashlib import sha256
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Union
+
+
+def get_refresh_coalescing_key(refresh_token: str, anti_csrf_token: Union[str, None]) -> str:
+    # the anti-csrf token is part of the key, so that a refresh with a wrong one never gets
+    # the result of a refresh with the right one. Hashed so that tokens aren't kept as keys
+    return sha256((refresh_token + ':' + (anti_csrf_token or '')).encode('utf-8')).hexdigest()
+
+
+class RefreshCoalescingBackend(ABC):
+    """
+    Makes concurrent refreshes with the same refresh token (like the ones from several
+    tabs of one browser) share one call to the core, so that they all get the same new tokens.
+    """
+
+    @abstractmethod
+    async def refresh(self, key: str, call_core: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Returns the response of the core to call_core, unless a refresh with the same key is
+        already in progress, in which case it returns the response to that one. The key is a
+        hash of the refresh and anti-csrf tokens and the response is a JSON serialisable dict,
+        so that both can be shared between processes. The response must not be modified.
+        """
+
+
+class InProcessRefreshCoalescing(RefreshCoalescingBackend):
+    """
+    Coalesces the refreshes of the process, including those made on the event loops of
+    different threads. This is the default.
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        # a concurrent future, so that it can be awaited from any event loop
+        self.__in_flight: Dict[str, Future[Dict[str, Any]]] = {}
+
+    async def refresh(self, key: str, call_core: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        with self.__lock:
+            in_flight = self.__in_flight.get(key)
+            if in_flight is None:
+                result: Future[Dict[str, Any]] = Future()
+                self.__in_flight[key] = result
+        if in_flight is not None:
+            return await asyncio.shield(asyncio.wrap_future(in_flight))
+
+        def on_done(task: asyncio.Future[Dict[str, Any]]):
+            with self.__lock:
+                self.__in_flight.pop(key, None)
+            if task.cancelled():
+                result.set_exception(asyncio.CancelledError())
+            elif task.exception() is not None:
+                result.set_exception(task.exception())  # type: ignore
+            else:
+                result.set_result(task.result())
+
+        # a task of its own, so that the request that started it going away doesn't fail the others
+        task = asyncio.ensure_future(call_core())
+        task.add_done_callback(on_done)
+        return await asyncio.shield(task)
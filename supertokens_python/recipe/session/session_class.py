@@ -11,42 +11,101 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+from __future__ import annotations
+
+import asyncio
+from copy import deepcopy
 from typing import Any, Dict, Union
 
-from .interfaces import SessionContainer
+from supertokens_python.exceptions import raise_general_exception
+
+from .interfaces import (RecipeInterface, SessionContainer,
+                         SessionInformationResult, TokenInfo)
 
 
 class Session(SessionContainer):
+    def __init__(self, recipe_implementation: RecipeInterface, access_token: str, session_handle: str, user_id: str, access_token_payload: Dict[str, Any]):
+        super().__init__(recipe_implementation, access_token, session_handle, user_id, access_token_payload)
+        # the session information is fetched from the core at most once for the lifetime of
+        # this object (which is one request), unless this object changes the session
+        self.__session_information: Union[SessionInformationResult, None] = None
+        self.__session_information_fetch: Union[asyncio.Future[SessionInformationResult], None] = None
+
+    def prefetch(self, user_context: Union[Dict[str, Any], None] = None) -> None:
+        if user_context is None:
+            user_context = {}
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # without a running event loop, the fetch would not run until the next sync call
+            raise_general_exception('prefetch can only be called from async code')
+        if self.__session_information is None:
+            self.__start_session_information_fetch(user_context)
+
+    def __start_session_information_fetch(self, user_context: Dict[str, Any]) -> asyncio.Future[SessionInformationResult]:
+        loop = asyncio.get_running_loop()
+        fetch = self.__session_information_fetch
+        # a fetch started on another event loop (by another sync call) can't be awaited on this one
+        if fetch is None or fetch.get_loop() is not loop:
+            fetch = loop.create_task(
+                self.recipe_implementation.get_session_information(self.session_handle, user_context))
+            self.__session_information_fetch = fetch
+            fetch.add_done_callback(self.__on_session_information_fetched)
+        return fetch
+
+    def __on_session_information_fetched(self, fetch: asyncio.Future[SessionInformationResult]):
+        if fetch is not self.__session_information_fetch:
+            # the session was changed while this was being fetched
+            if not fetch.cancelled():
+                fetch.exception()
+            return
+        self.__session_information_fetch = None
+        if not fetch.cancelled() and fetch.exception() is None:
+            self.__session_information = fetch.result()
+
+    def __invalidate_session_information(self):
+        self.__session_information = None
+        self.__session_information_fetch = None
+
+    async def __get_session_information(self, user_context: Dict[str, Any]) -> SessionInformationResult:
+        session_information = self.__session_information
+        if session_information is not None:
+            return session_information
+        # shielded so that a cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(self.__start_session_information_fetch(user_context))
 
     async def revoke_session(self, user_context: Union[Any, None] = None) -> None:
         if user_context is None:
             user_context = {}
+        self.__invalidate_session_information()
         if await self.recipe_implementation.revoke_session(self.session_handle, user_context):
             self.remove_cookies = True
 
     async def get_session_data(self, user_context: Union[Dict[str, Any], None] = None) -> Dict[str, Any]:
         if user_context is None:
             user_context = {}
-        session_info = await self.recipe_implementation.get_session_information(self.session_handle, user_context)
-        return session_info.session_data
+        session_info = await self.__get_session_information(user_context)
+        # a copy, since the session information is shared by the calls made with this session
+        return deepcopy(session_info.session_data)
 
     async def update_session_data(self, new_session_data: Dict[str, Any], user_context: Union[Dict[str, Any], None] = None) -> None:
         if user_context is None:
             user_context = {}
-        return await self.recipe_implementation.update_session_data(self.session_handle, new_session_data, user_context)
+        self.__invalidate_session_information()
+        await self.recipe_implementation.update_session_data(self.session_handle, new_session_data, user_context)
+        self.__invalidate_session_information()
 
     async def update_access_token_payload(self, new_access_token_payload: Dict[str, Any], user_context: Union[Dict[str, Any], None] = None) -> None:
         if user_context is None:
             user_context = {}
+        self.__invalidate_session_information()
         response = await self.recipe_implementation.regenerate_access_token(self.access_token, new_access_token_payload, user_context)
+        self.__invalidate_session_information()
         self.access_token_payload = response.session.user_data_in_jwt
         if response.access_token is not None:
             self.access_token = response.access_token.token
-            self.new_access_token_info = {
-                'token': response.access_token.token,
-                'expiry': response.access_token.expiry,
-                'createdTime': response.access_token.created_time
-            }
+            self.new_access_token_info = TokenInfo(response.access_token.token, response.access_token.expiry,
+                                                   response.access_token.created_time)
 
     def get_user_id(self, user_context: Union[Dict[str, Any], None] = None) -> str:
         return self.user_id
@@ -64,11 +123,11 @@ class Session(SessionContainer):
     async def get_time_created(self, user_context: Union[Dict[str, Any], None] = None) -> int:
         if user_context is None:
             user_context = {}
-        result = await self.recipe_implementation.get_session_information(self.session_handle, user_context)
+        result = await self.__get_session_information(user_context)
         return result.time_created
 
     async def get_expiry(self, user_context: Union[Dict[str, Any], None] = None) -> int:
         if user_context is None:
             user_context = {}
-        result = await self.recipe_implementation.get_session_information(self.session_handle, user_context)
+        result = await self.__get_session_information(user_context)
         return result.expiry
@@ -13,18 +13,24 @@
 # under the License.
 from __future__ import annotations
 
-import time
+import asyncio
+from copy import deepcopy
 from typing import TYPE_CHECKING, Any, Dict, List, Union
 
-from supertokens_python.recipe.session.interfaces import \
-    SessionInformationResult
+from supertokens_python.recipe.session.interfaces import (
+    AccessTokenObj, SessionInformationResult, SessionObj,
+    VerifyAccessTokenOkResult)
 
 from .access_token import get_info_from_access_token
+from .constants import MAX_CONCURRENT_VERIFY_CALLS_TO_CORE
 from .jwt import get_payload_without_verifying
+from .refresh_coalescing import get_refresh_coalescing_key
+from .verify_result_cache import get_verify_result_cache_key
 
 if TYPE_CHECKING:
-    from .recipe_implementation import RecipeImplementation
+    from .recipe_implementation import HandshakeInfo, RecipeImplementation
 
+from supertokens_python.exceptions import SuperTokensError
 from supertokens_python.logger import log_debug_message
 from supertokens_python.normalised_url_path import NormalisedURLPath
 from supertokens_python.process_state import AllowedProcessStates, ProcessState
@@ -33,6 +39,15 @@ from .exceptions import (TryRefreshTokenError, raise_token_theft_exception,
                          raise_try_refresh_token_exception,
                          raise_unauthorised_exception)
 
+# the core APIs called on every request are normalised once
+SESSION_PATH = NormalisedURLPath('/recipe/session')
+SESSION_VERIFY_PATH = NormalisedURLPath('/recipe/session/verify')
+SESSION_REFRESH_PATH = NormalisedURLPath('/recipe/session/refresh')
+SESSION_REMOVE_PATH = NormalisedURLPath('/recipe/session/remove')
+SESSION_USER_PATH = NormalisedURLPath('/recipe/session/user')
+SESSION_DATA_PATH = NormalisedURLPath('/recipe/session/data')
+JWT_DATA_PATH = NormalisedURLPath('/recipe/jwt/data')
+
 
 async def create_new_session(recipe_implementation: RecipeImplementation, user_id: str,
                              access_token_payload: Union[None, Dict[str, Any]],
@@ -44,7 +59,7 @@ async def create_new_session(recipe_implementation: RecipeImplementation, user_i
 
     handshake_info = await recipe_implementation.get_handshake_info()
     enable_anti_csrf = handshake_info.anti_csrf == 'VIA_TOKEN'
-    response = await recipe_implementation.querier.send_post_request(NormalisedURLPath('/recipe/session'), {
+    response = await recipe_implementation.querier.send_post_request(SESSION_PATH, {
         'userId': user_id,
         'userDataInJWT': access_token_payload,
         'userDataInDatabase': session_data,
@@ -62,44 +77,105 @@ async def create_new_session(recipe_implementation: RecipeImplementation, user_i
 
 async def get_session(recipe_implementation: RecipeImplementation, access_token: str,
                       anti_csrf_token: Union[str, None],
-                      do_anti_csrf_check: bool, contains_custom_header: bool) -> Dict[str, Any]:
+                      do_anti_csrf_check: bool, contains_custom_header: bool) -> VerifyAccessTokenOkResult:
+    handshake_info = await recipe_implementation.get_handshake_info()
+    result = await get_session_without_calling_core(recipe_implementation, handshake_info, access_token, anti_csrf_token,
+                                                    do_anti_csrf_check, contains_custom_header)
+    if result is not None:
+        return result
+    return await get_session_from_core(recipe_implementation, handshake_info, access_token, anti_csrf_token,
+                                       do_anti_csrf_check)
+
+
+async def verify_access_tokens(recipe_implementation: RecipeImplementation, access_tokens: List[str],
+                               anti_csrf_tokens: List[Union[str, None]],
+                               do_anti_csrf_check: bool,
+                               contains_custom_header: bool) -> List[Union[VerifyAccessTokenOkResult, SuperTokensError]]:
+    """
+    Same as get_session for each of the access tokens, except that the handshake info is fetched
+    once, and that the tokens which can't be verified locally are sent to the core with at most
+    MAX_CONCURRENT_VERIFY_CALLS_TO_CORE calls in flight. Returns one entry per token: the error
+    get_session would have raised for it, if any, else its result.
+    """
     handshake_info = await recipe_implementation.get_handshake_info()
+    results: List[Union[VerifyAccessTokenOkResult, None, SuperTokensError]] = []
+    for result in await asyncio.gather(*[
+            get_session_without_calling_core(recipe_implementation, handshake_info, access_token, anti_csrf_token,
+                                             do_anti_csrf_check, contains_custom_header)
+            for access_token, anti_csrf_token in zip(access_tokens, anti_csrf_tokens)], return_exceptions=True):
+        if isinstance(result, BaseException) and not isinstance(result, SuperTokensError):
+            raise result
+        results.append(result)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_VERIFY_CALLS_TO_CORE)
+
+    async def verify_with_core(index: int):
+        async with semaphore:
+            try:
+                results[index] = await get_session_from_core(recipe_implementation, handshake_info, access_tokens[index],
+                                                             anti_csrf_tokens[index], do_anti_csrf_check)
+            except SuperTokensError as e:
+                results[index] = e
+
+    await asyncio.gather(*[verify_with_core(i) for i, result in enumerate(results) if result is None])
+    # every None has been replaced by the result of the core by now
+    return results  # type: ignore
+
+
+async def get_session_without_calling_core(recipe_implementation: RecipeImplementation, handshake_info: HandshakeInfo,
+                                           access_token: str, anti_csrf_token: Union[str, None],
+                                           do_anti_csrf_check: bool, contains_custom_header: bool) -> Union[VerifyAccessTokenOkResult, None]:
+    """
+    Returns None if the core needs to be called to verify the session
+    """
     access_token_info = None
     found_a_sign_key_that_is_older_than_the_access_token = False
 
-    for key in handshake_info.get_jwt_signing_public_key_list():
-        try:
-            access_token_info = get_info_from_access_token(access_token,
-                                                           key['publicKey'],
-                                                           handshake_info.anti_csrf == 'VIA_TOKEN'
-                                                           and do_anti_csrf_check)
+    if not handshake_info.access_token_blacklisting_enabled:
+        access_token_info = handshake_info.verified_access_token_cache.get(access_token)
+        if access_token_info is not None and access_token_info.anti_csrf_token is None and \
+                handshake_info.anti_csrf == 'VIA_TOKEN' and do_anti_csrf_check:
+            # get_info_from_access_token would have rejected this token, so we go through the normal flow
+            access_token_info = None
+        found_a_sign_key_that_is_older_than_the_access_token = access_token_info is not None
 
+    if access_token_info is None:
+        time_created = None
+        try:
+            payload = get_payload_without_verifying(access_token)
+            if isinstance(payload['timeCreated'], (int, float)) and isinstance(payload['expiryTime'], (int, float)):
+                time_created = payload['timeCreated']
+        except Exception:
+            pass
+
+        if time_created is None:
+            raise_try_refresh_token_exception(
+                'Access token does not contain all the information. Maybe the structure has changed?')
+
+        # only the key that the core was using when the token was created can verify it, so we
+        # do a single signature verification. If the token is older than every key, we can't
+        # verify it at all.
+        key = None if time_created is None else handshake_info.get_jwt_signing_public_key_for(time_created)
+        if key is not None:
             found_a_sign_key_that_is_older_than_the_access_token = True
-
-        except Exception as e:
-            payload = None
-
-            if e.__class__ != TryRefreshTokenError:
-                raise e
-
             try:
-                payload = get_payload_without_verifying(access_token)
-            except BaseException:
-                raise e
-
-            if payload is None:
-                raise e
-
-            if not isinstance(payload['timeCreated'], int) or not isinstance(
-                    payload['expiryTime'], int):
-                raise e
-
-            if payload['expiryTime'] < time.time():
-                raise e
-
-            if payload['timeCreated'] >= key['createdAt']:
-                found_a_sign_key_that_is_older_than_the_access_token = True
-                break
+                verification_executor = recipe_implementation.config.verification_executor
+                do_anti_csrf_check_in_token = handshake_info.anti_csrf == 'VIA_TOKEN' and do_anti_csrf_check
+                if verification_executor is None:
+                    access_token_info = get_info_from_access_token(access_token, key['publicKey'],
+                                                                   do_anti_csrf_check_in_token)
+                else:
+                    access_token_info = await verification_executor.run(
+                        get_info_from_access_token,
+                        access_token,
+                        key['publicKey'],
+                        do_anti_csrf_check_in_token)
+                if not handshake_info.access_token_blacklisting_enabled and \
+                        access_token_info.parent_refresh_token_hash_1 is None:
+                    handshake_info.verified_access_token_cache.set(access_token, access_token_info)
+            except TryRefreshTokenError:
+                # the core decides what to do with tokens that fail verification with the expected key
+                access_token_info = None
 
     if not found_a_sign_key_that_is_older_than_the_access_token:
         raise_try_refresh_token_exception(
@@ -107,8 +183,7 @@ async def get_session(recipe_implementation: RecipeImplementation, access_token:
 
     if handshake_info.anti_csrf == 'VIA_TOKEN' and do_anti_csrf_check:
         if access_token_info is not None:
-            if anti_csrf_token is None or anti_csrf_token != access_token_info[
-                    'antiCsrfToken']:
+            if anti_csrf_token is None or anti_csrf_token != access_token_info.anti_csrf_token:
                 if anti_csrf_token is None:
                     log_debug_message(
                         "getSession: Returning TRY_REFRESH_TOKEN because antiCsrfToken is missing from request"
@@ -128,14 +203,24 @@ async def get_session(recipe_implementation: RecipeImplementation, access_token:
                                               'for this API')
 
     if access_token_info is not None and not handshake_info.access_token_blacklisting_enabled and \
-            access_token_info['parentRefreshTokenHash1'] is None:
-        return {
-            'session': {
-                'handle': access_token_info['sessionHandle'],
-                'userId': access_token_info['userId'],
-                'userDataInJWT': access_token_info['userData']
-            }
-        }
+            access_token_info.parent_refresh_token_hash_1 is None:
+        # a copy, since access_token_info may be in the verified token cache and the payload
+        # of the session can be changed by the caller
+        return VerifyAccessTokenOkResult(SessionObj(access_token_info.session_handle, access_token_info.user_id,  # type: ignore
+                                                    deepcopy(access_token_info.user_data)), None)
+    return None
+
+
+async def get_session_from_core(recipe_implementation: RecipeImplementation, handshake_info: HandshakeInfo,
+                                access_token: str, anti_csrf_token: Union[str, None],
+                                do_anti_csrf_check: bool) -> VerifyAccessTokenOkResult:
+    verify_result_cache = recipe_implementation.config.verify_result_cache
+    cache_key = None
+    if verify_result_cache is not None and handshake_info.access_token_blacklisting_enabled:
+        cache_key = get_verify_result_cache_key(access_token, anti_csrf_token, do_anti_csrf_check)
+        cached_response = await verify_result_cache.get(cache_key)
+        if cached_response is not None:
+            return get_verify_access_token_result(cached_response)
 
     ProcessState.get_instance().add_state(
         AllowedProcessStates.CALLING_SERVICE_IN_VERIFY)
@@ -148,7 +233,7 @@ async def get_session(recipe_implementation: RecipeImplementation, access_token:
     if anti_csrf_token is not None:
         data['antiCsrfToken'] = anti_csrf_token
 
-    response = await recipe_implementation.querier.send_post_request(NormalisedURLPath('/recipe/session/verify'), data)
+    response = await recipe_implementation.querier.send_post_request(SESSION_VERIFY_PATH, data)
     if response['status'] == 'OK':
         recipe_implementation.update_jwt_signing_public_key_info(response['jwtSigningPublicKeyList'], response['jwtSigningPublicKey'],
                                                                  response['jwtSigningPublicKeyExpiryTime'])
@@ -156,7 +241,10 @@ async def get_session(recipe_implementation: RecipeImplementation, access_token:
         response.pop('jwtSigningPublicKey', None)
         response.pop('jwtSigningPublicKeyExpiryTime', None)
         response.pop('jwtSigningPublicKeyList', None)
-        return response
+        # a response with a new access token is only returned once, for the first use of a token after a refresh
+        if verify_result_cache is not None and cache_key is not None and 'accessToken' not in response:
+            await verify_result_cache.set(cache_key, response['session']['handle'], response)
+        return get_verify_access_token_result(response)
     if response['status'] == 'UNAUTHORISED':
         log_debug_message("getSession: Returning UNAUTHORISED because of core response")
         raise_unauthorised_exception(response['message'])
@@ -172,6 +260,15 @@ async def get_session(recipe_implementation: RecipeImplementation, access_token:
     raise_try_refresh_token_exception(response['message'])
 
 
+def get_verify_access_token_result(response: Dict[str, Any]) -> VerifyAccessTokenOkResult:
+    access_token = None
+    if 'accessToken' in response:
+        access_token = AccessTokenObj(response['accessToken']['token'], response['accessToken']['expiry'],
+                                      response['accessToken']['createdTime'])
+    return VerifyAccessTokenOkResult(SessionObj(response['session']['handle'], response['session']['userId'],
+                                                response['session']['userDataInJWT']), access_token)
+
+
 async def refresh_session(recipe_implementation: RecipeImplementation, refresh_token: str,
                           anti_csrf_token: Union[str, None],
                           contains_custom_header: bool):
@@ -188,7 +285,14 @@ async def refresh_session(recipe_implementation: RecipeImplementation, refresh_t
             log_debug_message("refreshSession: Returning UNAUTHORISED because custom header (rid) was not passed")
             raise_unauthorised_exception('anti-csrf check failed. Please pass \'rid: "session"\' header '
                                          'in the request.', False)
-    response = await recipe_implementation.querier.send_post_request(NormalisedURLPath('/recipe/session/refresh'), data)
+
+    async def call_core() -> Dict[str, Any]:
+        return await recipe_implementation.querier.send_post_request(SESSION_REFRESH_PATH, data)
+
+    response = await recipe_implementation.config.refresh_coalescing.refresh(
+        get_refresh_coalescing_key(refresh_token, anti_csrf_token), call_core)
+    # the response may be shared with other refreshes
+    response = deepcopy(response)
     if response['status'] == 'OK':
         response.pop('status', None)
         return response
@@ -203,36 +307,45 @@ async def refresh_session(recipe_implementation: RecipeImplementation, refresh_t
 
 
 async def revoke_all_sessions_for_user(recipe_implementation: RecipeImplementation, user_id: str) -> List[str]:
-    response = await recipe_implementation.querier.send_post_request(NormalisedURLPath('/recipe/session/remove'), {
+    response = await recipe_implementation.querier.send_post_request(SESSION_REMOVE_PATH, {
         'userId': user_id
     })
+    await invalidate_verify_results(recipe_implementation, response['sessionHandlesRevoked'])
     return response['sessionHandlesRevoked']
 
 
 async def get_all_session_handles_for_user(recipe_implementation: RecipeImplementation, user_id: str) -> List[str]:
-    response = await recipe_implementation.querier.send_get_request(NormalisedURLPath('/recipe/session/user'), {
+    response = await recipe_implementation.querier.send_get_request(SESSION_USER_PATH, {
         'userId': user_id
     })
     return response['sessionHandles']
 
 
 async def revoke_session(recipe_implementation: RecipeImplementation, session_handle: str) -> bool:
-    response = await recipe_implementation.querier.send_post_request(NormalisedURLPath('/recipe/session/remove'), {
+    response = await recipe_implementation.querier.send_post_request(SESSION_REMOVE_PATH, {
         'sessionHandles': [session_handle]
     })
+    await invalidate_verify_results(recipe_implementation, [session_handle])
     return len(response['sessionHandlesRevoked']) == 1
 
 
 async def revoke_multiple_sessions(recipe_implementation: RecipeImplementation, session_handles: List[str]) -> List[
         str]:
-    response = await recipe_implementation.querier.send_post_request(NormalisedURLPath('/recipe/session/remove'), {
+    response = await recipe_implementation.querier.send_post_request(SESSION_REMOVE_PATH, {
         'sessionHandles': session_handles
     })
+    await invalidate_verify_results(recipe_implementation, session_handles)
     return response['sessionHandlesRevoked']
 
 
+async def invalidate_verify_results(recipe_implementation: RecipeImplementation, session_handles: List[str]):
+    verify_result_cache = recipe_implementation.config.verify_result_cache
+    if verify_result_cache is not None and len(session_handles) > 0:
+        await verify_result_cache.invalidate_sessions(session_handles)
+
+
 async def update_session_data(recipe_implementation: RecipeImplementation, session_handle: str, new_session_data: Dict[str, Any]):
-    response = await recipe_implementation.querier.send_put_request(NormalisedURLPath('/recipe/session/data'), {
+    response = await recipe_implementation.querier.send_put_request(SESSION_DATA_PATH, {
         'sessionHandle': session_handle,
         'userDataInDatabase': new_session_data
     })
@@ -241,7 +354,7 @@ async def update_session_data(recipe_implementation: RecipeImplementation, sessi
 
 
 async def update_access_token_payload(recipe_implementation: RecipeImplementation, session_handle: str, new_access_token_payload: Dict[str, Any]):
-    response = await recipe_implementation.querier.send_put_request(NormalisedURLPath('/recipe/jwt/data'), {
+    response = await recipe_implementation.querier.send_put_request(JWT_DATA_PATH, {
         'sessionHandle': session_handle,
         'userDataInJWT': new_access_token_payload
     })
@@ -250,7 +363,7 @@ async def update_access_token_payload(recipe_implementation: RecipeImplementatio
 
 
 async def get_session_information(recipe_implementation: RecipeImplementation, session_handle: str) -> SessionInformationResult:
-    response = await recipe_implementation.querier.send_get_request(NormalisedURLPath('/recipe/session'), {
+    response = await recipe_implementation.querier.send_get_request(SESSION_PATH, {
         'sessionHandle': session_handle
     })
     if response['status'] == 'OK':
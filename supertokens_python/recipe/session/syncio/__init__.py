@@ -19,7 +19,8 @@ from supertokens_python.recipe.openid.interfaces import \
     GetOpenIdDiscoveryConfigurationResult
 
 from ...jwt.interfaces import CreateJwtResult, GetJWKSResult
-from ..interfaces import SessionContainer, SessionInformationResult
+from ..interfaces import (SessionContainer, SessionInformationResult,
+                          VerifyAccessTokenResult)
 
 
 def create_new_session(request: Any, user_id: str, access_token_payload: Union[Dict[str, Any], None] = None, session_data: Union[Dict[str, Any], None] = None, user_context: Union[None, Dict[str, Any]] = None) -> SessionContainer:
@@ -36,6 +37,12 @@ def get_session(request: Any, anti_csrf_check: Union[bool, None] = None, session
                 session_required, user_context))
 
 
+def verify_access_tokens(access_tokens: List[str], anti_csrf_check: bool = False, anti_csrf_tokens: Union[List[Union[str, None]], None] = None, contains_custom_header: bool = True, user_context: Union[None, Dict[str, Any]] = None) -> List[VerifyAccessTokenResult]:
+    from supertokens_python.recipe.session.asyncio import \
+        verify_access_tokens as async_verify_access_tokens
+    return sync(async_verify_access_tokens(access_tokens, anti_csrf_check, anti_csrf_tokens, contains_custom_header, user_context))
+
+
 def refresh_session(request: Any, user_context: Union[None, Dict[str, Any]] = None) -> SessionContainer:
     from supertokens_python.recipe.session.asyncio import \
         refresh_session as async_refresh_session
@@ -19,19 +19,23 @@ from urllib.parse import urlparse
 from supertokens_python.exceptions import raise_general_exception
 from supertokens_python.framework import BaseResponse
 from supertokens_python.normalised_url_path import NormalisedURLPath
-from supertokens_python.recipe.openid import \
-    InputOverrideConfig as OpenIdInputOverrideConfig
 from supertokens_python.utils import is_an_ip_address, send_non_200_response
-from tldextract import extract  # type: ignore
 from typing_extensions import Literal
 
 from .constants import SESSION_REFRESH
 from .cookie_and_header import clear_cookies
+from .refresh_coalescing import (InProcessRefreshCoalescing,
+                                 RefreshCoalescingBackend)
+from .verification_executor import VerificationExecutor
+from .handshake_info_store import HandshakeInfoStore
+from .verify_result_cache import VerifyResultCache
 from .with_jwt.constants import (ACCESS_TOKEN_PAYLOAD_JWT_PROPERTY_NAME_KEY,
                                  JWT_RESERVED_KEY_USE_ERROR_MESSAGE)
 
 if TYPE_CHECKING:
     from supertokens_python.framework import BaseRequest
+    from supertokens_python.recipe.openid import \
+        InputOverrideConfig as OpenIdInputOverrideConfig
     from supertokens_python.supertokens import AppInfo
 
     from .interfaces import APIInterface, RecipeInterface
@@ -98,6 +102,8 @@ def get_top_level_domain_for_same_site_resolution(url: str) -> str:
 
     if hostname.startswith('localhost') or is_an_ip_address(hostname):
         return 'localhost'
+    # tldextract loads the public suffix list, so it is only imported once a domain needs it
+    from tldextract import extract  # type: ignore
     parsed_url: Any = extract(hostname)
     if parsed_url.domain == '':  # type: ignore
         raise Exception(
@@ -223,7 +229,11 @@ class SessionConfig:
                  override: OverrideConfig,
                  framework: str,
                  mode: str,
-                 jwt: JWTConfig
+                 jwt: JWTConfig,
+                 verification_executor: Union[VerificationExecutor, None],
+                 refresh_coalescing: RefreshCoalescingBackend,
+                 verify_result_cache: Union[VerifyResultCache, None],
+                 handshake_info_store: Union[HandshakeInfoStore, None]
                  ):
         self.refresh_token_path = refresh_token_path
         self.cookie_domain = cookie_domain
@@ -236,6 +246,10 @@ class SessionConfig:
         self.framework = framework
         self.mode = mode
         self.jwt = jwt
+        self.verification_executor = verification_executor
+        self.refresh_coalescing = refresh_coalescing
+        self.verify_result_cache = verify_result_cache
+        self.handshake_info_store = handshake_info_store
 
 
 def validate_and_normalise_user_input(app_info: AppInfo,
@@ -251,7 +265,11 @@ def validate_and_normalise_user_input(app_info: AppInfo,
                                                             None] = None,
                                       override: Union[InputOverrideConfig,
                                                       None] = None,
-                                      jwt: Union[JWTConfig, None] = None
+                                      jwt: Union[JWTConfig, None] = None,
+                                      verification_executor: Union[VerificationExecutor, None] = None,
+                                      refresh_coalescing: Union[RefreshCoalescingBackend, None] = None,
+                                      verify_result_cache: Union[VerifyResultCache, None] = None,
+                                      handshake_info_store: Union[HandshakeInfoStore, None] = None
                                       ):
     cookie_domain = normalise_session_scope(
         cookie_domain) if cookie_domain is not None else None
@@ -295,6 +313,9 @@ def validate_and_normalise_user_input(app_info: AppInfo,
     if jwt is None:
         jwt = JWTConfig(False)
 
+    if refresh_coalescing is None:
+        refresh_coalescing = InProcessRefreshCoalescing()
+
     return SessionConfig(
         app_info.api_base_path.append(NormalisedURLPath(SESSION_REFRESH)),
         cookie_domain,
@@ -306,5 +327,9 @@ def validate_and_normalise_user_input(app_info: AppInfo,
         OverrideConfig(override.functions, override.apis),
         app_info.framework,
         app_info.mode,
-        jwt
+        jwt,
+        verification_executor,
+        refresh_coalescing,
+        verify_result_cache,
+        handshake_info_store
     )
@@ -0,0 +1,171 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Union
+from weakref import WeakKeyDictionary
+
+from supertokens_python.exceptions import raise_general_exception
+from typing_extensions import Literal
+
+_T = TypeVar("_T")
+
+DEFAULT_MAX_BATCH_SIZE = 32
+
+# (function, args, time at which it was queued)
+_Job = Tuple[Callable[..., Any], Tuple[Any, ...], float]
+# (result, error, time the job waited before it started)
+_JobResult = Tuple[Any, Union[BaseException, None], float]
+
+
+def _run_batch(jobs: List[_Job]) -> List[_JobResult]:
+    # the exceptions are returned instead of raised so that one failed
+    # verification doesn't fail the whole batch
+    started_at = time()
+    results: List[_JobResult] = []
+    for func, args, queued_at in jobs:
+        try:
+            results.append((func(*args), None, started_at - queued_at))
+        except Exception as e:
+            results.append((None, e, started_at - queued_at))
+    return results
+
+
+class VerificationExecutor:
+    """
+    Runs the access token signature verifications, when one is passed to session.init
+    (without one, they run right away on the calling thread). The verifications queued
+    during one iteration of the event loop are run in batches of max_batch_size.
+
+    In 'inline' mode the batches run on the event loop, which runs its other callbacks
+    between two batches. In 'thread' mode they run on a thread pool, so that the RSA
+    operations don't block the event loop. pycryptodome releases the GIL while it does them,
+    so on a host with more than one CPU they run in parallel with the loop.
+    """
+
+    def __init__(self, mode: Literal['inline', 'thread'] = 'inline',
+                 max_workers: Union[int, None] = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        if mode not in ('inline', 'thread'):
+            raise_general_exception('mode must be either "inline" or "thread"')
+        if max_batch_size < 1:
+            raise_general_exception('max_batch_size must be at least 1')
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_batch_size = max_batch_size
+        self.__executor: Union[ThreadPoolExecutor, None] = None
+        self.__pending: WeakKeyDictionary[asyncio.AbstractEventLoop,
+                                          List[Tuple[_Job, asyncio.Future[Any]]]] = WeakKeyDictionary()
+        self.__lock = Lock()
+        self.__queue_depth = 0
+        self.__max_queue_depth = 0
+        self.__no_of_batches = 0
+        self.__no_of_jobs = 0
+        self.__total_wait_ms = 0.0
+        self.__max_wait_ms = 0.0
+
+    async def run(self, func: Callable[..., _T], *args: Any) -> _T:
+        loop = asyncio.get_event_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        pending = self.__pending.get(loop)
+        if pending is None:
+            pending = []
+            self.__pending[loop] = pending
+            loop.call_soon(self.__flush, loop)
+        pending.append(((func, args, time()), future))
+        with self.__lock:
+            self.__queue_depth += 1
+            self.__max_queue_depth = max(self.__max_queue_depth, self.__queue_depth)
+        return await future
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.__lock:
+            return {
+                'mode': self.mode,
+                'queueDepth': self.__queue_depth,
+                'maxQueueDepth': self.__max_queue_depth,
+                'batches': self.__no_of_batches,
+                'verifications': self.__no_of_jobs,
+                'averageWaitMs': self.__total_wait_ms / self.__no_of_jobs if self.__no_of_jobs > 0 else 0.0,
+                'maxWaitMs': self.__max_wait_ms
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self.__lock:
+            executor = self.__executor
+            self.__executor = None
+        if executor is not None:
+            executor.shutdown(wait)
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(self.max_workers, 'supertokens-verification')
+            return self.__executor
+
+    def __flush(self, loop: asyncio.AbstractEventLoop):
+        pending = self.__pending.pop(loop, [])
+        if self.mode == 'inline':
+            if len(pending) > self.max_batch_size:
+                # verifications queued from now on join the rest of this queue
+                self.__pending[loop] = pending[self.max_batch_size:]
+                loop.call_soon(self.__flush, loop)
+            batch = pending[:self.max_batch_size]
+            self.__on_batch_done(batch, _run_batch([job for job, _ in batch]), None)
+            return
+
+        executor = self.__get_executor()
+        for i in range(0, len(pending), self.max_batch_size):
+            batch = pending[i:i + self.max_batch_size]
+            try:
+                result = executor.submit(_run_batch, [job for job, _ in batch])
+            except Exception as e:
+                self.__on_batch_done(batch, None, e)
+                continue
+            result.add_done_callback(
+                lambda r, batch=batch: loop.call_soon_threadsafe(self.__on_pool_batch_done, batch, r))
+
+    def __on_pool_batch_done(self, batch: List[Tuple[_Job, asyncio.Future[Any]]], result: Future[List[_JobResult]]):
+        if result.cancelled():
+            self.__on_batch_done(batch, None, Exception('verification was cancelled'))
+        elif result.exception() is not None:
+            self.__on_batch_done(batch, None, result.exception())
+        else:
+            self.__on_batch_done(batch, result.result(), None)
+
+    def __on_batch_done(self, batch: List[Tuple[_Job, asyncio.Future[Any]]],
+                        results: Union[List[_JobResult], None], error: Union[BaseException, None]):
+        with self.__lock:
+            self.__no_of_batches += 1
+            self.__queue_depth -= len(batch)
+            if results is not None:
+                for _, _, wait in results:
+                    self.__no_of_jobs += 1
+                    self.__total_wait_ms += wait * 1000
+                    self.__max_wait_ms = max(self.__max_wait_ms, wait * 1000)
+
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                # the caller was cancelled
+                continue
+            if results is None:
+                future.set_exception(error if error is not None else Exception('verification failed'))
+            elif results[i][1] is not None:
+                future.set_exception(results[i][1])
+            else:
+                future.set_result(results[i][0])
@@ -0,0 +1,111 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from hashlib import sha256
+from threading import Lock
+from typing import Any, Dict, List, Set, Tuple, Union
+
+from supertokens_python.exceptions import raise_general_exception
+from supertokens_python.utils import get_timestamp_ms
+
+DEFAULT_MAX_STALENESS_MS = 1000
+DEFAULT_MAX_SIZE = 10000
+
+
+def get_verify_result_cache_key(access_token: str, anti_csrf_token: Union[str, None],
+                                do_anti_csrf_check: bool) -> str:
+    # the core's answer depends on the anti-csrf token and check too
+    return sha256((access_token + ':' + (anti_csrf_token or '') + ':' + str(do_anti_csrf_check))
+                  .encode('utf-8')).hexdigest()
+
+
+class VerifyResultCache(ABC):
+    """
+    Caches the successful responses of the core to /recipe/session/verify, which get_session
+    calls for every request when access token blacklisting is enabled. A revoked session
+    may therefore be accepted for as long as its responses are cached, unless it was revoked
+    through this process, which removes them right away.
+
+    Keys are hashes of the access token (and anti-csrf token) and responses are JSON
+    serialisable dicts, so a backend can keep them in a store shared by several processes.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Union[Dict[str, Any], None]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, session_handle: str, response: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def invalidate_sessions(self, session_handles: List[str]) -> None:
+        pass
+
+
+class InMemoryVerifyResultCache(VerifyResultCache):
+    def __init__(self, max_staleness_ms: int = DEFAULT_MAX_STALENESS_MS, max_size: int = DEFAULT_MAX_SIZE):
+        if max_staleness_ms <= 0:
+            raise_general_exception('max_staleness_ms must be greater than 0')
+        if max_size <= 0:
+            raise_general_exception('max_size must be greater than 0')
+        self.max_staleness_ms = max_staleness_ms
+        self.max_size = max_size
+        self.__lock = Lock()
+        # key -> (expires at, session handle, response). In the order they were added
+        self.__entries: Dict[str, Tuple[int, str, Dict[str, Any]]] = {}
+        self.__keys_by_session_handle: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Union[Dict[str, Any], None]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= get_timestamp_ms():
+                self.__remove(key)
+                return None
+            # a copy, since the caller builds a session out of it
+            return deepcopy(entry[2])
+
+    async def set(self, key: str, session_handle: str, response: Dict[str, Any]) -> None:
+        response = deepcopy(response)
+        now = get_timestamp_ms()
+        with self.__lock:
+            self.__remove(key)
+            if len(self.__entries) >= self.max_size:
+                for expired_key in [k for k, e in self.__entries.items() if e[0] <= now]:
+                    self.__remove(expired_key)
+            while len(self.__entries) >= self.max_size:
+                self.__remove(next(iter(self.__entries)))
+            self.__entries[key] = (now + self.max_staleness_ms, session_handle, response)
+            self.__keys_by_session_handle.setdefault(session_handle, set()).add(key)
+
+    async def invalidate_sessions(self, session_handles: List[str]) -> None:
+        with self.__lock:
+            for session_handle in session_handles:
+                for key in list(self.__keys_by_session_handle.get(session_handle, ())):
+                    self.__remove(key)
+
+    def __remove(self, key: str):
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self.__keys_by_session_handle.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if len(keys) == 0:
+                del self.__keys_by_session_handle[entry[1]]
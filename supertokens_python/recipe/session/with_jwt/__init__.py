@@ -14,5 +14,17 @@
 
 from __future__ import annotations
 
-from .recipe_implementation import \
-    get_recipe_implementation_with_jwt  # type: ignore
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .recipe_implementation import \
+        get_recipe_implementation_with_jwt  # type: ignore
+
+
+def __getattr__(name: str) -> Any:
+    # the jwt and openid recipes are only imported if jwt is enabled, which is
+    # when the session recipe gets the recipe implementation from here
+    if name == 'get_recipe_implementation_with_jwt':
+        from .recipe_implementation import get_recipe_implementation_with_jwt
+        return get_recipe_implementation_with_jwt
+    raise AttributeError(name)
@@ -28,7 +28,6 @@ from supertokens_python.recipe.thirdparty.constants import \
 from supertokens_python.recipe.thirdparty.provider import Provider
 from supertokens_python.recipe.thirdparty.types import (
     AccessTokenAPI, AuthorisationRedirectAPI, UserInfo, UserInfoEmail)
-from supertokens_python.supertokens import Supertokens
 
 if TYPE_CHECKING:
     from supertokens_python.framework.request import BaseRequest
@@ -117,6 +116,7 @@ class Apple(Provider):
         return AccessTokenAPI(self.access_token_api_url, params)
 
     def get_redirect_uri(self, user_context: Dict[str, Any]) -> Union[None, str]:
+        from supertokens_python.supertokens import Supertokens
         app_info = Supertokens.get_instance().app_info
         redirect_uri = app_info.api_domain.get_as_string_dangerous()
         redirect_uri += app_info.api_base_path.get_as_string_dangerous()
@@ -16,6 +16,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Dict, List, Union
 
 from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.user_cache import get_user_through_cache
 
 if TYPE_CHECKING:
     from supertokens_python.querier import Querier
@@ -32,57 +33,72 @@ class RecipeImplementation(RecipeInterface):
         self.querier = querier
 
     async def get_user_by_id(self, user_id: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        params = {
-            'userId': user_id
-        }
-        response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
-        if 'status' in response and response['status'] == 'OK':
-            return User(
-                response['user']['id'],
-                response['user']['email'],
-                response['user']['timeJoined'],
-                ThirdPartyInfo(
-                    response['user']['thirdParty']['userId'],
-                    response['user']['thirdParty']['id']
+        async def fetch():
+            params = {
+                'userId': user_id
+            }
+            response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
+            if 'status' in response and response['status'] == 'OK':
+                return User(
+                    response['user']['id'],
+                    response['user']['email'],
+                    response['user']['timeJoined'],
+                    ThirdPartyInfo(
+                        response['user']['thirdParty']['userId'],
+                        response['user']['thirdParty']['id']
+                    )
                 )
-            )
-        return None
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(), 'thirdparty:userId:' + user_id,
+                                            fetch, lambda user: [user.user_id])
 
     async def get_users_by_email(self, email: str, user_context: Dict[str, Any]) -> List[User]:
-        response = await self.querier.send_get_request(NormalisedURLPath('/recipe/users/by-email'), {'email': email})
-        users: List[User] = []
-        users_list: List[Dict[str, Any]] = response['users'] if 'users' in response else []
-        for user in users_list:
-            users.append(
-                User(
-                    user['id'],
-                    user['email'],
-                    user['timeJoined'],
-                    ThirdPartyInfo(
-                        user['thirdParty']['userId'],
-                        user['thirdParty']['id']
+        async def fetch() -> Union[List[User], None]:
+            response = await self.querier.send_get_request(NormalisedURLPath('/recipe/users/by-email'), {'email': email})
+            users: List[User] = []
+            users_list: List[Dict[str, Any]] = response['users'] if 'users' in response else []
+            for user in users_list:
+                users.append(
+                    User(
+                        user['id'],
+                        user['email'],
+                        user['timeJoined'],
+                        ThirdPartyInfo(
+                            user['thirdParty']['userId'],
+                            user['thirdParty']['id']
+                        )
                     )
                 )
-            )
-        return users
+            # we return None instead of an empty list so that it's not cached
+            return users if len(users) > 0 else None
+
+        users = await get_user_through_cache(self.querier.get_user_cache(), 'thirdparty:usersByEmail:' + email,
+                                             fetch, lambda users: [user.user_id for user in users])
+        return users if users is not None else []
 
     async def get_user_by_thirdparty_info(self, third_party_id: str, third_party_user_id: str, user_context: Dict[str, Any]) -> Union[User, None]:
-        params = {
-            'thirdPartyId': third_party_id,
-            'thirdPartyUserId': third_party_user_id
-        }
-        response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
-        if 'status' in response and response['status'] == 'OK':
-            return User(
-                response['user']['id'],
-                response['user']['email'],
-                response['user']['timeJoined'],
-                ThirdPartyInfo(
-                    response['user']['thirdParty']['userId'],
-                    response['user']['thirdParty']['id']
+        async def fetch():
+            params = {
+                'thirdPartyId': third_party_id,
+                'thirdPartyUserId': third_party_user_id
+            }
+            response = await self.querier.send_get_request(NormalisedURLPath('/recipe/user'), params)
+            if 'status' in response and response['status'] == 'OK':
+                return User(
+                    response['user']['id'],
+                    response['user']['email'],
+                    response['user']['timeJoined'],
+                    ThirdPartyInfo(
+                        response['user']['thirdParty']['userId'],
+                        response['user']['thirdParty']['id']
+                    )
                 )
-            )
-        return None
+            return None
+
+        return await get_user_through_cache(self.querier.get_user_cache(),
+                                            'thirdparty:thirdPartyInfo:' + third_party_id + ':' + third_party_user_id,
+                                            fetch, lambda user: [user.user_id])
 
     async def sign_in_up(self, third_party_id: str, third_party_user_id: str, email: str,
                          email_verified: bool, user_context: Dict[str, Any]) -> SignInUpResult:
@@ -95,6 +111,11 @@ class RecipeImplementation(RecipeInterface):
             }
         }
         response = await self.querier.send_post_request(NormalisedURLPath('/recipe/signinup'), data)
+        user_cache = self.querier.get_user_cache()
+        if user_cache is not None:
+            # sign in up may have created the user or updated their email
+            user_cache.invalidate_user(response['user']['id'])
+            user_cache.invalidate_key('thirdparty:usersByEmail:' + email)
         return SignInUpOkResult(
             User(
                 response['user']['id'],
@@ -70,6 +70,12 @@ class RecipeModule(abc.ABC):
     def get_all_cors_headers(self) -> List[str]:
         pass
 
+    async def warmup(self):
+        """
+        Called in the background after init. Recipes can load here what they would otherwise
+        fetch from the core while handling the first requests.
+        """
+
 
 class APIHandled:
     def __init__(self, path_without_api_base_path: NormalisedURLPath,
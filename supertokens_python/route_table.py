@@ -0,0 +1,91 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+
+from .normalised_url_path import NormalisedURLPath
+
+if TYPE_CHECKING:
+    from .recipe_module import RecipeModule
+    from .supertokens import AppInfo
+
+
+class RouteTable:
+    """
+    The APIs handled by the recipes, compiled once at init so that the middleware can
+    match a request with dict lookups instead of asking every recipe.
+    """
+
+    def __init__(self, app_info: AppInfo, recipe_modules: List[RecipeModule]):
+        self.__api_gateway_path = app_info.api_gateway_path
+        self.__recipes_by_id: Dict[str, RecipeModule] = {}
+        # (path, method) -> first recipe (in the order of recipe_list) handling it
+        self.__routes: Dict[Tuple[str, str], Tuple[RecipeModule, str]] = {}
+        # (recipe id, path, method) -> request id
+        self.__routes_by_rid: Dict[Tuple[str, str, str], str] = {}
+        # request path as sent by the client (when already normalised) -> full normalised path
+        self.__paths: Dict[str, NormalisedURLPath] = {}
+
+        gateway_path = self.__api_gateway_path.get_as_string_dangerous()
+        # the api base path relative to the gateway path, which is what the request path starts with
+        self.__request_api_base_path = app_info.api_base_path.get_as_string_dangerous()[len(gateway_path):]
+        for recipe in recipe_modules:
+            recipe_id = recipe.get_recipe_id()
+            self.__recipes_by_id.setdefault(recipe_id, recipe)
+            for api in recipe.get_apis_handled():
+                if api.disabled:
+                    continue
+                path = app_info.api_base_path.append(api.path_without_api_base_path)
+                path_str = path.get_as_string_dangerous()
+                self.__routes.setdefault((path_str, api.method), (recipe, api.request_id))
+                self.__routes_by_rid.setdefault((recipe_id, path_str, api.method), api.request_id)
+                if path_str.startswith(gateway_path) and len(path_str) > len(gateway_path):
+                    self.__paths[path_str[len(gateway_path):]] = path
+
+    def is_outside_api_base_path(self, request_path: str) -> bool:
+        """
+        Cheap check on the raw request path that the framework middlewares do before wrapping
+        the request. It only returns True if the normalised path can't start with the api base path,
+        which is the case when the raw path doesn't: normalising a path that starts with a '/' only
+        lower cases it and cuts it short.
+        """
+        base_path = self.__request_api_base_path
+        if base_path == '' or not request_path.startswith('/'):
+            return False
+        return request_path[:len(base_path)].lower() != base_path
+
+    def get_path(self, request_path: str) -> NormalisedURLPath:
+        path = self.__paths.get(request_path)
+        if path is not None:
+            return path
+        return self.__api_gateway_path.append(NormalisedURLPath(request_path))
+
+    def match(self, path: NormalisedURLPath, method: str,
+              rid: Union[str, None]) -> Tuple[Union[RecipeModule, None], Union[str, None]]:
+        """
+        Returns the recipe that should handle the request and the id of the API. If a rid is
+        given, only the recipe with that id is considered, and the API id may be None if the
+        recipe doesn't handle this path and method.
+        """
+        path_str = path.get_as_string_dangerous()
+        if rid is not None:
+            recipe = self.__recipes_by_id.get(rid)
+            if recipe is None:
+                return None, None
+            return recipe, self.__routes_by_rid.get((rid, path_str, method))
+        route = self.__routes.get((path_str, method))
+        if route is None:
+            return None, None
+        return route
@@ -14,13 +14,17 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Callable, List, Set, Union
+from typing import (TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Set,
+                    Union)
 
 from typing_extensions import Literal
 
-from supertokens_python.logger import get_maybe_none_as_str, log_debug_message
+from supertokens_python.async_to_sync_wrapper import use_background_event_loop
+from supertokens_python.logger import LazyLogArg, log_debug_message
 
-from .constants import (FDI_KEY_HEADER, RID_KEY_HEADER, TELEMETRY,
+from .constants import (DEFAULT_KEEPALIVE_EXPIRY, DEFAULT_MAX_CONNECTIONS,
+                        DEFAULT_MAX_KEEPALIVE_CONNECTIONS, FDI_KEY_HEADER,
+                        RID_KEY_HEADER, TELEMETRY,
                         TELEMETRY_SUPERTOKENS_API_URL,
                         TELEMETRY_SUPERTOKENS_API_VERSION, USER_COUNT,
                         USER_DELETE, USERS)
@@ -28,34 +32,58 @@ from .exceptions import SuperTokensError
 from .normalised_url_domain import NormalisedURLDomain
 from .normalised_url_path import NormalisedURLPath
 from .querier import Querier
-from .recipe.session.cookie_and_header import (
-    attach_access_token_to_cookie, attach_anti_csrf_header,
-    attach_id_refresh_token_to_cookie_and_header,
-    attach_refresh_token_to_cookie, clear_cookies, set_front_token_in_headers)
+from .route_table import RouteTable
+from .warmup import Warmup
 from .types import ThirdPartyInfo, User, UsersResponse
 from .utils import (compare_version, get_rid_from_request,
                     normalise_http_method, send_non_200_response)
 
 if TYPE_CHECKING:
     from .recipe_module import RecipeModule
+    from .user_cache import UserCache
     from supertokens_python.framework.request import BaseRequest
     from supertokens_python.framework.response import BaseResponse
     from supertokens_python.recipe.session import SessionContainer
 
-import asyncio
 import json
 from os import environ
 
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits
 
 from .exceptions import BadInputError, GeneralError, raise_general_exception
-from .recipe.session import SessionRecipe
 
 
 class SupertokensConfig:
-    def __init__(self, connection_uri: str, api_key: Union[str, None] = None):  # We keep this = None here because this is directly used by the user.
+    def __init__(self, connection_uri: str, api_key: Union[str, None] = None,  # We keep this = None here because this is directly used by the user.
+                 max_connections: Union[int, None] = None,
+                 max_keepalive_connections: Union[int, None] = None,
+                 keepalive_expiry: Union[float, None] = None,
+                 http2: bool = False,
+                 coalesce_get_requests: bool = False,
+                 user_cache: Union[UserCache, None] = None):
         self.connection_uri = connection_uri
         self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        if http2:
+            try:
+                import h2  # type: ignore # pylint: disable=import-outside-toplevel,unused-import
+            except ImportError:
+                raise_general_exception('http2 needs the h2 package. Install it with: '
+                                        'pip install supertokens_python[http2]')
+        self.http2 = http2
+        self.coalesce_get_requests = coalesce_get_requests
+        self.user_cache = user_cache
+
+    def get_pool_limits(self) -> Union[Limits, None]:
+        if self.max_connections is None and self.max_keepalive_connections is None and self.keepalive_expiry is None:
+            return None
+        return Limits(
+            max_connections=self.max_connections if self.max_connections is not None else DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections=self.max_keepalive_connections if self.max_keepalive_connections is not None else DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=self.keepalive_expiry if self.keepalive_expiry is not None else DEFAULT_KEEPALIVE_EXPIRY
+        )
 
 
 class Host:
@@ -116,11 +144,17 @@ class AppInfo:
 
 
 def manage_cookies_post_response(session: SessionContainer, response: BaseResponse):
+    from .recipe.session import SessionRecipe
+    from .recipe.session.cookie_and_header import (
+        attach_access_token_to_cookie, attach_anti_csrf_header,
+        attach_id_refresh_token_to_cookie_and_header,
+        attach_refresh_token_to_cookie, clear_cookies,
+        set_front_token_in_headers)
     recipe = SessionRecipe.get_instance()
-    if session['remove_cookies']:
+    if session.remove_cookies:
         clear_cookies(recipe, response)
     else:
-        access_token = session['new_access_token_info']
+        access_token = session.new_access_token_info
         if access_token is not None:
             attach_access_token_to_cookie(
                 recipe,
@@ -130,11 +164,11 @@ def manage_cookies_post_response(session: SessionContainer, response: BaseRespon
             )
             set_front_token_in_headers(
                 response,
-                session['user_id'],
+                session.user_id,
                 access_token['expiry'],
-                session['access_token_payload']
+                session.access_token_payload
             )
-        refresh_token = session['new_refresh_token_info']
+        refresh_token = session.new_refresh_token_info
         if refresh_token is not None:
             attach_refresh_token_to_cookie(
                 recipe,
@@ -142,7 +176,7 @@ def manage_cookies_post_response(session: SessionContainer, response: BaseRespon
                 refresh_token['token'],
                 refresh_token['expiry']
             )
-        id_refresh_token = session['new_id_refresh_token_info']
+        id_refresh_token = session.new_id_refresh_token_info
         if id_refresh_token is not None:
             attach_id_refresh_token_to_cookie_and_header(
                 recipe,
@@ -150,11 +184,19 @@ def manage_cookies_post_response(session: SessionContainer, response: BaseRespon
                 id_refresh_token['token'],
                 id_refresh_token['expiry']
             )
-        anti_csrf_token = session['new_anti_csrf_token']
+        anti_csrf_token = session.new_anti_csrf_token
         if anti_csrf_token is not None:
             attach_anti_csrf_header(response, anti_csrf_token)
 
 
+class MatchedAPI:
+    def __init__(self, recipe: RecipeModule, request_id: str, path: NormalisedURLPath, method: str):
+        self.recipe = recipe
+        self.request_id = request_id
+        self.path = path
+        self.method = method
+
+
 class Supertokens:
     __instance = None
 
@@ -164,7 +206,9 @@ class Supertokens:
                  supertokens_config: SupertokensConfig,
                  recipe_list: List[Callable[[AppInfo], RecipeModule]],
                  mode: Union[Literal['asgi', 'wsgi'], None],
-                 telemetry: Union[bool, None]
+                 telemetry: Union[bool, None],
+                 background_event_loop: bool = False,
+                 warmup: Union[bool, None] = None
                  ):
         self.app_info = AppInfo(
             app_info.app_name,
@@ -177,11 +221,17 @@ class Supertokens:
             mode
         )
         log_debug_message("Started SuperTokens with debug logging (supertokens.init called)")
-        log_debug_message("app_info: %s", self.app_info.toJSON())
+        log_debug_message("app_info: %s", LazyLogArg(self.app_info.toJSON))
         log_debug_message("framework: %s", framework)
+        if background_event_loop:
+            if self.app_info.mode != 'wsgi':
+                raise_general_exception('background_event_loop can only be used in wsgi mode')
+            use_background_event_loop()
         hosts = list(map(lambda h: Host(NormalisedURLDomain(h.strip()), NormalisedURLPath(h.strip())),
                          filter(lambda x: x != '', supertokens_config.connection_uri.split(';'))))
-        Querier.init(hosts, supertokens_config.api_key)
+        Querier.init(hosts, supertokens_config.api_key, supertokens_config.get_pool_limits(),
+                     supertokens_config.http2, supertokens_config.coalesce_get_requests,
+                     supertokens_config.user_cache)
 
         if len(recipe_list) == 0:
             raise_general_exception(
@@ -189,18 +239,25 @@ class Supertokens:
 
         self.recipe_modules: List[RecipeModule] = list(
             map(lambda func: func(self.app_info), recipe_list))
+        self.route_table = RouteTable(self.app_info, self.recipe_modules)
 
         if telemetry is None:
             telemetry = ('SUPERTOKENS_ENV' not in environ) or (
                 environ['SUPERTOKENS_ENV'] != 'testing')
 
-        if telemetry:
-            if self.app_info.framework.lower(
-            ) == 'flask' or self.app_info.framework.lower() == 'django':
-                loop = asyncio.get_event_loop()
-                loop.run_until_complete(self.send_telemetry())
-            else:
-                asyncio.create_task(self.send_telemetry())
+        if warmup is None:
+            # tests check which calls to the core a request makes, which a warmup running
+            # alongside would make racy
+            warmup = ('SUPERTOKENS_ENV' not in environ) or (
+                environ['SUPERTOKENS_ENV'] != 'testing')
+
+        warmup_tasks: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        if warmup:
+            warmup_tasks['apiVersion'] = Querier.get_instance(None).get_api_version
+            for recipe in self.recipe_modules:
+                warmup_tasks[recipe.get_recipe_id()] = recipe.warmup
+        self.warmup = Warmup(warmup_tasks, [self.send_telemetry] if telemetry else [])
+        self.warmup.start()
 
     async def send_telemetry(self):
         try:
@@ -231,10 +288,12 @@ class Supertokens:
              supertokens_config: SupertokensConfig,
              recipe_list: List[Callable[[AppInfo], RecipeModule]],
              mode: Union[Literal['asgi', 'wsgi'], None],
-             telemetry: Union[bool, None]):
+             telemetry: Union[bool, None],
+             background_event_loop: bool = False,
+             warmup: Union[bool, None] = None):
         if Supertokens.__instance is None:
             Supertokens.__instance = Supertokens(
-                app_info, framework, supertokens_config, recipe_list, mode, telemetry)
+                app_info, framework, supertokens_config, recipe_list, mode, telemetry, background_event_loop, warmup)
 
     @staticmethod
     def reset():
@@ -243,6 +302,7 @@ class Supertokens:
             raise_general_exception(
                 'calling testing function in non testing env')
         Querier.reset()
+        use_background_event_loop(False)
         Supertokens.__instance = None
 
     @staticmethod
@@ -285,6 +345,10 @@ class Supertokens:
                 "userId": user_id
             })
 
+            user_cache = querier.get_user_cache()
+            if user_cache is not None:
+                user_cache.invalidate_user(user_id)
+
             return None
         raise_general_exception(
             'Please upgrade the SuperTokens core to >= 3.7.0')
@@ -341,44 +405,33 @@ class Supertokens:
 
         return UsersResponse(users, next_pagination_token)
 
-    async def middleware(self, request: BaseRequest, response: BaseResponse) -> Union[BaseResponse, None]:  # pylint: disable=no-self-use
+    async def middleware(self, request: BaseRequest, response: BaseResponse) -> Union[BaseResponse, None]:
         log_debug_message("middleware: Started")
-        path = Supertokens.get_instance().app_info.api_gateway_path.append(
-            NormalisedURLPath(
-                request.get_path()))
+        matched_api = self.match_request(request)
+        if matched_api is None:
+            return None
+        return await self.handle_matched_request(matched_api, request, response)
+
+    def match_request(self, request: BaseRequest) -> Union[MatchedAPI, None]:
+        """
+        Finds the API that should handle the request without doing any IO, so that sync
+        middlewares can decide whether they need to run SuperTokens at all.
+        """
+        path = self.route_table.get_path(request.get_path())
         method = normalise_http_method(request.method())
 
-        if not path.startswith(
-                Supertokens.get_instance().app_info.api_base_path):
+        if not path.startswith(self.app_info.api_base_path):
             log_debug_message(
                 "middleware: Not handling because request path did not start with config path. Request path: %s", path.get_as_string_dangerous()
             )
             return None
         request_rid = get_rid_from_request(request)
-        log_debug_message("middleware: requestRID is: %s", get_maybe_none_as_str(request_rid))
+        log_debug_message("middleware: requestRID is: %s", request_rid)
         if request_rid is not None and request_rid == 'anti-csrf':
             # see
             # https://github.com/supertokens/supertokens-python/issues/54
             request_rid = None
-        request_id = None
-        matched_recipe = None
-        if request_rid is not None:
-            for recipe in Supertokens.get_instance().recipe_modules:
-                log_debug_message("middleware: Checking recipe ID for match: %s", recipe.get_recipe_id())
-                if recipe.get_recipe_id() == request_rid:
-                    matched_recipe = recipe
-                    break
-            if matched_recipe is not None:
-                request_id = matched_recipe.return_api_id_if_can_handle_request(
-                    path, method)
-        else:
-            for recipe in Supertokens.get_instance().recipe_modules:
-                log_debug_message("middleware: Checking recipe ID for match: %s", recipe.get_recipe_id())
-                request_id = recipe.return_api_id_if_can_handle_request(
-                    path, method)
-                if request_id is not None:
-                    matched_recipe = recipe
-                    break
+        matched_recipe, request_id = self.route_table.match(path, method, request_rid)
         if matched_recipe is not None:
             log_debug_message("middleware: Matched with recipe ID: %s", matched_recipe.get_recipe_id())
         else:
@@ -386,18 +439,23 @@ class Supertokens:
         if matched_recipe is not None and request_id is None:
             log_debug_message("middleware: Not handling because recipe doesn't handle request path or method. Request path: %s, request method: %s", path.get_as_string_dangerous(), method)
         if request_id is not None and matched_recipe is not None:
-            log_debug_message("middleware: Request being handled by recipe. ID is: %s", request_id)
-            api_resp = await matched_recipe.handle_api_request(request_id, request, path, method, response)
-            if api_resp is None:
-                log_debug_message("middleware: Not handled because API returned None")
-            else:
-                log_debug_message("middleware: Ended")
-            return api_resp
+            return MatchedAPI(matched_recipe, request_id, path, method)
         return None
 
+    async def handle_matched_request(self, matched_api: MatchedAPI, request: BaseRequest,  # pylint: disable=no-self-use
+                                     response: BaseResponse) -> Union[BaseResponse, None]:
+        log_debug_message("middleware: Request being handled by recipe. ID is: %s", matched_api.request_id)
+        api_resp = await matched_api.recipe.handle_api_request(matched_api.request_id, request, matched_api.path,
+                                                               matched_api.method, response)
+        if api_resp is None:
+            log_debug_message("middleware: Not handled because API returned None")
+        else:
+            log_debug_message("middleware: Ended")
+        return api_resp
+
     async def handle_supertokens_error(self, request: BaseRequest, err: Exception, response: BaseResponse):
         log_debug_message("errorHandler: Started")
-        log_debug_message("errorHandler: Error is from SuperTokens recipe. Message: %s", str(err))
+        log_debug_message("errorHandler: Error is from SuperTokens recipe. Message: %s", err)
         if isinstance(err, GeneralError):
             raise err
 
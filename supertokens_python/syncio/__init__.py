@@ -15,6 +15,7 @@ from typing import List, Union
 
 from supertokens_python import Supertokens
 from supertokens_python.async_to_sync_wrapper import sync
+from supertokens_python.querier import Querier
 from supertokens_python.types import UsersResponse
 
 
@@ -36,3 +37,11 @@ def get_user_count(include_recipe_ids: Union[None, List[str]] = None) -> int:
 
 def delete_user(user_id: str) -> None:
     return sync(Supertokens.get_instance().delete_user(user_id))
+
+
+def close() -> None:
+    """
+    Closes the pooled connections to the SuperTokens core. Call this when your
+    WSGI worker exits (for example from gunicorn's worker_exit hook or atexit).
+    """
+    return sync(Querier.close())
@@ -0,0 +1,169 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from copy import deepcopy
+from threading import Lock
+from time import monotonic
+from typing import (Any, Awaitable, Callable, Dict, List, Set, Tuple, TypeVar,
+                    Union)
+
+_T = TypeVar("_T")
+
+DEFAULT_USER_CACHE_MAX_SIZE = 10000
+DEFAULT_USER_CACHE_TTL_MS = 60000
+
+
+class UserCache(ABC):
+    """
+    Cache for the results of user lookups made to the core (get user by id / email /
+    phone number / third party info). Only lookups that found a user are cached.
+
+    Every cached value is stored along with the ids of the users it contains so that a
+    write to a user (update, delete, ...) can invalidate every entry that refers to it,
+    no matter which key it was looked up by.
+
+    A lookup that was sent to the core before an invalidation may return the user as it
+    was before the write. So every invalidation increments the generation of the cache,
+    and set doesn't store values that were fetched in an older generation.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Union[Any, None]:
+        pass
+
+    @abstractmethod
+    def get_generation(self) -> int:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, user_ids: List[str], generation: int) -> None:
+        """
+        Stores value, unless the cache was invalidated since generation was returned by
+        get_generation.
+        """
+
+    @abstractmethod
+    def invalidate_key(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def invalidate_user(self, user_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict[str, int]:
+        pass
+
+
+class InMemoryUserCache(UserCache):
+    """
+    Per process LRU cache where each entry expires after ttl_ms.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_USER_CACHE_MAX_SIZE, ttl_ms: int = DEFAULT_USER_CACHE_TTL_MS):
+        self.max_size = max_size
+        self.ttl_ms = ttl_ms
+        # key -> (expires_at_ms, value, user_ids)
+        self.__entries: OrderedDict[str, Tuple[float, Any, List[str]]] = OrderedDict()
+        self.__keys_by_user_id: Dict[str, Set[str]] = {}
+        self.__lock = Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__generation = 0
+
+    def get(self, key: str) -> Union[Any, None]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__misses += 1
+                return None
+            if entry[0] <= monotonic() * 1000:
+                self.__remove(key)
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[1]
+
+    def get_generation(self) -> int:
+        with self.__lock:
+            return self.__generation
+
+    def set(self, key: str, value: Any, user_ids: List[str], generation: int) -> None:
+        with self.__lock:
+            if generation != self.__generation:
+                return
+            self.__remove(key)
+            self.__entries[key] = (monotonic() * 1000 + self.ttl_ms, value, user_ids)
+            for user_id in user_ids:
+                self.__keys_by_user_id.setdefault(user_id, set()).add(key)
+            while len(self.__entries) > self.max_size:
+                oldest_key = next(iter(self.__entries))
+                self.__remove(oldest_key)
+                self.__evictions += 1
+
+    def invalidate_key(self, key: str) -> None:
+        with self.__lock:
+            self.__generation += 1
+            self.__remove(key)
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self.__lock:
+            self.__generation += 1
+            for key in list(self.__keys_by_user_id.get(user_id, ())):
+                self.__remove(key)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'size': len(self.__entries),
+                'maxSize': self.max_size
+            }
+
+    def __remove(self, key: str):
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return
+        for user_id in entry[2]:
+            keys = self.__keys_by_user_id.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self.__keys_by_user_id[user_id]
+
+
+async def get_user_through_cache(cache: Union[UserCache, None], key: str,
+                                 fetch: Callable[[], Awaitable[Union[_T, None]]],
+                                 get_user_ids: Callable[[_T], List[str]]) -> Union[_T, None]:
+    """
+    Returns a copy of the cached value, or fetches and caches it. The copies keep callers
+    from changing the cached users.
+    """
+    if cache is None:
+        return await fetch()
+    cached = cache.get(key)
+    if cached is not None:
+        return deepcopy(cached)
+    generation = cache.get_generation()
+    result = await fetch()
+    if result is not None:
+        cache.set(key, deepcopy(result), get_user_ids(result), generation)
+    return result
@@ -21,10 +21,7 @@ from time import time
 from typing import (TYPE_CHECKING, Any, Callable, Coroutine, Dict, List,
                     TypeVar, Union)
 
-from supertokens_python.async_to_sync_wrapper import check_event_loop
-from supertokens_python.framework.django.framework import DjangoFramework
-from supertokens_python.framework.fastapi.framework import FastapiFramework
-from supertokens_python.framework.flask.framework import FlaskFramework
+from supertokens_python.async_to_sync_wrapper import sync
 from supertokens_python.framework.request import BaseRequest
 from supertokens_python.framework.response import BaseResponse
 from supertokens_python.logger import log_debug_message
@@ -35,14 +32,31 @@ from .exceptions import raise_general_exception
 _T = TypeVar("_T")
 
 if TYPE_CHECKING:
-    pass
+    from supertokens_python.framework.types import Framework
 
 
-FRAMEWORKS = {
-    'fastapi': FastapiFramework(),
-    'flask': FlaskFramework(),
-    'django': DjangoFramework(),
-}
+class _Frameworks(Dict[str, 'Framework']):
+    # the adapter of a framework is only imported the first time it is used, so that
+    # an app doesn't pay for importing the adapters of the frameworks it doesn't use
+    def __missing__(self, framework: str) -> Framework:
+        if framework == 'fastapi':
+            from supertokens_python.framework.fastapi.framework import \
+                FastapiFramework
+            self[framework] = FastapiFramework()
+        elif framework == 'flask':
+            from supertokens_python.framework.flask.framework import \
+                FlaskFramework
+            self[framework] = FlaskFramework()
+        elif framework == 'django':
+            from supertokens_python.framework.django.framework import \
+                DjangoFramework
+            self[framework] = DjangoFramework()
+        else:
+            raise KeyError(framework)
+        return self[framework]
+
+
+FRAMEWORKS = _Frameworks()
 
 
 def is_an_ip_address(ip_address: str) -> bool:
@@ -108,7 +122,7 @@ def send_non_200_response(message: str, status_code: int,
     if status_code < 300:
         raise_general_exception(
             'Calling sendNon200Response with status code < 300')
-    log_debug_message("Sending response to client with status code: %s", str(status_code))
+    log_debug_message("Sending response to client with status code: %s", status_code)
     response.set_status_code(status_code)
     response.set_json_content(content={
         ERROR_MESSAGE_KEY: message
@@ -150,9 +164,7 @@ def find_first_occurrence_in_list(
 
 def execute_in_background(mode: str, func: Callable[[], Coroutine[Any, Any, None]]):
     if mode == 'wsgi':
-        check_event_loop()
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(func())
+        sync(func())
     else:
         asyncio.create_task(func())
 
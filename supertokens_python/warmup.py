@@ -0,0 +1,115 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import Any, Awaitable, Callable, Dict, List, Union
+
+from .async_to_sync_wrapper import get_background_event_loop
+from .logger import log_debug_message
+from .querier import Querier
+
+
+class Warmup:
+    """
+    Makes the calls to the core that the first requests would otherwise wait for (like getting
+    the api version and the session recipe's handshake) concurrently in the background after
+    init, so that init doesn't block on them. Telemetry is sent alongside, but ready() doesn't
+    wait for it.
+
+    The warmup runs on the event loop init is called from if there is one, else on the
+    background event loop if it is used, else on a short lived thread with its own event loop.
+    Requests that come in before it is done fetch what they need themselves.
+    """
+
+    def __init__(self, tasks: Dict[str, Callable[[], Awaitable[Any]]],
+                 background_tasks: List[Callable[[], Awaitable[Any]]]):
+        self.__tasks = tasks
+        self.__background_tasks = background_tasks
+        self.__lock = Lock()
+        # task name -> 'pending', 'done' or 'failed'
+        self.__status: Dict[str, str] = {name: 'pending' for name in tasks}
+        # resolved with whether all the tasks succeeded. A concurrent future, so that it can be
+        # awaited from any event loop
+        self.__done: Future[bool] = Future()
+        self.__task: Union[asyncio.Future[None], None] = None
+
+    def start(self):
+        if len(self.__tasks) == 0 and len(self.__background_tasks) == 0:
+            self.__done.set_result(True)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            # kept so that the task isn't garbage collected before it is done
+            self.__task = asyncio.ensure_future(self.__run(False))
+            return
+        background_event_loop = get_background_event_loop()
+        if background_event_loop is not None:
+            asyncio.run_coroutine_threadsafe(self.__run(False), background_event_loop)
+            return
+        Thread(target=self.__run_on_new_event_loop, name='supertokens-warmup', daemon=True).start()
+
+    async def ready(self, timeout: Union[float, None] = None) -> bool:
+        """
+        Waits for the warmup to finish and returns whether all of it succeeded. Returns False
+        if it isn't done within timeout seconds.
+        """
+        try:
+            # shielded since cancelling the wrapper would cancel the future for everyone
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.__done)), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    def is_ready(self) -> bool:
+        return self.__done.done() and self.__done.result()
+
+    def get_status(self) -> Dict[str, str]:
+        with self.__lock:
+            return dict(self.__status)
+
+    def __run_on_new_event_loop(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.__run(True))
+        finally:
+            loop.close()
+
+    async def __run(self, close_connections: bool):
+        background_tasks = [asyncio.ensure_future(task()) for task in self.__background_tasks]
+        names = list(self.__tasks.keys())
+        results = await asyncio.gather(*[self.__tasks[name]() for name in names], return_exceptions=True)
+
+        with self.__lock:
+            for name, result in zip(names, results):
+                if isinstance(result, BaseException):
+                    log_debug_message("warmup: %s failed: %s", name, result)
+                    self.__status[name] = 'failed'
+                else:
+                    self.__status[name] = 'done'
+            succeeded = all(status == 'done' for status in self.__status.values())
+        log_debug_message("warmup: done. Succeeded: %s", succeeded)
+        self.__done.set_result(succeeded)
+
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if close_connections:
+            # the connections of this event loop can't be used once it is closed
+            try:
+                await Querier.close()
+            except Exception:
+                pass
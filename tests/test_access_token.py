@@ -0,0 +1,476 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+import gc
+from base64 import b64encode
+from json import dumps
+from typing import Any, Dict, List, Tuple, Union
+from unittest.mock import patch
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from Crypto.Signature.pkcs1_15 import PKCS115_SigScheme
+from pytest import mark, raises
+from supertokens_python.recipe.session import jwt, session_functions
+from supertokens_python.recipe.session.access_token import \
+    get_info_from_access_token
+from supertokens_python.exceptions import raise_general_exception
+from supertokens_python.recipe.session.exceptions import TryRefreshTokenError
+from supertokens_python.recipe.session.interfaces import RecipeInterface
+from supertokens_python.recipe.session.recipe_implementation import (
+    HandshakeInfo, RecipeImplementation)
+from supertokens_python.recipe.session.verification_executor import \
+    VerificationExecutor
+from supertokens_python.utils import get_timestamp_ms, utf_base64encode
+from typing_extensions import Literal
+
+
+def generate_signing_key() -> Tuple[Any, str]:
+    private_key = RSA.generate(2048)
+    public_key = private_key.publickey().export_key('DER')
+    return private_key, b64encode(public_key).decode('utf-8')
+
+
+def create_access_token(private_key: Any, payload: Dict[str, Any]) -> str:
+    header = utf_base64encode(dumps({
+        'alg': 'RS256',
+        'typ': 'JWT',
+        'version': '2'
+    }, separators=(',', ':'), sort_keys=True))
+    body = utf_base64encode(dumps(payload))
+    signature = PKCS115_SigScheme(private_key).sign(SHA256.new((header + '.' + body).encode('utf-8')))
+    return header + '.' + body + '.' + b64encode(signature).decode('utf-8')
+
+
+def get_access_token_payload(time_created: int) -> Dict[str, Any]:
+    return {
+        'sessionHandle': 'handle',
+        'userId': 'user',
+        'refreshTokenHash1': 'hash',
+        'parentRefreshTokenHash1': None,
+        'userData': {},
+        'antiCsrfToken': None,
+        'expiryTime': get_timestamp_ms() + 3600000,
+        'timeCreated': time_created
+    }
+
+
+def get_handshake_info(key_list: List[Dict[str, Any]]) -> HandshakeInfo:
+    handshake_info = HandshakeInfo({
+        'accessTokenBlacklistingEnabled': False,
+        'antiCsrf': 'NONE',
+        'accessTokenValidity': 3600000,
+        'refreshTokenValidity': 3600000
+    })
+    handshake_info.set_jwt_signing_public_key_list(key_list)
+    return handshake_info
+
+
+class MockSessionConfig:
+    mode = 'asgi'
+    anti_csrf = 'NONE'
+    verify_result_cache = None
+    handshake_info_store = None
+
+    def __init__(self, verification_executor: Union[VerificationExecutor, None] = None):
+        self.verification_executor = verification_executor
+
+
+class MockRecipeImplementation:
+    def __init__(self, handshake_info: HandshakeInfo,
+                 verification_executor: Union[VerificationExecutor, None] = None):
+        self.handshake_info = handshake_info
+        self.config = MockSessionConfig(verification_executor)
+
+    async def get_handshake_info(self, _: bool = False) -> HandshakeInfo:
+        return self.handshake_info
+
+
+class MockHandshakeQuerier:
+    def __init__(self, expiry_time: int):
+        self.expiry_time = expiry_time
+        self.no_of_calls = 0
+
+    async def send_post_request(self, _: Any, __: Dict[str, Any]) -> Dict[str, Any]:
+        self.no_of_calls += 1
+        await asyncio.sleep(0.05)
+        return {
+            'status': 'OK',
+            'accessTokenBlacklistingEnabled': False,
+            'accessTokenValidity': 3600000,
+            'refreshTokenValidity': 3600000,
+            'jwtSigningPublicKey': 'key' + str(self.no_of_calls),
+            'jwtSigningPublicKeyExpiryTime': self.expiry_time,
+            'jwtSigningPublicKeyList': None
+        }
+
+
+def test_signing_key_is_parsed_once_and_dropped_when_it_expires():
+    private_key, public_key = generate_signing_key()
+    token = create_access_token(private_key, get_access_token_payload(get_timestamp_ms()))
+
+    info = get_info_from_access_token(token, public_key, False)
+    assert info['userId'] == 'user'
+    verifier = jwt.get_verifier(public_key)
+    get_info_from_access_token(token, public_key, False)
+    assert jwt.get_verifier(public_key) is verifier
+
+    handshake_info = get_handshake_info([{
+        'publicKey': public_key,
+        'expiryTime': get_timestamp_ms() - 1,
+        'createdAt': get_timestamp_ms() - 10
+    }])
+    assert handshake_info.get_jwt_signing_public_key_list() == []
+    assert jwt.get_verifier(public_key) is not verifier
+
+
+@mark.asyncio
+async def test_verified_access_token_is_not_verified_again_until_keys_rotate():
+    private_key, public_key = generate_signing_key()
+    now = get_timestamp_ms()
+    token = create_access_token(private_key, get_access_token_payload(now))
+    handshake_info = get_handshake_info([{
+        'publicKey': public_key,
+        'expiryTime': now + 3600000,
+        'createdAt': now - 10
+    }])
+    recipe_implementation: Any = MockRecipeImplementation(handshake_info)
+
+    with patch.object(session_functions, 'get_info_from_access_token', wraps=get_info_from_access_token) as verify:
+        for _ in range(3):
+            result = await session_functions.get_session(recipe_implementation, token, None, False, False)
+            assert result.session.user_id == 'user'
+        assert verify.call_count == 1
+
+        _, other_public_key = generate_signing_key()
+        handshake_info.set_jwt_signing_public_key_list([{
+            'publicKey': public_key,
+            'expiryTime': now + 3600000,
+            'createdAt': now - 10
+        }, {
+            'publicKey': other_public_key,
+            'expiryTime': now + 3600000,
+            'createdAt': now + 10
+        }])
+        await session_functions.get_session(recipe_implementation, token, None, False, False)
+        assert verify.call_count == 2
+
+
+@mark.asyncio
+async def test_changing_the_payload_of_a_session_doesnt_change_the_cached_token():
+    private_key, public_key = generate_signing_key()
+    now = get_timestamp_ms()
+    token = create_access_token(private_key, {**get_access_token_payload(now), 'userData': {'role': 'user'}})
+    recipe_implementation: Any = MockRecipeImplementation(get_handshake_info([{
+        'publicKey': public_key,
+        'expiryTime': now + 3600000,
+        'createdAt': now - 10
+    }]))
+
+    # the first result comes from the verification that stores the token, the second from the cache
+    for _ in range(2):
+        result = await session_functions.get_session(recipe_implementation, token, None, False, False)
+        assert result.session.user_data_in_jwt == {'role': 'user'}
+        result.session.user_data_in_jwt['role'] = 'admin'
+
+
+@mark.asyncio
+async def test_access_token_is_verified_only_with_the_key_it_was_signed_with():
+    now = get_timestamp_ms()
+    keys = [generate_signing_key() for _ in range(3)]
+    # the core returns the newest key first
+    handshake_info = get_handshake_info([{
+        'publicKey': public_key,
+        'expiryTime': now + 3600000,
+        'createdAt': now - 1000 * i
+    } for i, (_, public_key) in enumerate(keys)])
+    recipe_implementation: Any = MockRecipeImplementation(handshake_info)
+
+    with patch.object(session_functions, 'get_info_from_access_token', wraps=get_info_from_access_token) as verify:
+        token = create_access_token(keys[1][0], get_access_token_payload(now - 500))
+        result = await session_functions.get_session(recipe_implementation, token, None, False, False)
+        assert result.session.user_id == 'user'
+        assert verify.call_count == 1
+        assert verify.call_args[0][1] == keys[1][1]
+
+        token = create_access_token(keys[2][0], get_access_token_payload(now - 5000))
+        with raises(TryRefreshTokenError):
+            await session_functions.get_session(recipe_implementation, token, None, False, False)
+        assert verify.call_count == 1
+
+
+@mark.asyncio
+async def test_a_key_without_a_creation_time_verifies_tokens_created_before_it_was_received():
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    recipe_implementation = RecipeImplementation(MockVerifyQuerier(public_key, now), MockSessionConfig())  # type: ignore
+    handshake_info = await recipe_implementation.get_handshake_info()
+    # e.g. a core that only returns jwtSigningPublicKey
+    recipe_implementation.update_jwt_signing_public_key_info(None, public_key, now + 3600000)
+
+    assert [key['createdAt'] for key in handshake_info.get_jwt_signing_public_key_list()] == [0]
+    token = create_access_token(private_key, get_access_token_payload(now - 60000))
+    result = await session_functions.get_session(recipe_implementation, token, None, False, False)
+    assert result.session.user_id == 'user'
+
+
+@mark.asyncio
+async def test_a_failed_background_refresh_of_the_handshake_info_is_not_left_unretrieved():
+    querier = MockHandshakeQuerier(get_timestamp_ms() + 30000)
+    recipe_implementation = RecipeImplementation(querier, MockSessionConfig())  # type: ignore
+    handshake_info = await recipe_implementation.get_handshake_info()
+    loop = asyncio.get_event_loop()
+    errors: List[Dict[str, Any]] = []
+    loop.set_exception_handler(lambda _, context: errors.append(context))
+
+    async def fail(*_: Any) -> Dict[str, Any]:
+        raise_general_exception('core is down')
+    querier.send_post_request = fail  # type: ignore
+    try:
+        with patch('supertokens_python.recipe.session.recipe_implementation.HANDSHAKE_INFO_MIN_REFRESH_INTERVAL_MS', 0):
+            assert await recipe_implementation.get_handshake_info() is handshake_info
+            await asyncio.sleep(0.1)
+        gc.collect()
+        assert errors == []
+    finally:
+        loop.set_exception_handler(None)
+@mark.asyncio
+async def test_concurrent_handshake_info_refetches_share_one_core_call():
+    querier = MockHandshakeQuerier(get_timestamp_ms() + 3600000)
+    recipe_implementation = RecipeImplementation(querier, MockSessionConfig())  # type: ignore
+    results = await asyncio.gather(*[recipe_implementation.get_handshake_info() for _ in range(10)])
+    assert querier.no_of_calls == 1
+    assert all(result is results[0] for result in results)
+
+    await asyncio.gather(*[recipe_implementation.get_handshake_info(True) for _ in range(10)])
+    assert querier.no_of_calls == 2
+
+
+@mark.asyncio
+async def test_handshake_info_is_refreshed_in_the_background_before_the_keys_expire():
+    querier = MockHandshakeQuerier(get_timestamp_ms() + 30000)
+    recipe_implementation = RecipeImplementation(querier, MockSessionConfig())  # type: ignore
+    handshake_info = await recipe_implementation.get_handshake_info()
+    assert querier.no_of_calls == 1
+    assert handshake_info.get_jwt_signing_public_key_list()[0]['publicKey'] == 'key1'
+
+    querier.expiry_time = get_timestamp_ms() + 3600000
+    with patch('supertokens_python.recipe.session.recipe_implementation.HANDSHAKE_INFO_MIN_REFRESH_INTERVAL_MS', 0):
+        # the current keys are returned right away while the new ones are being fetched
+        assert await recipe_implementation.get_handshake_info() is handshake_info
+        assert handshake_info.get_jwt_signing_public_key_list()[0]['publicKey'] == 'key1'
+        await asyncio.sleep(0.1)
+        assert querier.no_of_calls == 2
+        assert handshake_info.get_jwt_signing_public_key_list()[0]['publicKey'] == 'key2'
+
+        # the new keys are not about to expire, so there is nothing to refresh
+        await recipe_implementation.get_handshake_info()
+        await asyncio.sleep(0.1)
+        assert querier.no_of_calls == 2
+
+
+@mark.asyncio
+@mark.parametrize('mode', ['inline', 'thread'])
+async def test_access_tokens_are_verified_in_batches(mode: Literal['inline', 'thread']):
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    handshake_info = get_handshake_info([{
+        'publicKey': public_key,
+        'expiryTime': now + 3600000,
+        'createdAt': now - 10
+    }])
+    verification_executor = VerificationExecutor(mode, max_workers=2, max_batch_size=8)
+    recipe_implementation: Any = MockRecipeImplementation(handshake_info, verification_executor)
+    tokens = [create_access_token(private_key, {
+        **get_access_token_payload(now),
+        'userId': 'user' + str(i)
+    }) for i in range(20)]
+    invalid_token = tokens[0][:-8] + 'AAAAAAA='
+
+    try:
+        results = await asyncio.gather(
+            *[session_functions.get_session(recipe_implementation, token, None, False, False) for token in tokens],
+            verification_executor.run(get_info_from_access_token, invalid_token, public_key, False),
+            return_exceptions=True)
+        assert [result.session.user_id for result in results[:-1]] == ['user' + str(i) for i in range(20)]  # type: ignore
+        assert isinstance(results[-1], TryRefreshTokenError)
+
+        metrics = verification_executor.get_metrics()
+        assert metrics['mode'] == mode
+        assert metrics['batches'] == 3
+        assert metrics['verifications'] == 21
+        assert metrics['queueDepth'] == 0
+        assert metrics['maxQueueDepth'] == 21
+    finally:
+        verification_executor.shutdown()
+
+
+def test_without_an_executor_access_tokens_are_verified_without_waiting_for_the_event_loop():
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    recipe_implementation: Any = MockRecipeImplementation(get_handshake_info([{
+        'publicKey': public_key,
+        'expiryTime': now + 3600000,
+        'createdAt': now - 10
+    }]))
+    token = create_access_token(private_key, get_access_token_payload(now))
+
+    # the coroutine finishes the first time it runs, so no event loop is needed
+    coroutine = session_functions.get_session(recipe_implementation, token, None, False, False)
+    with raises(StopIteration) as finished:
+        coroutine.send(None)
+    assert finished.value.value.session.user_id == 'user'
+
+
+@mark.asyncio
+async def test_the_event_loop_runs_other_callbacks_between_batches():
+    verification_executor = VerificationExecutor(max_batch_size=2)
+    order: List[str] = []
+
+    def verify(name: str) -> str:
+        order.append(name)
+        return name
+
+    verifications = [asyncio.ensure_future(verification_executor.run(verify, 'job' + str(i))) for i in range(4)]
+    # lets the verifications queue up, then schedules a callback right after the first batch
+    await asyncio.sleep(0)
+    asyncio.get_event_loop().call_soon(order.append, 'other')
+    assert await asyncio.gather(*verifications) == ['job0', 'job1', 'job2', 'job3']
+    assert order == ['job0', 'job1', 'other', 'job2', 'job3']
+
+
+class MockVerifyQuerier:
+    def __init__(self, public_key: str, time_created: int):
+        self.public_key = public_key
+        self.time_created = time_created
+        self.verified_access_tokens: List[str] = []
+        self.unreachable_for_access_tokens: List[str] = []
+
+    async def send_post_request(self, path: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        key_list = [{
+            'publicKey': self.public_key,
+            'expiryTime': get_timestamp_ms() + 3600000,
+            'createdAt': self.time_created
+        }]
+        if path.get_as_string_dangerous() == '/recipe/handshake':
+            return {
+                'accessTokenBlacklistingEnabled': False,
+                'accessTokenValidity': 3600000,
+                'refreshTokenValidity': 3600000,
+                'jwtSigningPublicKey': self.public_key,
+                'jwtSigningPublicKeyExpiryTime': key_list[0]['expiryTime'],
+                'jwtSigningPublicKeyList': key_list
+            }
+        if data['accessToken'] in self.unreachable_for_access_tokens:
+            raise_general_exception('No SuperTokens core available to query')
+        self.verified_access_tokens.append(data['accessToken'])
+        return {
+            'status': 'OK',
+            'session': {'handle': 'handle', 'userId': 'verified by core', 'userDataInJWT': {}},
+            'accessToken': {'token': 'new token', 'expiry': 0, 'createdTime': 0},
+            'jwtSigningPublicKey': self.public_key,
+            'jwtSigningPublicKeyExpiryTime': key_list[0]['expiryTime'],
+            'jwtSigningPublicKeyList': key_list
+        }
+
+
+@mark.asyncio
+async def test_verify_access_tokens_only_sends_the_tokens_it_cant_verify_to_the_core():
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    querier = MockVerifyQuerier(public_key, now - 1000)
+    recipe_implementation = RecipeImplementation(querier, MockSessionConfig())  # type: ignore
+
+    valid_token = create_access_token(private_key, get_access_token_payload(now))
+    refreshed_token = create_access_token(private_key, {
+        **get_access_token_payload(now),
+        'parentRefreshTokenHash1': 'parent hash'
+    })
+    old_token = create_access_token(private_key, get_access_token_payload(now - 2000))
+    results = await recipe_implementation.verify_access_tokens(
+        [valid_token, refreshed_token, old_token, 'invalid', valid_token], False, None, True, {})
+
+    assert [result.status for result in results] == ['OK', 'OK', 'TRY_REFRESH_TOKEN', 'TRY_REFRESH_TOKEN', 'OK']
+    assert results[0].session is not None and results[0].session.user_id == 'user'
+    assert results[0].access_token is None
+    assert results[1].session is not None and results[1].session.user_id == 'verified by core'
+    assert results[1].access_token is not None and results[1].access_token.token == 'new token'
+    assert querier.verified_access_tokens == [refreshed_token]
+
+
+@mark.asyncio
+async def test_verify_access_tokens_returns_an_error_only_for_the_tokens_the_core_failed_for():
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    querier = MockVerifyQuerier(public_key, now - 1000)
+    recipe_implementation = RecipeImplementation(querier, MockSessionConfig())  # type: ignore
+
+    refreshed_tokens = [create_access_token(private_key, {
+        **get_access_token_payload(now),
+        'parentRefreshTokenHash1': 'parent hash ' + str(i)
+    }) for i in range(2)]
+    querier.unreachable_for_access_tokens.append(refreshed_tokens[0])
+    results = await recipe_implementation.verify_access_tokens(refreshed_tokens, False, None, True, {})
+
+    assert [result.status for result in results] == ['GENERAL_ERROR', 'OK']
+    assert results[0].message is not None and 'No SuperTokens core' in results[0].message
+    assert results[1].session is not None and results[1].session.user_id == 'verified by core'
+
+
+@mark.asyncio
+async def test_the_default_verify_access_tokens_calls_get_session_for_each_token():
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    querier = MockVerifyQuerier(public_key, now - 1000)
+    recipe_implementation = RecipeImplementation(querier, MockSessionConfig())  # type: ignore
+
+    valid_token = create_access_token(private_key, get_access_token_payload(now))
+    refreshed_token = create_access_token(private_key, {
+        **get_access_token_payload(now),
+        'parentRefreshTokenHash1': 'parent hash'
+    })
+    unreachable_token = create_access_token(private_key, {
+        **get_access_token_payload(now),
+        'parentRefreshTokenHash1': 'other parent hash'
+    })
+    querier.unreachable_for_access_tokens.append(unreachable_token)
+    # what an override of the recipe interface that doesn't implement verify_access_tokens gets
+    results = await RecipeInterface.verify_access_tokens(
+        recipe_implementation, [valid_token, refreshed_token, 'invalid', unreachable_token], False, None, True, {})
+
+    assert [result.status for result in results] == ['OK', 'OK', 'TRY_REFRESH_TOKEN', 'GENERAL_ERROR']
+    assert results[0].session is not None and results[0].session.user_id == 'user'
+    assert results[0].access_token is None
+    assert results[1].session is not None and results[1].session.user_id == 'verified by core'
+    assert results[1].access_token is not None and results[1].access_token.token == 'new token'
+
+
+@mark.asyncio
+async def test_verify_access_tokens_checks_the_custom_header_only_if_it_is_not_passed():
+    now = get_timestamp_ms()
+    private_key, public_key = generate_signing_key()
+    config = MockSessionConfig()
+    config.anti_csrf = 'VIA_CUSTOM_HEADER'
+    recipe_implementation = RecipeImplementation(MockVerifyQuerier(public_key, now - 1000), config)  # type: ignore
+    access_token = create_access_token(private_key, get_access_token_payload(now))
+
+    for verify_access_tokens in (recipe_implementation.verify_access_tokens,
+                                 lambda *args: RecipeInterface.verify_access_tokens(recipe_implementation, *args)):  # type: ignore
+        results = await verify_access_tokens([access_token], True, None, True, {})
+        assert [result.status for result in results] == ['OK']
+        results = await verify_access_tokens([access_token], True, None, False, {})
+        assert [result.status for result in results] == ['TRY_REFRESH_TOKEN']
+        # the custom header only matters for the anti-csrf check
+        results = await verify_access_tokens([access_token], False, None, False, {})
+        assert [result.status for result in results] == ['OK']
@@ -0,0 +1,59 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import current_thread
+
+from pytest import raises
+from supertokens_python.async_to_sync_wrapper import (sync,
+                                                      use_background_event_loop)
+from supertokens_python.exceptions import GeneralError
+
+
+async def get_loop_and_thread():
+    await asyncio.sleep(0.01)
+    return asyncio.get_event_loop(), current_thread()
+
+
+def teardown_function(_):
+    use_background_event_loop(False)
+
+
+def test_sync_uses_one_event_loop_thread_for_all_threads_when_enabled():
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: sync(get_loop_and_thread()), range(8)))
+    assert len(set(loop for loop, _ in results)) > 1
+
+    use_background_event_loop()
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: sync(get_loop_and_thread()), range(8)))
+    assert len(set(loop for loop, _ in results)) == 1
+    assert results[0][1].name == 'supertokens-event-loop'
+
+    use_background_event_loop(False)
+    loop, thread = sync(get_loop_and_thread())
+    assert loop is not results[0][0]
+    assert thread is current_thread()
+
+
+def test_sync_fails_clearly_when_called_from_the_background_event_loop():
+    async def call_sync():
+        return sync(get_loop_and_thread())
+
+    use_background_event_loop()
+    with raises(GeneralError, match='background event loop'):
+        sync(call_sync())
+    # the loop is still usable afterwards
+    _, thread = sync(get_loop_and_thread())
+    assert thread.name == 'supertokens-event-loop'
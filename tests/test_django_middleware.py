@@ -0,0 +1,59 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from typing import List
+
+from django.http import HttpRequest, JsonResponse
+from django.test import RequestFactory
+from supertokens_python import InputAppInfo, SupertokensConfig, init
+from supertokens_python.framework.django import middleware
+from supertokens_python.recipe import session
+
+from tests.utils import reset
+
+
+def setup_function(_):
+    reset()
+
+
+def teardown_function(_):
+    reset()
+
+
+def test_sync_middleware_only_runs_supertokens_for_its_apis():
+    init(
+        supertokens_config=SupertokensConfig('http://localhost:3567'),
+        app_info=InputAppInfo(
+            app_name='SuperTokens Demo',
+            api_domain='http://api.supertokens.io',
+            website_domain='http://supertokens.io'
+        ),
+        framework='django',
+        mode='wsgi',
+        background_event_loop=True,
+        recipe_list=[session.init()]
+    )
+    requests_passed_on: List[str] = []
+
+    def get_response(request: HttpRequest):
+        requests_passed_on.append(request.path)
+        return JsonResponse({'app': True})
+
+    handle = middleware(get_response)
+    factory = RequestFactory()
+
+    assert handle(factory.get('/hello')).content == b'{"app": true}'
+    # signout doesn't need a session
+    assert handle(factory.post('/auth/signout')).content == b'{"status":"OK"}'
+    assert handle(factory.get('/auth/signout')).content == b'{"app": true}'
+    assert requests_passed_on == ['/hello', '/auth/signout']
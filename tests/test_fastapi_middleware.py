@@ -0,0 +1,84 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from typing import AsyncGenerator
+
+from fastapi import FastAPI
+from fastapi.requests import Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from supertokens_python import InputAppInfo, SupertokensConfig, init
+from supertokens_python.framework.fastapi import get_middleware
+from supertokens_python.recipe import session
+from supertokens_python.recipe.session import SessionRecipe
+from supertokens_python.recipe.session.exceptions import \
+    raise_unauthorised_exception
+from supertokens_python.recipe.session.session_class import Session
+
+from tests.utils import extract_all_cookies, reset
+
+
+def setup_function(_):
+    reset()
+
+
+def teardown_function(_):
+    reset()
+
+
+def get_client() -> TestClient:
+    init(
+        supertokens_config=SupertokensConfig('http://localhost:3567'),
+        app_info=InputAppInfo(
+            app_name='SuperTokens Demo',
+            api_domain='http://api.supertokens.io',
+            website_domain='http://supertokens.io'
+        ),
+        framework='fastapi',
+        recipe_list=[session.init(cookie_domain='supertokens.io')]
+    )
+    app = FastAPI()
+    app.add_middleware(get_middleware())
+
+    @app.get('/stream')
+    async def stream(request: Request):  # type: ignore
+        session_ = Session(SessionRecipe.get_instance().recipe_implementation, 'accessToken', 'handle', 'userId', {})
+        session_.new_access_token_info = {'token': 'newAccessToken', 'expiry': 9999999999999, 'createdTime': 0}
+        request.state.supertokens = session_
+
+        async def chunks() -> AsyncGenerator[bytes, None]:
+            for i in range(3):
+                yield str(i).encode('utf-8')
+
+        return StreamingResponse(chunks(), headers={'x-custom': 'value'})
+
+    @app.get('/unauthorised')
+    async def unauthorised():  # type: ignore
+        raise_unauthorised_exception('no session')
+
+    return TestClient(app)
+
+
+def test_session_cookies_are_added_to_streaming_responses():
+    response = get_client().get('/stream')
+    assert response.status_code == 200
+    assert response.text == '012'
+    assert response.headers['x-custom'] == 'value'
+    assert 'front-token' in response.headers
+    assert extract_all_cookies(response)['sAccessToken']['value'] == 'newAccessToken'
+
+
+def test_supertokens_errors_raised_by_the_app_are_handled():
+    response = get_client().get('/unauthorised')
+    assert response.status_code == 401
+    assert response.json() == {'message': 'unauthorised'}
@@ -0,0 +1,159 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+import struct
+import sys
+from threading import Thread
+from time import time
+from typing import Any, Dict
+
+from pytest import mark
+from supertokens_python.recipe.session.handshake_info_store import \
+    SharedMemoryHandshakeInfoStore
+from supertokens_python.recipe.session.recipe_implementation import \
+    RecipeImplementation
+from supertokens_python.utils import get_timestamp_ms
+
+
+class Core:
+    def __init__(self):
+        self.no_of_calls = 0
+
+    async def send_post_request(self, _: Any = None, __: Any = None) -> Dict[str, Any]:
+        self.no_of_calls += 1
+        await asyncio.sleep(0.1)
+        return {
+            'status': 'OK',
+            'accessTokenBlacklistingEnabled': False,
+            'accessTokenValidity': 3600000,
+            'refreshTokenValidity': 3600000,
+            'jwtSigningPublicKey': 'key' + str(self.no_of_calls),
+            'jwtSigningPublicKeyExpiryTime': get_timestamp_ms() + 3600000,
+            'jwtSigningPublicKeyList': None
+        }
+
+
+class MockSessionConfig:
+    anti_csrf = 'NONE'
+
+    def __init__(self, handshake_info_store: SharedMemoryHandshakeInfoStore):
+        self.handshake_info_store = handshake_info_store
+
+
+@mark.asyncio
+async def test_a_response_stored_by_one_worker_is_read_by_the_others(tmp_path: Any):
+    path = str(tmp_path / 'handshake')
+    # each worker opens the file itself
+    worker1 = SharedMemoryHandshakeInfoStore(path)
+    worker2 = SharedMemoryHandshakeInfoStore(path)
+    core = Core()
+
+    assert worker2.get_version() == 0
+    assert worker2.get() is None
+
+    version, response = await worker1.fetch(0, core.send_post_request)
+    assert version == 1
+    assert worker2.get_version() == 1
+    assert worker2.get() == (1, response)
+
+    # worker2 already knows about version 1, so it calls the core
+    version, response = await worker2.fetch(1, core.send_post_request)
+    assert version == 2
+    assert response['jwtSigningPublicKey'] == 'key2'
+    assert worker1.get() == (2, response)
+    assert core.no_of_calls == 2
+
+
+@mark.asyncio
+async def test_concurrent_fetches_of_the_workers_share_one_core_call(tmp_path: Any):
+    path = str(tmp_path / 'handshake')
+    workers = [SharedMemoryHandshakeInfoStore(path) for _ in range(4)]
+    core = Core()
+
+    results = await asyncio.gather(*[worker.fetch(0, core.send_post_request) for worker in workers])
+
+    assert core.no_of_calls == 1
+    assert all(result == results[0] for result in results)
+
+
+@mark.asyncio
+async def test_a_response_that_doesnt_fit_is_not_stored(tmp_path: Any):
+    store = SharedMemoryHandshakeInfoStore(str(tmp_path / 'handshake'), max_size=64)
+    core = Core()
+
+    version, response = await store.fetch(0, core.send_post_request)
+
+    assert version == 0
+    assert response['jwtSigningPublicKey'] == 'key1'
+    assert store.get() is None
+
+
+@mark.asyncio
+async def test_workers_use_the_handshake_info_fetched_by_another_worker(tmp_path: Any):
+    path = str(tmp_path / 'handshake')
+    core = Core()
+    workers = [RecipeImplementation(core, MockSessionConfig(SharedMemoryHandshakeInfoStore(path)))  # type: ignore
+               for _ in range(3)]
+
+    await workers[0].get_handshake_info()
+    for worker in workers[1:]:
+        handshake_info = await worker.get_handshake_info()
+        assert handshake_info.get_jwt_signing_public_key_list()[0]['publicKey'] == 'key1'
+    assert core.no_of_calls == 1
+
+    # a forced refetch by one worker is picked up by the others
+    await workers[1].get_handshake_info(True)
+    assert core.no_of_calls == 2
+    handshake_info = await workers[2].get_handshake_info()
+    assert handshake_info.get_jwt_signing_public_key_list()[0]['publicKey'] == 'key2'
+    assert core.no_of_calls == 2
+
+
+def test_threads_sharing_a_store_never_read_a_half_written_response(tmp_path: Any):
+    store = SharedMemoryHandshakeInfoStore(str(tmp_path / 'handshake'))
+    responses = [{'jwtSigningPublicKey': 'a' * 10}, {'jwtSigningPublicKey': 'b' * 1000}]
+    set_response = store._SharedMemoryHandshakeInfoStore__set  # type: ignore # pylint: disable=protected-access
+    set_response(responses[0])
+    deadline = time() + 0.5
+
+    def write():
+        i = 0
+        while time() < deadline:
+            i += 1
+            set_response(responses[i % 2])
+
+    # switches threads as often as possible, so that the writer runs in the middle of reads
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writer = Thread(target=write)
+    writer.start()
+    try:
+        while time() < deadline:
+            stored = store.get()
+            assert stored is not None and stored[1] in responses
+    finally:
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+
+
+def test_a_response_that_cant_be_decoded_is_a_miss(tmp_path: Any):
+    path = str(tmp_path / 'handshake')
+    store = SharedMemoryHandshakeInfoStore(path)
+    store.get_version()
+    with open(path, 'r+b') as f:
+        # magic, length of the response, version, like the store writes them
+        f.write(struct.pack('<4sIQ', b'STHI', 3, 1) + b'{{{')
+
+    assert store.get_version() == 1
+    assert store.get() is None
@@ -0,0 +1,81 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from supertokens_python.host_selector import HostSelector, get_host_url
+from supertokens_python.normalised_url_domain import NormalisedURLDomain
+from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.supertokens import Host
+
+
+def get_host(uri: str) -> Host:
+    return Host(NormalisedURLDomain(uri), NormalisedURLPath(uri))
+
+
+def test_fastest_host_is_preferred():
+    fast = get_host('http://localhost:3567')
+    slow = get_host('http://localhost:3568')
+    selector = HostSelector([slow, fast])
+    selector.record_success(slow, 200)
+    selector.record_success(fast, 5)
+
+    ordered = selector.get_hosts_in_order()
+    assert get_host_url(ordered[0]) == get_host_url(fast)
+    assert get_host_url(ordered[1]) == get_host_url(slow)
+
+
+def test_failing_host_is_ejected_and_probed_after_cooldown():
+    good = get_host('http://localhost:3567')
+    bad = get_host('http://localhost:3568')
+    selector = HostSelector([bad, good], ejection_cooldown_ms=0)
+    selector.record_success(good, 10)
+    selector.record_success(bad, 1)
+    selector.record_failure(bad)
+    selector.record_failure(bad)
+
+    assert selector.get_stats()[get_host_url(bad)]['ejected']
+    # ejected hosts are only used as a last resort
+    assert get_host_url(selector.get_hosts_in_order()[-1]) == get_host_url(bad)
+
+    to_probe = selector.get_hosts_to_probe()
+    assert [get_host_url(h) for h in to_probe] == [get_host_url(bad)]
+    # a host is handed out for probing only once
+    assert selector.get_hosts_to_probe() == []
+
+    selector.record_success(bad, 1)
+    stats = selector.get_stats()[get_host_url(bad)]
+    assert not stats['ejected']
+    assert stats['ewmaErrorRate'] == 0.0
+
+
+def test_abandoned_probes_are_handed_out_again():
+    host = get_host('http://localhost:3567')
+    selector = HostSelector([host], ejection_cooldown_ms=0, probe_timeout_ms=60000)
+    selector.record_failure(host)
+    selector.record_failure(host)
+
+    assert len(selector.get_hosts_to_probe()) == 1
+    selector.abandon_probe(host)
+    stats = selector.get_stats()[get_host_url(host)]
+    assert stats['ejected'] and not stats['beingProbed']
+    assert len(selector.get_hosts_to_probe()) == 1
+
+
+def test_probes_that_dont_report_in_time_are_handed_out_again():
+    host = get_host('http://localhost:3567')
+    selector = HostSelector([host], ejection_cooldown_ms=0, probe_timeout_ms=0)
+    selector.record_failure(host)
+    selector.record_failure(host)
+
+    # the first probe never reported a result, e.g. because its event loop was stopped
+    assert len(selector.get_hosts_to_probe()) == 1
+    assert len(selector.get_hosts_to_probe()) == 1
@@ -0,0 +1,45 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import subprocess
+import sys
+from typing import List
+
+
+def get_modules_loaded_by(code: str) -> List[str]:
+    # a fresh interpreter, since this one has already imported everything
+    result = subprocess.run([sys.executable, '-c', code + '\nimport sys, json\nprint(json.dumps(list(sys.modules)))'],
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_framework_adapters_and_optional_recipes_are_not_imported_upfront():
+    modules = get_modules_loaded_by('import supertokens_python\nfrom supertokens_python.recipe import session')
+
+    for module in modules:
+        assert not module.startswith('supertokens_python.framework.django')
+        assert not module.startswith('supertokens_python.framework.flask')
+        assert not module.startswith('supertokens_python.framework.fastapi')
+        assert not module.startswith('supertokens_python.recipe.openid')
+        assert not module.startswith('supertokens_python.recipe.jwt')
+        assert not module.startswith('tldextract')
+
+
+def test_framework_adapter_is_imported_on_first_use():
+    modules = get_modules_loaded_by(
+        'from supertokens_python.utils import FRAMEWORKS\n'
+        'assert type(FRAMEWORKS["fastapi"]).__name__ == "FastapiFramework"')
+
+    assert 'supertokens_python.framework.fastapi.framework' in modules
+    assert 'supertokens_python.framework.django.framework' not in modules
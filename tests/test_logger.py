@@ -4,7 +4,7 @@ from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
 from supertokens_python.constants import VERSION
-from supertokens_python.logger import log_debug_message, streamFormatter
+from supertokens_python.logger import NAMESPACE, LazyLogArg, log_debug_message, streamFormatter
 
 
 class LoggerTests(TestCase):
@@ -25,6 +25,26 @@ class LoggerTests(TestCase):
             'file': '../tests/test_logger.py:16',
         }
 
+    def test_args_are_formatted_into_the_json_message(self):
+        with self.assertLogs(level='DEBUG') as captured:
+            log_debug_message('status: %s, body: %s', 200, LazyLogArg(lambda: '{"status": "OK"}'))
+
+        out = json.loads(captured.records[0].msg)
+        assert out['message'] == 'status: 200, body: {"status": "OK"}'
+
+    @staticmethod
+    def test_lazy_arg_is_not_computed_if_not_logged():
+        import logging
+        logger = logging.getLogger(NAMESPACE)
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        computed = []
+        try:
+            log_debug_message('%s', LazyLogArg(lambda: computed.append(1)))
+        finally:
+            logger.setLevel(level)
+        assert computed == []
+
     @staticmethod
     def test_stream_formatter_format():
         assert streamFormatter._fmt == "{name} {message}\n"  # pylint: disable=protected-access
@@ -0,0 +1,66 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from pytest import mark, raises
+from supertokens_python import normalised_url_domain, normalised_url_path
+from supertokens_python.exceptions import GeneralError
+from supertokens_python.normalised_url_domain import (
+    NormalisedURLDomain, normalise_domain_path_or_throw_error)
+from supertokens_python.normalised_url_path import (
+    NormalisedURLPath, normalise_url_path_or_throw_error)
+
+PATHS = ['', '/', '/auth', '/auth/', 'auth', ' /Auth/Signin ', 'http://a.com/x/', 'https://api.example.com/auth?x=1',
+         'api.example.com/auth', 'localhost:3000/x/', '.netlify.app', 'http://[::1', 'a b']
+DOMAINS = ['http://localhost:3567', 'localhost:3000/x/', 'api.example.com/auth', ' HTTPS://API.Example.com ',
+           '.netlify.app', 'http://127.0.0.1:8080', 'supertokens://a.com']
+INVALID_DOMAINS = ['', '/a/b/', '[', 'http://[::1', 'a b']
+
+
+@mark.parametrize('url', PATHS)
+def test_cached_paths_are_the_same_as_normalising_them(url: str):
+    expected = normalise_url_path_or_throw_error(url)
+    # the second time, the path comes from the cache
+    assert NormalisedURLPath(url).get_as_string_dangerous() == expected
+    assert NormalisedURLPath(url).get_as_string_dangerous() == expected
+    assert normalised_url_path._normalised_paths_cache[url] == expected  # pylint: disable=protected-access
+
+
+@mark.parametrize('url', DOMAINS)
+def test_cached_domains_are_the_same_as_normalising_them(url: str):
+    expected = normalise_domain_path_or_throw_error(url)
+    assert NormalisedURLDomain(url).get_as_string_dangerous() == expected
+    assert NormalisedURLDomain(url).get_as_string_dangerous() == expected
+    assert normalised_url_domain._normalised_domains_cache[url] == expected  # pylint: disable=protected-access
+
+
+@mark.parametrize('url', INVALID_DOMAINS)
+def test_invalid_domains_fail_every_time_and_are_not_cached(url: str):
+    with raises(GeneralError) as uncached:
+        normalise_domain_path_or_throw_error(url)
+    for _ in range(2):
+        with raises(GeneralError) as cached:
+            NormalisedURLDomain(url)
+        assert str(cached.value) == str(uncached.value)
+    assert url not in normalised_url_domain._normalised_domains_cache  # pylint: disable=protected-access
+
+
+def test_the_caches_stay_within_their_bounds():
+    for i in range(normalised_url_path.MAX_NORMALISED_PATHS_CACHE_SIZE * 2 + 1):
+        url = '/path' + str(i)
+        assert NormalisedURLPath(url).get_as_string_dangerous() == normalise_url_path_or_throw_error(url)
+        assert len(normalised_url_path._normalised_paths_cache) <= normalised_url_path.MAX_NORMALISED_PATHS_CACHE_SIZE  # pylint: disable=protected-access
+
+    for i in range(normalised_url_domain.MAX_NORMALISED_DOMAINS_CACHE_SIZE * 2 + 1):
+        url = 'http://domain' + str(i) + '.com'
+        assert NormalisedURLDomain(url).get_as_string_dangerous() == normalise_domain_path_or_throw_error(url)
+        assert len(normalised_url_domain._normalised_domains_cache) <= normalised_url_domain.MAX_NORMALISED_DOMAINS_CACHE_SIZE  # pylint: disable=protected-access
@@ -0,0 +1,462 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+import gc
+from contextlib import contextmanager
+from json import dumps
+from threading import Thread
+from time import sleep, time
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from pytest import MonkeyPatch, mark, raises
+from supertokens_python import host_selector
+from supertokens_python.constants import SUPPORTED_CDI_VERSIONS
+from supertokens_python.exceptions import GeneralError
+from supertokens_python.normalised_url_domain import NormalisedURLDomain
+from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.querier import Querier
+from supertokens_python.supertokens import Host, SupertokensConfig
+
+
+class FakeCore:
+    """
+    A minimal HTTP server that answers the requests of the Querier like the core would. Requests
+    to a path in held_paths are only answered once release() is called.
+    """
+
+    def __init__(self):
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.responses: Dict[str, Tuple[int, Any]] = {}
+        self.held_paths: List[str] = []
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.__connections: Dict[asyncio.StreamWriter, Any] = {}
+        self.__released = asyncio.Event()
+        self.__received = asyncio.Condition()
+        self.__server: Union[asyncio.AbstractServer, None] = None
+        self.url = ''
+
+    async def start(self, port: int = 0):
+        self.__server = await asyncio.start_server(self.__handle, '127.0.0.1', port)
+        port = self.__server.sockets[0].getsockname()[1]
+        self.url = 'http://127.0.0.1:' + str(port)
+
+    async def stop(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        for writer in self.__connections:
+            writer.close()
+        await asyncio.gather(*self.__connections.values())
+
+    def get_host(self) -> Host:
+        return Host(NormalisedURLDomain(self.url), NormalisedURLPath(self.url))
+
+    def get_requests_to(self, path: str) -> List[Dict[str, str]]:
+        return [params for request_path, params in self.requests if request_path == path]
+
+    async def wait_for_requests_to(self, path: str, count: int):
+        async with self.__received:
+            await self.__received.wait_for(lambda: len(self.get_requests_to(path)) >= count)
+
+    def release(self):
+        self.__released.set()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections_opened += 1
+        self.__connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                target = head.split(b' ')[1].decode('utf-8')
+                path = urlsplit(target).path
+                async with self.__received:
+                    self.requests.append((path, dict(parse_qsl(urlsplit(target).query))))
+                    self.__received.notify_all()
+                if path in self.held_paths:
+                    await self.__released.wait()
+                if path == '/apiversion':
+                    status, body = 200, {'versions': SUPPORTED_CDI_VERSIONS}
+                else:
+                    status, body = self.responses.get(path, (200, {'status': 'OK', 'path': path}))
+                payload = dumps(body).encode('utf-8')
+                writer.write(('HTTP/1.1 ' + str(status) + ' Status\r\n'
+                              'Content-Type: application/json\r\n'
+                              'Content-Length: ' + str(len(payload)) + '\r\n\r\n').encode('utf-8') + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections_closed += 1
+            del self.__connections[writer]
+            writer.close()
+
+
+@contextmanager
+def run_fake_core_in_thread(**kwargs: Any) -> Iterator[FakeCore]:
+    """
+    Runs the core on an event loop of its own, so that the Querier can be used from other loops.
+    """
+    loop = asyncio.new_event_loop()
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    core = asyncio.run_coroutine_threadsafe(start_core_and_querier(**kwargs), loop).result()
+    try:
+        yield core
+    finally:
+        asyncio.run_coroutine_threadsafe(core.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def wait_until(condition: Callable[[], bool]):
+    deadline = time() + 5
+    while not condition():
+        assert time() < deadline
+        sleep(0.01)
+
+
+def send_get_request_on(loop: asyncio.AbstractEventLoop) -> Any:
+    return loop.run_until_complete(Querier.get_instance().send_get_request(NormalisedURLPath('/recipe/user')))
+
+
+async def start_core_and_querier(**kwargs: Any) -> FakeCore:
+    core = FakeCore()
+    await core.start()
+    Querier.reset()
+    Querier.init([core.get_host()], **kwargs)
+    return core
+
+
+async def stop_core_and_querier(core: FakeCore):
+    core.release()
+    await Querier.close()
+    await core.stop()
+
+
+@mark.asyncio
+async def test_identical_get_requests_share_one_call_to_the_core():
+    core = await start_core_and_querier(coalesce_get_requests=True)
+    core.held_paths.append('/recipe/user')
+    try:
+        querier = Querier.get_instance()
+        requests = [asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/user'),
+                                                                   {'userId': 'user1'}))
+                    for _ in range(3)]
+        await core.wait_for_requests_to('/recipe/user', 1)
+        core.release()
+        results = await asyncio.gather(*requests)
+
+        assert core.get_requests_to('/recipe/user') == [{'userId': 'user1'}]
+        assert results[0] == results[1] == results[2] == {'status': 'OK', 'path': '/recipe/user'}
+    finally:
+        await stop_core_and_querier(core)
+
+
+@mark.asyncio
+async def test_every_caller_gets_its_own_copy_of_a_shared_response():
+    core = await start_core_and_querier(coalesce_get_requests=True)
+    try:
+        querier = Querier.get_instance()
+        results = await asyncio.gather(*[querier.send_get_request(NormalisedURLPath('/recipe/user'),
+                                                                  {'userId': 'user1'})
+                                         for _ in range(2)])
+
+        assert len(core.get_requests_to('/recipe/user')) == 1
+        assert results[0] is not results[1]
+        results[0]['status'] = 'CHANGED'
+        assert results[1]['status'] == 'OK'
+    finally:
+        await stop_core_and_querier(core)
+
+
+@mark.asyncio
+async def test_cancelling_one_caller_doesnt_cancel_the_shared_request():
+    core = await start_core_and_querier(coalesce_get_requests=True)
+    core.held_paths.append('/recipe/user')
+    try:
+        querier = Querier.get_instance()
+        cancelled = asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/user'),
+                                                                   {'userId': 'user1'}))
+        waiting = asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/user'),
+                                                                 {'userId': 'user1'}))
+        await core.wait_for_requests_to('/recipe/user', 1)
+        cancelled.cancel()
+        with raises(asyncio.CancelledError):
+            await cancelled
+
+        core.release()
+        assert await waiting == {'status': 'OK', 'path': '/recipe/user'}
+        assert len(core.get_requests_to('/recipe/user')) == 1
+    finally:
+        await stop_core_and_querier(core)
+
+
+@mark.asyncio
+async def test_an_error_from_the_shared_request_reaches_every_caller():
+    core = await start_core_and_querier(coalesce_get_requests=True)
+    core.held_paths.append('/recipe/user')
+    core.responses['/recipe/user'] = (400, {'message': 'bad request'})
+    try:
+        querier = Querier.get_instance()
+        requests = [asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/user'),
+                                                                   {'userId': 'user1'}))
+                    for _ in range(3)]
+        await core.wait_for_requests_to('/recipe/user', 1)
+        core.release()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+
+        assert len(core.get_requests_to('/recipe/user')) == 1
+        for result in results:
+            assert isinstance(result, GeneralError)
+            assert 'status code: 400' in str(result)
+    finally:
+        await stop_core_and_querier(core)
+
+
+@mark.asyncio
+async def test_get_requests_with_different_params_or_paths_are_not_merged():
+    core = await start_core_and_querier(coalesce_get_requests=True)
+    core.held_paths.extend(['/recipe/user', '/recipe/session'])
+    try:
+        querier = Querier.get_instance()
+        requests = [
+            asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/user'), {'userId': 'user1'})),
+            asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/user'), {'userId': 'user2'})),
+            asyncio.ensure_future(querier.send_get_request(NormalisedURLPath('/recipe/session'), {'userId': 'user1'}))
+        ]
+        await core.wait_for_requests_to('/recipe/user', 2)
+        await core.wait_for_requests_to('/recipe/session', 1)
+        core.release()
+        results = await asyncio.gather(*requests)
+
+        assert sorted(params['userId'] for params in core.get_requests_to('/recipe/user')) == ['user1', 'user2']
+        assert core.get_requests_to('/recipe/session') == [{'userId': 'user1'}]
+        assert results[2] == {'status': 'OK', 'path': '/recipe/session'}
+    finally:
+        await stop_core_and_querier(core)
+
+
+@mark.asyncio
+async def test_get_requests_are_not_merged_unless_enabled():
+    core = await start_core_and_querier()
+    try:
+        querier = Querier.get_instance()
+        await asyncio.gather(*[querier.send_get_request(NormalisedURLPath('/recipe/user'), {'userId': 'user1'})
+                               for _ in range(2)])
+
+        assert len(core.get_requests_to('/recipe/user')) == 2
+    finally:
+        await stop_core_and_querier(core)
+
+
+def test_requests_from_one_event_loop_reuse_the_pooled_connection():
+    with run_fake_core_in_thread() as core:
+        loop = asyncio.new_event_loop()
+        try:
+            for _ in range(3):
+                assert send_get_request_on(loop) == {'status': 'OK', 'path': '/recipe/user'}
+            # the api version and the three requests
+            assert len(core.requests) == 4
+            assert core.connections_opened == 1
+            loop.run_until_complete(Querier.close())
+        finally:
+            loop.close()
+
+
+def test_every_event_loop_gets_its_own_connections():
+    with run_fake_core_in_thread() as core:
+        loops = [asyncio.new_event_loop(), asyncio.new_event_loop()]
+        try:
+            for loop in loops + loops:
+                send_get_request_on(loop)
+            assert core.connections_opened == 2
+            for loop in loops:
+                loop.run_until_complete(Querier.close())
+            wait_until(lambda: core.connections_closed == 2)
+        finally:
+            for loop in loops:
+                loop.close()
+
+
+def test_close_closes_the_connections_of_the_current_event_loop():
+    with run_fake_core_in_thread() as core:
+        loop = asyncio.new_event_loop()
+        try:
+            send_get_request_on(loop)
+            loop.run_until_complete(Querier.close())
+            wait_until(lambda: core.connections_closed == 1)
+
+            # the next request opens a new connection
+            send_get_request_on(loop)
+            assert core.connections_opened == 2
+            loop.run_until_complete(Querier.close())
+        finally:
+            loop.close()
+
+
+@mark.filterwarnings('ignore::ResourceWarning')
+def test_close_drops_the_connections_of_closed_event_loops():
+    with run_fake_core_in_thread() as core:
+        closed_loop = asyncio.new_event_loop()
+        send_get_request_on(closed_loop)
+        closed_loop.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(Querier.close())
+            # the sockets are closed when the dropped client is garbage collected
+            gc.collect()
+            wait_until(lambda: core.connections_closed == 1)
+        finally:
+            loop.close()
+
+
+async def start_cores_and_querier(no_of_cores: int) -> List[FakeCore]:
+    cores = [FakeCore() for _ in range(no_of_cores)]
+    for core in cores:
+        await core.start()
+    Querier.reset()
+    Querier.init([core.get_host() for core in cores])
+    return cores
+
+
+def get_stats_of(core: FakeCore) -> Dict[str, Any]:
+    return Querier.get_host_stats()[core.url]
+
+
+async def eject(core: FakeCore) -> int:
+    """
+    Stops the core and sends requests until the querier ejects it. Returns the port it was on.
+    """
+    port = int(core.url.split(':')[-1])
+    await core.stop()
+    while not get_stats_of(core)['ejected']:
+        assert await Querier.get_instance().send_get_request(NormalisedURLPath('/recipe/user')) == \
+            {'status': 'OK', 'path': '/recipe/user'}
+    return port
+
+
+def end_cooldowns(monkeypatch: MonkeyPatch):
+    get_now_ms = host_selector._get_now_ms  # pylint: disable=protected-access
+    monkeypatch.setattr(host_selector, '_get_now_ms', lambda: get_now_ms() + 60000)
+
+
+@mark.asyncio
+async def test_a_core_that_is_down_is_ejected_and_used_again_once_it_passes_a_probe(monkeypatch: MonkeyPatch):
+    down, up = await start_cores_and_querier(2)
+    try:
+        querier = Querier.get_instance()
+        port = await eject(down)
+        request_count = get_stats_of(down)['requestCount']
+        for _ in range(3):
+            await querier.send_get_request(NormalisedURLPath('/recipe/user'))
+        # the other core answers, so the ejected one isn't tried
+        assert get_stats_of(down)['requestCount'] == request_count
+
+        await down.start(port)
+        # during the cooldown, the core isn't probed
+        await querier.send_get_request(NormalisedURLPath('/recipe/user'))
+        assert down.requests == []
+
+        end_cooldowns(monkeypatch)
+        await querier.send_get_request(NormalisedURLPath('/recipe/user'))
+        await down.wait_for_requests_to('/apiversion', 1)
+        while get_stats_of(down)['ejected']:
+            await asyncio.sleep(0.01)
+        assert not get_stats_of(down)['beingProbed']
+
+        # the recovered core answers the requests when the other one goes down
+        await eject(up)
+        assert len(down.get_requests_to('/recipe/user')) > 0
+        assert not get_stats_of(down)['ejected']
+    finally:
+        await stop_core_and_querier(down)
+        await up.stop()
+
+
+@mark.asyncio
+async def test_a_core_that_fails_its_probe_stays_ejected(monkeypatch: MonkeyPatch):
+    down, up = await start_cores_and_querier(2)
+    try:
+        await eject(down)
+        end_cooldowns(monkeypatch)
+        await Querier.get_instance().send_get_request(NormalisedURLPath('/recipe/user'))
+        while get_stats_of(down)['beingProbed']:
+            await asyncio.sleep(0.01)
+        assert get_stats_of(down)['ejected']
+    finally:
+        await Querier.close()
+        await up.stop()
+
+
+@mark.asyncio
+async def test_a_cancelled_probe_lets_the_core_be_probed_again(monkeypatch: MonkeyPatch):
+    down, up = await start_cores_and_querier(2)
+    try:
+        querier = Querier.get_instance()
+        port = await eject(down)
+        down.held_paths.append('/apiversion')
+        await down.start(port)
+        end_cooldowns(monkeypatch)
+        await querier.send_get_request(NormalisedURLPath('/recipe/user'))
+        await down.wait_for_requests_to('/apiversion', 1)
+        assert get_stats_of(down)['beingProbed']
+
+        # closing the querier on this loop, as it happens before the loop is stopped
+        await Querier.close()
+        assert not get_stats_of(down)['beingProbed']
+        assert get_stats_of(down)['ejected']
+
+        await querier.send_get_request(NormalisedURLPath('/recipe/user'))
+        await down.wait_for_requests_to('/apiversion', 2)
+    finally:
+        await stop_core_and_querier(down)
+        await up.stop()
+
+
+@mark.asyncio
+async def test_the_latency_of_a_request_doesnt_include_getting_the_api_version(monkeypatch: MonkeyPatch):
+    core = await start_core_and_querier()
+    core.held_paths.append('/apiversion')
+    latencies: List[float] = []
+    selector = Querier._Querier__host_selector  # type: ignore # pylint: disable=protected-access
+    record_success = selector.record_success
+    monkeypatch.setattr(selector, 'record_success',
+                        lambda host, latency_ms: latencies.append(latency_ms) or record_success(host, latency_ms))
+    try:
+        asyncio.get_event_loop().call_later(0.2, core.release)
+        await Querier.get_instance().send_get_request(NormalisedURLPath('/recipe/user'))
+
+        api_version_latency, request_latency = latencies
+        assert api_version_latency >= 200
+        assert request_latency < 100
+    finally:
+        await stop_core_and_querier(core)
+
+
+def test_http2_needs_the_h2_package():
+    try:
+        import h2  # type: ignore # pylint: disable=import-outside-toplevel,unused-import
+        has_h2 = True
+    except ImportError:
+        has_h2 = False
+    if has_h2:
+        assert SupertokensConfig('http://localhost:3567', http2=True).http2
+    else:
+        with raises(GeneralError, match='h2'):
+            SupertokensConfig('http://localhost:3567', http2=True)
+    assert not SupertokensConfig('http://localhost:3567').http2
@@ -0,0 +1,149 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List
+
+from pytest import mark, raises
+from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.recipe.session import session_functions
+from supertokens_python.recipe.session.refresh_coalescing import (
+    InProcessRefreshCoalescing, get_refresh_coalescing_key)
+
+
+class Core:
+    def __init__(self):
+        self.refreshes: List[str] = []
+
+    async def refresh(self, refresh_token: str) -> Dict[str, Any]:
+        self.refreshes.append(refresh_token)
+        await asyncio.sleep(0.1)
+        if refresh_token == 'revoked':
+            raise Exception('UNAUTHORISED')
+        return {'status': 'OK', 'refreshToken': {'token': 'new-' + refresh_token}}
+
+
+class SpyRefreshCoalescing(InProcessRefreshCoalescing):
+    def __init__(self):
+        super().__init__()
+        self.keys: List[str] = []
+
+    async def refresh(self, key: str, call_core: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        self.keys.append(key)
+        return await super().refresh(key, call_core)
+
+
+class MockQuerier:
+    def __init__(self):
+        self.refreshes: List[Dict[str, Any]] = []
+
+    async def send_post_request(self, path: NormalisedURLPath, data: Dict[str, Any]) -> Dict[str, Any]:
+        assert path.get_as_string_dangerous() == '/recipe/session/refresh'
+        self.refreshes.append(data)
+        await asyncio.sleep(0.1)
+        return {
+            'status': 'OK',
+            'session': {'handle': 'handle', 'userId': 'user', 'userDataInJWT': {}},
+            'accessToken': {'token': 'access-' + data['refreshToken'], 'expiry': 0, 'createdTime': 0}
+        }
+
+
+class MockHandshakeInfo:
+    anti_csrf = 'VIA_TOKEN'
+
+
+class MockConfig:
+    def __init__(self):
+        self.refresh_coalescing = SpyRefreshCoalescing()
+
+
+class MockRecipeImplementation:
+    def __init__(self):
+        self.querier = MockQuerier()
+        self.config = MockConfig()
+
+    async def get_handshake_info(self) -> MockHandshakeInfo:
+        return MockHandshakeInfo()
+
+
+def test_the_key_depends_on_the_anti_csrf_token():
+    assert get_refresh_coalescing_key('token', None) == get_refresh_coalescing_key('token', None)
+    assert get_refresh_coalescing_key('token', None) != get_refresh_coalescing_key('token', 'antiCsrf')
+    assert 'token' not in get_refresh_coalescing_key('token', None)
+
+
+@mark.asyncio
+async def test_concurrent_refreshes_with_the_same_token_share_one_core_call():
+    core = Core()
+    coalescing = InProcessRefreshCoalescing()
+
+    def refresh(refresh_token: str):
+        return coalescing.refresh(get_refresh_coalescing_key(refresh_token, None),
+                                  lambda: core.refresh(refresh_token))
+
+    results = await asyncio.gather(refresh('a'), refresh('a'), refresh('a'), refresh('b'))
+
+    assert [r['refreshToken']['token'] for r in results] == ['new-a', 'new-a', 'new-a', 'new-b']
+    assert core.refreshes == ['a', 'b']
+
+    # once done, the next refresh calls the core again
+    await refresh('a')
+    assert core.refreshes == ['a', 'b', 'a']
+
+    with raises(Exception, match='UNAUTHORISED'):
+        await asyncio.gather(refresh('revoked'), refresh('revoked'))
+    assert core.refreshes == ['a', 'b', 'a', 'revoked']
+
+
+def test_refreshes_are_shared_across_event_loops_of_different_threads():
+    core = Core()
+    coalescing = InProcessRefreshCoalescing()
+
+    def refresh_on_new_event_loop(_: int):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coalescing.refresh('key', lambda: core.refresh('a')))
+        finally:
+            loop.close()
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(refresh_on_new_event_loop, range(4)))
+
+    assert all(r['refreshToken']['token'] == 'new-a' for r in results)
+    assert core.refreshes == ['a']
+
+
+@mark.asyncio
+async def test_concurrent_refresh_sessions_with_the_same_token_share_one_core_call():
+    recipe_implementation: Any = MockRecipeImplementation()
+
+    results = await asyncio.gather(
+        *[session_functions.refresh_session(recipe_implementation, 'a', 'antiCsrf', True) for _ in range(3)],
+        session_functions.refresh_session(recipe_implementation, 'a', 'otherAntiCsrf', True))
+
+    assert recipe_implementation.querier.refreshes == [
+        {'refreshToken': 'a', 'enableAntiCsrf': True, 'antiCsrfToken': 'antiCsrf'},
+        {'refreshToken': 'a', 'enableAntiCsrf': True, 'antiCsrfToken': 'otherAntiCsrf'}
+    ]
+    assert recipe_implementation.config.refresh_coalescing.keys == \
+        [get_refresh_coalescing_key('a', 'antiCsrf')] * 3 + [get_refresh_coalescing_key('a', 'otherAntiCsrf')]
+    assert all(result['accessToken']['token'] == 'access-a' for result in results)
+    assert 'status' not in results[0]
+
+    # every caller gets its own copy of the shared response
+    assert results[0] is not results[1]
+    results[0]['accessToken']['token'] = 'changed'
+    results[1]['session']['userId'] = 'changed'
+    assert results[2]['accessToken']['token'] == 'access-a'
+    assert results[2]['session']['userId'] == 'user'
@@ -0,0 +1,171 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+from typing import Any, Dict, List, Union
+
+from django.test import RequestFactory
+from fastapi import Request
+from flask import Flask
+from pytest import fixture, mark, raises
+from supertokens_python.exceptions import GeneralError
+from supertokens_python.framework import BaseRequest, set_json_decoder
+from supertokens_python.framework.django.django_request import DjangoRequest
+from supertokens_python.framework.fastapi.fastapi_request import \
+    FastApiRequest
+from supertokens_python.framework.flask.flask_request import FlaskRequest
+
+decoded: List[bytes] = []
+
+
+def counting_decoder(body: bytes) -> Any:
+    decoded.append(body)
+    return json.loads(body)
+
+
+@fixture(autouse=True)
+def json_decoder():
+    decoded.clear()
+    set_json_decoder(counting_decoder)
+    yield
+    set_json_decoder(json.loads)
+
+
+@mark.asyncio
+async def test_fastapi_body_is_parsed_once_and_shared_through_request_state():
+    body = b'{"email": "test@example.com"}'
+    received = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        return received.pop(0)
+
+    request = Request({'type': 'http', 'method': 'POST', 'path': '/auth/signin', 'headers': []}, receive)
+
+    assert await FastApiRequest(request).json() == {'email': 'test@example.com'}
+    # another wrapper of the same request, like the ones verify_session creates
+    assert await FastApiRequest(request).json() == {'email': 'test@example.com'}
+    assert decoded == [body]
+    assert request.state.supertokens_body.raw == body
+    assert request.state.supertokens_body.json == {'email': 'test@example.com'}
+
+
+@mark.asyncio
+async def test_django_invalid_json_is_an_empty_dict_and_form_data_is_parsed_once():
+    django_request = RequestFactory().post('/auth/callback/apple', 'code=abc&state=xyz',
+                                           content_type='application/x-www-form-urlencoded')
+    request = DjangoRequest(django_request)
+
+    assert await request.json() == {}
+    assert await request.json() == {}
+    assert len(decoded) == 1
+    assert await request.form_data() == {'code': 'abc', 'state': 'xyz'}
+    assert django_request.supertokens_body.form_data == {'code': 'abc', 'state': 'xyz'}  # type: ignore
+
+
+@mark.asyncio
+async def test_flask_body_is_parsed_once():
+    app = Flask(__name__)
+    with app.test_request_context('/auth/signup', method='POST', data='{"formFields": []}',
+                                  content_type='application/json'):
+        from flask import g, request
+        assert await FlaskRequest(request).json() == {'formFields': []}
+        assert await FlaskRequest(request).json() == {'formFields': []}
+        assert len(decoded) == 1
+        assert g.supertokens_body.json == {'formFields': []}
+
+
+@mark.asyncio
+async def test_a_null_json_body_is_parsed_once():
+    app = Flask(__name__)
+    with app.test_request_context('/auth/signup', method='POST', data='null', content_type='application/json'):
+        from flask import g, request
+        assert await FlaskRequest(request).json() is None
+        assert await FlaskRequest(request).json() is None
+        assert len(decoded) == 1
+        assert g.supertokens_body.json is None
+
+
+@mark.asyncio
+async def test_flask_bodies_without_a_json_content_type_are_none():
+    app = Flask(__name__)
+    with app.test_request_context('/auth/signup', method='POST', data='{"formFields": []}',
+                                  content_type='text/plain'):
+        from flask import request
+        assert await FlaskRequest(request).json() is None
+        assert len(decoded) == 0
+
+
+@mark.asyncio
+async def test_callers_share_the_parsed_body():
+    django_request = RequestFactory().post('/auth/signin', '{"formFields": [{"id": "email"}]}',
+                                           content_type='application/json')
+    assert await DjangoRequest(django_request).json() is await DjangoRequest(django_request).json()
+
+    form_request = RequestFactory().post('/auth/callback/apple', 'code=abc',
+                                         content_type='application/x-www-form-urlencoded')
+    assert await DjangoRequest(form_request).form_data() is await DjangoRequest(form_request).form_data()
+
+
+class CustomRequest(BaseRequest):
+    """
+    A wrapper written before BaseRequest had get_request_body and read_body.
+    """
+
+    def __init__(self, body: Union[Dict[str, Any], None] = None):
+        super().__init__()
+        self.body = body
+        self.session = None
+
+    def get_query_param(self, key: str, default: Union[str, None] = None) -> Union[str, None]:
+        return default
+
+    async def json(self) -> Union[Any, None]:
+        return self.body
+
+    async def form_data(self) -> Dict[str, Any]:
+        return {}
+
+    def method(self) -> str:
+        return 'post'
+
+    def get_cookie(self, key: str) -> Union[str, None]:
+        return None
+
+    def get_header(self, key: str) -> Union[None, str]:
+        return None
+
+    def get_session(self) -> Any:
+        return self.session
+
+    def set_session(self, session: Any):
+        self.session = session
+
+    def set_session_as_none(self):
+        self.session = None
+
+    def get_path(self) -> str:
+        return '/auth/signin'
+
+
+@mark.asyncio
+async def test_wrappers_that_implement_json_and_form_data_themselves_still_work():
+    request = CustomRequest({'formFields': []})
+    assert await request.json() == {'formFields': []}
+    assert request.get_request_body() is request.get_request_body()
+
+    class WithoutBody(CustomRequest):
+        async def json(self) -> Union[Any, None]:
+            return await BaseRequest.json(self)
+
+    with raises(GeneralError, match='read_body'):
+        await WithoutBody().get_raw_body()
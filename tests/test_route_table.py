@@ -0,0 +1,100 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from typing import Union
+
+from supertokens_python import InputAppInfo, Supertokens, SupertokensConfig, init
+from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.recipe import emailpassword, session
+from supertokens_python.recipe_module import RecipeModule
+
+from tests.utils import reset
+
+
+def setup_function(_):
+    reset()
+
+
+def teardown_function(_):
+    reset()
+
+
+def match_by_asking_every_recipe(path: NormalisedURLPath, method: str, rid: Union[str, None]):
+    for recipe in Supertokens.get_instance().recipe_modules:
+        if rid is not None:
+            if recipe.get_recipe_id() == rid:
+                return recipe, recipe.return_api_id_if_can_handle_request(path, method)
+        else:
+            request_id = recipe.return_api_id_if_can_handle_request(path, method)
+            if request_id is not None:
+                return recipe, request_id
+    return None, None
+
+
+def test_route_table_matches_the_same_apis_as_the_recipes():
+    init(
+        supertokens_config=SupertokensConfig('http://localhost:3567'),
+        app_info=InputAppInfo(
+            app_name='SuperTokens Demo',
+            api_domain='api.supertokens.io',
+            website_domain='supertokens.io',
+            api_gateway_path='/gateway'
+        ),
+        framework='fastapi',
+        recipe_list=[session.init(), emailpassword.init()]
+    )
+    supertokens = Supertokens.get_instance()
+    route_table = supertokens.route_table
+
+    request_paths = ['/auth/signin', '/auth/signin/', '/AUTH/SIGNUP', '/auth/session/refresh', '/auth/signout',
+                     '/auth/user/email/verify', '/auth/nope', '/other', '/']
+    no_of_matches = 0
+    for request_path in request_paths:
+        path = route_table.get_path(request_path)
+        assert path.get_as_string_dangerous() == supertokens.app_info.api_gateway_path.append(
+            NormalisedURLPath(request_path)).get_as_string_dangerous()
+        for method in ['get', 'post', 'put', 'delete']:
+            for rid in [None, 'session', 'emailpassword', 'emailverification', 'unknown']:
+                recipe, request_id = route_table.match(path, method, rid)
+                expected: Union[RecipeModule, None]
+                expected, expected_request_id = match_by_asking_every_recipe(path, method, rid)
+                assert recipe is expected
+                assert request_id == expected_request_id
+                if request_id is not None:
+                    no_of_matches += 1
+    assert no_of_matches > 10
+
+
+def test_only_paths_that_cant_be_handled_are_outside_the_api_base_path():
+    init(
+        supertokens_config=SupertokensConfig('http://localhost:3567'),
+        app_info=InputAppInfo(
+            app_name='SuperTokens Demo',
+            api_domain='api.supertokens.io',
+            website_domain='supertokens.io',
+            api_gateway_path='/gateway',
+            api_base_path='/custom/auth'
+        ),
+        framework='fastapi',
+        recipe_list=[session.init()]
+    )
+    supertokens = Supertokens.get_instance()
+    route_table = supertokens.route_table
+    for request_path in ['/custom/auth/signout', '/CUSTOM/Auth/session/refresh/', '/custom/auth', '/custom/authx',
+                         '/custom/auth?x=1', '/', '/custom', '/custom/aut', '/api/users', '/gateway/custom/auth',
+                         'custom/auth', 'http://api.supertokens.io/custom/auth/signout']:
+        path = supertokens.app_info.api_gateway_path.append(NormalisedURLPath(request_path))
+        is_handled = path.startswith(supertokens.app_info.api_base_path)
+        assert not (is_handled and route_table.is_outside_api_base_path(request_path))
+        if request_path in ['/', '/api/users', '/custom', '/gateway/custom/auth']:
+            assert route_table.is_outside_api_base_path(request_path)
@@ -81,19 +81,17 @@ async def test_that_once_the_info_is_loaded_it_doesnt_query_again():
 
     assert AllowedProcessStates.CALLING_SERVICE_IN_VERIFY in ProcessState.get_instance().history
 
-    assert response3['session'] is not None
-    assert response3['accessToken'] is not None
-    assert len(response3.keys()) == 2
+    assert response3.session is not None
+    assert response3.access_token is not None
 
     ProcessState.get_instance().reset()
 
-    response4 = await get_session(s.recipe_implementation, response3['accessToken']['token'], response2['antiCsrfToken'], True, response['idRefreshToken']['token'])
+    response4 = await get_session(s.recipe_implementation, response3.access_token.token, response2['antiCsrfToken'], True, response['idRefreshToken']['token'])
     assert AllowedProcessStates.CALLING_SERVICE_IN_VERIFY not in ProcessState.get_instance().history
 
-    assert response4['session'] is not None
-    assert 'accessToken' not in response4
-    assert len(response4.keys()) == 1
+    assert response4.session is not None
+    assert response4.access_token is None
 
-    response5 = await revoke_session(s.recipe_implementation, response4['session']['handle'])
+    response5 = await revoke_session(s.recipe_implementation, response4.session.handle)
 
     assert response5 is True
@@ -0,0 +1,128 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+from typing import Any, Dict
+
+from pytest import mark, raises
+from supertokens_python.exceptions import GeneralError
+from supertokens_python.recipe.session.interfaces import (
+    RegenerateAccessTokenOkResult, SessionContainer, SessionInformationResult,
+    SessionObj, TokenInfo)
+from supertokens_python.recipe.session.session_class import Session
+from supertokens_python.recipe.session.with_jwt.session_class import \
+    get_session_with_jwt
+
+
+class CoreSessionRecipeImplementation:
+    # the parts of the recipe implementation that a Session uses to get and update its data
+    def __init__(self):
+        self.session_data: Dict[str, Any] = {'plan': 'free'}
+        self.calls_to_get_session_information = 0
+
+    async def get_session_information(self, session_handle: str, user_context: Dict[str, Any]):
+        self.calls_to_get_session_information += 1
+        await asyncio.sleep(0.01)
+        return SessionInformationResult('OK', session_handle, 'userId', dict(self.session_data), 2000, {}, 1000)
+
+    async def update_session_data(self, session_handle: str, new_session_data: Dict[str, Any],
+                                  user_context: Dict[str, Any]):
+        self.session_data = new_session_data
+
+
+@mark.asyncio
+async def test_session_information_is_fetched_once_per_session():
+    recipe_implementation = CoreSessionRecipeImplementation()
+    session = Session(recipe_implementation, 'accessToken', 'handle', 'userId', {})  # type: ignore
+
+    session.prefetch()
+    data, created, expiry = await asyncio.gather(session.get_session_data(), session.get_time_created(),
+                                                 session.get_expiry())
+
+    assert (data, created, expiry) == ({'plan': 'free'}, 1000, 2000)
+    assert await session.get_session_data() == {'plan': 'free'}
+    assert recipe_implementation.calls_to_get_session_information == 1
+
+
+@mark.asyncio
+async def test_updating_the_session_data_invalidates_the_session_information():
+    recipe_implementation = CoreSessionRecipeImplementation()
+    session = Session(recipe_implementation, 'accessToken', 'handle', 'userId', {})  # type: ignore
+
+    session.prefetch()
+    # changes the data while it is being fetched
+    await session.update_session_data({'plan': 'pro'})
+
+    assert await session.get_session_data() == {'plan': 'pro'}
+    assert await session.get_expiry() == 2000
+    assert recipe_implementation.calls_to_get_session_information == 2
+
+
+@mark.asyncio
+async def test_the_session_data_returned_is_a_copy():
+    session = Session(CoreSessionRecipeImplementation(), 'accessToken', 'handle', 'userId', {})  # type: ignore
+
+    data = await session.get_session_data()
+    data['plan'] = 'pro'
+
+    assert await session.get_session_data() == {'plan': 'free'}
+
+
+def test_prefetch_fails_without_a_running_event_loop():
+    session = Session(CoreSessionRecipeImplementation(), 'accessToken', 'handle', 'userId', {})  # type: ignore
+    with raises(GeneralError, match='async code'):
+        session.prefetch()
+
+
+def test_sessions_can_be_extended_with_attributes():
+    session = Session(CoreSessionRecipeImplementation(), 'accessToken', 'handle', 'user', {})  # type: ignore
+    session.request_id = 'id'  # type: ignore
+    assert session.request_id == 'id'  # type: ignore
+    assert session['user_id'] == 'user'
+
+
+def test_token_info_can_be_read_like_the_dict_of_the_core():
+    token_info = TokenInfo('token', 1000, 10)
+    assert (token_info['token'], token_info['expiry'], token_info['createdTime']) == ('token', 1000, 10)
+    assert not hasattr(token_info, '__dict__')
+    with raises(KeyError):
+        token_info['unknown']  # pylint: disable=pointless-statement
+
+
+@mark.asyncio
+async def test_the_jwt_feature_overrides_update_access_token_payload_of_the_session():
+    class RecipeImplementation(CoreSessionRecipeImplementation):
+        async def regenerate_access_token(self, access_token: str, new_access_token_payload: Dict[str, Any],
+                                          user_context: Dict[str, Any]):
+            return RegenerateAccessTokenOkResult(SessionObj('handle', 'user', new_access_token_payload), None)
+
+    openid_recipe_implementation: Any = object()
+    session = Session(RecipeImplementation(), 'accessToken', 'handle', 'user', {})  # type: ignore
+
+    session_with_jwt = get_session_with_jwt(session, openid_recipe_implementation)
+    assert session_with_jwt is session and type(session) is Session
+    assert 'update_access_token_payload' in vars(session)
+
+    # without a jwt in the payload, the payload is updated as is
+    await session.update_access_token_payload({'role': 'admin'})
+    assert session.get_access_token_payload() == {'role': 'admin'}
+
+
+def test_session_containers_that_dont_implement_prefetch_can_be_created():
+    # like a SessionContainer subclass that was written before prefetch was added
+    methods = {name: lambda *args, **kwargs: None for name in SessionContainer.__abstractmethods__}  # type: ignore
+    custom_session_class: Any = type('CustomSession', (SessionContainer,), methods)
+    session = custom_session_class(CoreSessionRecipeImplementation(), 'accessToken', 'handle', 'userId', {})
+
+    assert 'prefetch' not in SessionContainer.__abstractmethods__  # type: ignore
+    assert session.prefetch() is None
@@ -0,0 +1,233 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+from typing import Any, Dict, List, Union
+
+from pytest import mark
+from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.recipe.emailpassword.recipe_implementation import \
+    RecipeImplementation as EmailPasswordRecipeImplementation
+from supertokens_python.recipe.emailpassword.types import User
+from supertokens_python.recipe.passwordless.recipe_implementation import \
+    RecipeImplementation as PasswordlessRecipeImplementation
+from supertokens_python.recipe.thirdparty.recipe_implementation import \
+    RecipeImplementation as ThirdPartyRecipeImplementation
+from supertokens_python.user_cache import (InMemoryUserCache,
+                                           get_user_through_cache)
+
+
+class MockCoreQuerier:
+    """
+    Answers the user requests of the emailpassword, thirdparty and passwordless recipes from a
+    dict of users, and counts the lookups that reach it.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.lookups = 0
+        self.user_cache = InMemoryUserCache()
+
+    def get_user_cache(self) -> InMemoryUserCache:
+        return self.user_cache
+
+    def find_users(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        return [user for user in self.users.values()
+                if ('userId' not in params or user['id'] == params['userId'])
+                and ('email' not in params or user.get('email') == params['email'])
+                and ('phoneNumber' not in params or user.get('phoneNumber') == params['phoneNumber'])
+                and ('thirdPartyId' not in params or user['thirdParty']['id'] == params['thirdPartyId'])]
+
+    async def send_get_request(self, path: NormalisedURLPath, params: Dict[str, str]) -> Dict[str, Any]:
+        self.lookups += 1
+        users = self.find_users(params)
+        if path.get_as_string_dangerous() == '/recipe/users/by-email':
+            return {'status': 'OK', 'users': [dict(user) for user in users]}
+        if len(users) == 0:
+            return {'status': 'UNKNOWN_USER_ID_ERROR'}
+        return {'status': 'OK', 'user': dict(users[0])}
+
+    async def send_put_request(self, _: NormalisedURLPath, data: Dict[str, Any]) -> Dict[str, Any]:
+        user = self.users[data['userId']]
+        for key in ('email', 'phoneNumber'):
+            if key in data:
+                user[key] = data[key]
+        return {'status': 'OK'}
+
+    async def send_post_request(self, path: NormalisedURLPath, data: Dict[str, Any]) -> Dict[str, Any]:
+        path_str = path.get_as_string_dangerous()
+        if path_str == '/recipe/signup':
+            user: Dict[str, Any] = {'id': 'user' + str(len(self.users) + 1), 'email': data['email'], 'timeJoined': 0}
+            self.users[user['id']] = user
+            return {'status': 'OK', 'user': dict(user)}
+        if path_str == '/recipe/signinup':
+            email = data['email']['id']
+            for user in self.users.values():
+                if user['thirdParty'] == {'id': data['thirdPartyId'], 'userId': data['thirdPartyUserId']}:
+                    user['email'] = email
+                    return {'status': 'OK', 'createdNewUser': False, 'user': dict(user)}
+            user = {'id': 'user' + str(len(self.users) + 1), 'email': email, 'timeJoined': 0,
+                    'thirdParty': {'id': data['thirdPartyId'], 'userId': data['thirdPartyUserId']}}
+            self.users[user['id']] = user
+            return {'status': 'OK', 'createdNewUser': True, 'user': dict(user)}
+        raise Exception('unexpected request to ' + path_str)
+
+
+@mark.asyncio
+async def test_user_is_fetched_once_and_invalidated_by_user_id():
+    cache = InMemoryUserCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return User('user1', 'test@example.com', 0)
+
+    for _ in range(3):
+        user = await get_user_through_cache(cache, 'emailpassword:email:test@example.com', fetch, lambda u: [u.user_id])
+        assert user is not None and user.user_id == 'user1'
+    assert len(calls) == 1
+    assert cache.get_metrics()['hits'] == 2
+
+    cache.invalidate_user('user1')
+    await get_user_through_cache(cache, 'emailpassword:email:test@example.com', fetch, lambda u: [u.user_id])
+    assert len(calls) == 2
+
+
+@mark.asyncio
+async def test_users_that_are_not_found_are_not_cached():
+    cache = InMemoryUserCache()
+
+    async def fetch():
+        return None
+
+    assert await get_user_through_cache(cache, 'emailpassword:userId:unknown', fetch, lambda u: [u.user_id]) is None
+    assert cache.get_metrics()['size'] == 0
+
+
+def test_cache_is_bounded_and_entries_expire():
+    cache = InMemoryUserCache(max_size=2)
+    cache.set('a', 1, ['user1'], 0)
+    cache.set('b', 2, ['user2'], 0)
+    assert cache.get('a') == 1
+    cache.set('c', 3, ['user3'], 0)
+
+    # b was the least recently used entry
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get_metrics()['evictions'] == 1
+
+    expired = InMemoryUserCache(ttl_ms=0)
+    expired.set('a', 1, ['user1'], 0)
+    assert expired.get('a') is None
+
+
+@mark.asyncio
+async def test_a_lookup_that_was_in_flight_during_an_invalidation_is_not_cached():
+    cache = InMemoryUserCache()
+    fetching = asyncio.Event()
+    invalidated = asyncio.Event()
+
+    async def fetch():
+        fetching.set()
+        # the core answered before the update below
+        user = User('user1', 'old@example.com', 0)
+        await invalidated.wait()
+        return user
+
+    lookup = asyncio.ensure_future(
+        get_user_through_cache(cache, 'emailpassword:userId:user1', fetch, lambda u: [u.user_id]))
+    await fetching.wait()
+    cache.invalidate_user('user1')
+    invalidated.set()
+
+    assert (await lookup).email == 'old@example.com'
+    assert cache.get('emailpassword:userId:user1') is None
+
+
+@mark.asyncio
+async def test_callers_get_copies_of_the_cached_users():
+    cache = InMemoryUserCache()
+
+    async def fetch():
+        return User('user1', 'test@example.com', 0)
+
+    fetched = await get_user_through_cache(cache, 'emailpassword:userId:user1', fetch, lambda u: [u.user_id])
+    fetched.email = 'changed@example.com'
+    cached = await get_user_through_cache(cache, 'emailpassword:userId:user1', fetch, lambda u: [u.user_id])
+    assert cached.email == 'test@example.com'
+    cached.email = 'changed@example.com'
+    cached_again = await get_user_through_cache(cache, 'emailpassword:userId:user1', fetch, lambda u: [u.user_id])
+    assert cached_again.email == 'test@example.com'
+    assert cached_again is not cached
+
+
+@mark.asyncio
+async def test_emailpassword_update_email_or_password_invalidates_the_user():
+    querier = MockCoreQuerier()
+    recipe_implementation = EmailPasswordRecipeImplementation(querier)  # type: ignore
+    await recipe_implementation.sign_up('old@example.com', 'password', {})
+    assert (await recipe_implementation.get_user_by_id('user1', {})).email == 'old@example.com'
+    assert (await recipe_implementation.get_user_by_email('old@example.com', {})) is not None
+    assert (await recipe_implementation.get_user_by_id('user1', {})).email == 'old@example.com'
+    assert querier.lookups == 2
+
+    await recipe_implementation.update_email_or_password('user1', 'new@example.com', None, {})
+    assert (await recipe_implementation.get_user_by_id('user1', {})).email == 'new@example.com'
+    assert await recipe_implementation.get_user_by_email('old@example.com', {}) is None
+    assert (await recipe_implementation.get_user_by_email('new@example.com', {})).user_id == 'user1'
+
+
+@mark.asyncio
+async def test_emailpassword_users_that_sign_up_are_found_by_email():
+    querier = MockCoreQuerier()
+    recipe_implementation = EmailPasswordRecipeImplementation(querier)  # type: ignore
+    assert await recipe_implementation.get_user_by_email('test@example.com', {}) is None
+    await recipe_implementation.sign_up('test@example.com', 'password', {})
+    assert (await recipe_implementation.get_user_by_email('test@example.com', {})).user_id == 'user1'
+
+
+@mark.asyncio
+async def test_thirdparty_sign_in_up_invalidates_the_user():
+    querier = MockCoreQuerier()
+    recipe_implementation = ThirdPartyRecipeImplementation(querier)  # type: ignore
+    await recipe_implementation.sign_in_up('google', 'google1', 'old@example.com', True, {})
+    assert [user.user_id for user in await recipe_implementation.get_users_by_email('old@example.com', {})] == ['user1']
+    assert (await recipe_implementation.get_user_by_id('user1', {})).email == 'old@example.com'
+    assert (await recipe_implementation.get_user_by_thirdparty_info('google', 'google1', {})) is not None
+
+    # signing in with a changed email updates the user
+    await recipe_implementation.sign_in_up('google', 'google1', 'new@example.com', True, {})
+    assert await recipe_implementation.get_users_by_email('old@example.com', {}) == []
+    assert (await recipe_implementation.get_user_by_id('user1', {})).email == 'new@example.com'
+    assert (await recipe_implementation.get_user_by_thirdparty_info('google', 'google1', {})).email == 'new@example.com'
+
+    # a new user with an email that is already cached
+    await recipe_implementation.sign_in_up('github', 'github1', 'new@example.com', True, {})
+    assert sorted(user.user_id for user in await recipe_implementation.get_users_by_email('new@example.com', {})) \
+        == ['user1', 'user2']
+
+
+@mark.asyncio
+async def test_passwordless_update_user_invalidates_the_user():
+    querier = MockCoreQuerier()
+    querier.users['user1'] = {'id': 'user1', 'email': 'old@example.com', 'phoneNumber': '+1000', 'timeJoined': 0}
+    recipe_implementation = PasswordlessRecipeImplementation(querier)  # type: ignore
+    assert (await recipe_implementation.get_user_by_id('user1', {})).email == 'old@example.com'
+    assert (await recipe_implementation.get_user_by_email('old@example.com', {})) is not None
+    assert (await recipe_implementation.get_user_by_phone_number('+1000', {})) is not None
+
+    await recipe_implementation.update_user('user1', 'new@example.com', '+2000', {})
+    assert (await recipe_implementation.get_user_by_id('user1', {})).phone_number == '+2000'
+    assert await recipe_implementation.get_user_by_email('old@example.com', {}) is None
+    assert await recipe_implementation.get_user_by_phone_number('+1000', {}) is None
+    assert (await recipe_implementation.get_user_by_phone_number('+2000', {})).email == 'new@example.com'
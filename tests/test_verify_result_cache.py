@@ -0,0 +1,186 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+from typing import Any, Dict, List
+
+from pytest import mark, raises
+from supertokens_python.exceptions import GeneralError
+from supertokens_python.normalised_url_path import NormalisedURLPath
+from supertokens_python.recipe.session import session_functions
+from supertokens_python.recipe.session.recipe_implementation import \
+    HandshakeInfo
+from supertokens_python.recipe.session.verify_result_cache import (
+    InMemoryVerifyResultCache, get_verify_result_cache_key)
+from supertokens_python.utils import get_timestamp_ms
+
+from tests.test_access_token import (create_access_token,
+                                     generate_signing_key,
+                                     get_access_token_payload)
+
+
+def response(session_handle: str):
+    return {'session': {'handle': session_handle, 'userId': 'user', 'userDataInJWT': {}}}
+
+
+def test_the_key_depends_on_the_anti_csrf_token_and_check():
+    key = get_verify_result_cache_key('token', None, False)
+    assert key == get_verify_result_cache_key('token', None, False)
+    assert key != get_verify_result_cache_key('token', None, True)
+    assert key != get_verify_result_cache_key('token', 'antiCsrf', False)
+    assert 'token' not in key
+
+
+def test_the_limits_must_be_positive():
+    with raises(GeneralError):
+        InMemoryVerifyResultCache(max_staleness_ms=0)
+    with raises(GeneralError):
+        InMemoryVerifyResultCache(max_size=0)
+
+
+@mark.asyncio
+async def test_responses_expire_after_max_staleness():
+    cache = InMemoryVerifyResultCache(max_staleness_ms=100)
+    await cache.set('key', 'handle', response('handle'))
+
+    cached = await cache.get('key')
+    assert cached == response('handle')
+    # callers get a copy
+    cached['session']['userId'] = 'changed'
+    assert await cache.get('key') == response('handle')
+
+    await asyncio.sleep(0.15)
+    assert await cache.get('key') is None
+
+
+@mark.asyncio
+async def test_revoking_a_session_removes_its_responses():
+    cache = InMemoryVerifyResultCache()
+    await cache.set('key1', 'handle1', response('handle1'))
+    await cache.set('key2', 'handle1', response('handle1'))
+    await cache.set('key3', 'handle2', response('handle2'))
+
+    await cache.invalidate_sessions(['handle1', 'unknown'])
+
+    assert await cache.get('key1') is None
+    assert await cache.get('key2') is None
+    assert await cache.get('key3') == response('handle2')
+
+
+@mark.asyncio
+async def test_the_oldest_responses_are_evicted_when_full():
+    cache = InMemoryVerifyResultCache(max_size=2)
+    await cache.set('key1', 'handle1', response('handle1'))
+    await cache.set('key2', 'handle2', response('handle2'))
+    await cache.set('key3', 'handle3', response('handle3'))
+
+    assert await cache.get('key1') is None
+    assert await cache.get('key2') == response('handle2')
+    assert await cache.get('key3') == response('handle3')
+
+
+class MockQuerier:
+    def __init__(self):
+        self.verifications: List[str] = []
+
+    async def send_post_request(self, path: NormalisedURLPath, data: Dict[str, Any]) -> Dict[str, Any]:
+        if path.get_as_string_dangerous() == '/recipe/session/verify':
+            self.verifications.append(data['accessToken'])
+            return {
+                'status': 'OK',
+                'session': {'handle': 'handle', 'userId': 'user', 'userDataInJWT': {}},
+                'jwtSigningPublicKey': None,
+                'jwtSigningPublicKeyExpiryTime': None,
+                'jwtSigningPublicKeyList': None
+            }
+        if 'userId' in data:
+            return {'status': 'OK', 'sessionHandlesRevoked': ['handle']}
+        return {'status': 'OK', 'sessionHandlesRevoked': data['sessionHandles']}
+
+
+class MockSessionConfig:
+    anti_csrf = 'NONE'
+    verification_executor = None
+
+    def __init__(self):
+        self.verify_result_cache = InMemoryVerifyResultCache()
+
+
+class MockRecipeImplementation:
+    def __init__(self, blacklisting: bool):
+        self.querier = MockQuerier()
+        self.config = MockSessionConfig()
+        now = get_timestamp_ms()
+        private_key, public_key = generate_signing_key()
+        self.handshake_info = HandshakeInfo({
+            'accessTokenBlacklistingEnabled': blacklisting,
+            'antiCsrf': 'NONE',
+            'accessTokenValidity': 3600000,
+            'refreshTokenValidity': 3600000
+        })
+        self.handshake_info.set_jwt_signing_public_key_list([{
+            'publicKey': public_key,
+            'expiryTime': now + 3600000,
+            'createdAt': now - 10
+        }])
+        self.access_token = create_access_token(private_key, get_access_token_payload(now))
+
+    async def get_handshake_info(self, _: bool = False) -> HandshakeInfo:
+        return self.handshake_info
+
+    def update_jwt_signing_public_key_info(self, *_: Any):
+        pass
+
+    async def get_session(self) -> Any:
+        return await session_functions.get_session(self, self.access_token, None, False, False)  # type: ignore
+
+
+@mark.asyncio
+async def test_get_session_uses_the_cache_when_blacklisting_is_enabled():
+    recipe_implementation = MockRecipeImplementation(True)
+
+    for _ in range(3):
+        result = await recipe_implementation.get_session()
+        assert result.session.handle == 'handle'
+    # the first one was a miss
+    assert recipe_implementation.querier.verifications == [recipe_implementation.access_token]
+
+
+@mark.asyncio
+async def test_get_session_doesnt_call_the_core_or_use_the_cache_without_blacklisting():
+    recipe_implementation = MockRecipeImplementation(False)
+
+    await recipe_implementation.get_session()
+    assert recipe_implementation.querier.verifications == []
+    assert await recipe_implementation.config.verify_result_cache.get(
+        get_verify_result_cache_key(recipe_implementation.access_token, None, False)) is None
+
+
+@mark.asyncio
+async def test_revoking_sessions_invalidates_their_cached_responses():
+    recipe_implementation = MockRecipeImplementation(True)
+    mock: Any = recipe_implementation
+
+    await recipe_implementation.get_session()
+    await session_functions.revoke_session(mock, 'handle')
+    await recipe_implementation.get_session()
+    assert len(recipe_implementation.querier.verifications) == 2
+
+    await session_functions.revoke_all_sessions_for_user(mock, 'user')
+    await recipe_implementation.get_session()
+    assert len(recipe_implementation.querier.verifications) == 3
+
+    await session_functions.revoke_multiple_sessions(mock, ['handle'])
+    await recipe_implementation.get_session()
+    await recipe_implementation.get_session()
+    assert len(recipe_implementation.querier.verifications) == 4
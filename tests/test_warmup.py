@@ -0,0 +1,123 @@
+# Copyright (c) 2021, VRAI Labs and/or its affiliates. All rights reserved.
+#
+# This software is licensed under the Apache License, Version 2.0 (the
+# "License") as published by the Apache Software Foundation.
+#
+# You may not use this file except in compliance with the License. You may
+# obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import asyncio
+from threading import current_thread
+from typing import List, Union
+
+from pytest import fixture, mark
+from supertokens_python import InputAppInfo, Supertokens, SupertokensConfig, init
+from supertokens_python.process_state import ProcessState
+from supertokens_python.querier import Querier
+from supertokens_python.recipe import session
+from supertokens_python.recipe.session import SessionRecipe
+from supertokens_python.warmup import Warmup
+
+
+@mark.asyncio
+async def test_ready_does_not_wait_for_background_tasks():
+    telemetry_sent = asyncio.Event()
+
+    async def api_version():
+        await asyncio.sleep(0.01)
+
+    async def telemetry():
+        await telemetry_sent.wait()
+
+    warmup = Warmup({'apiVersion': api_version}, [telemetry])
+    assert warmup.get_status() == {'apiVersion': 'pending'}
+    warmup.start()
+
+    assert await warmup.ready(1) is True
+    assert warmup.is_ready()
+    assert warmup.get_status() == {'apiVersion': 'done'}
+    telemetry_sent.set()
+
+
+@mark.asyncio
+async def test_a_failed_task_makes_warmup_unhealthy():
+    async def api_version():
+        pass
+
+    async def handshake():
+        raise Exception('core is down')
+
+    warmup = Warmup({'apiVersion': api_version, 'session': handshake}, [])
+    warmup.start()
+
+    assert await warmup.ready(1) is False
+    assert not warmup.is_ready()
+    assert warmup.get_status() == {'apiVersion': 'done', 'session': 'failed'}
+
+
+def test_warmup_runs_on_its_own_thread_without_an_event_loop():
+    threads: List[str] = []
+
+    async def handshake():
+        threads.append(current_thread().name)
+        await asyncio.sleep(0.1)
+
+    warmup = Warmup({'session': handshake}, [])
+    warmup.start()
+    assert not warmup.is_ready()
+
+    # ready can be awaited from any event loop
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(warmup.ready(0.01)) is False
+        assert loop.run_until_complete(warmup.ready(1)) is True
+    finally:
+        loop.close()
+    assert threads == ['supertokens-warmup']
+
+
+@fixture
+def reset_supertokens():
+    # other tests may have left states behind
+    ProcessState.get_instance().reset()
+    yield
+    Supertokens.reset()
+    SessionRecipe.reset()
+    ProcessState.get_instance().reset()
+
+
+def init_supertokens(warmup: Union[bool, None] = None):
+    # nothing listens on this port, so calls to the core fail right away
+    init(
+        supertokens_config=SupertokensConfig('http://localhost:1'),
+        app_info=InputAppInfo(app_name='SuperTokens Demo', api_domain='http://api.supertokens.io',
+                              website_domain='http://supertokens.io'),
+        framework='fastapi',
+        recipe_list=[session.init(anti_csrf='VIA_TOKEN')],
+        warmup=warmup
+    )
+
+
+@mark.asyncio
+async def test_init_doesnt_warm_up_in_testing_mode(reset_supertokens: None):
+    init_supertokens()
+    warmup = Supertokens.get_instance().warmup
+    assert warmup.is_ready()
+    assert warmup.get_status() == {}
+    await asyncio.sleep(0.1)
+    assert ProcessState.get_instance().history == []
+
+
+@mark.asyncio
+async def test_init_warms_up_when_asked_to(reset_supertokens: None):
+    init_supertokens(True)
+    warmup = Supertokens.get_instance().warmup
+    assert set(warmup.get_status()) == {'apiVersion', 'session'}
+    assert await warmup.ready(5) is False
+    assert warmup.get_status() == {'apiVersion': 'failed', 'session': 'failed'}
+    await Querier.close()